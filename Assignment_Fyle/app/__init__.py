@@ -1,8 +1,31 @@
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from config import Config, TestConfig
+import click
+import os
+from config import TestConfig, config_for
+from app.database.routing import RoutingSQLAlchemy
 
-db = SQLAlchemy()
+# Reads of GET requests go to the replica bind when SQLALCHEMY_REPLICA_URI is set
+db = RoutingSQLAlchemy()
+
+def cli_command():
+    """The `flask` subcommand loading the app, e.g. 'db' for `flask db upgrade`; None under a server"""
+    ctx = click.get_current_context(silent=True)
+    names = []
+    while ctx is not None:
+        names.append(ctx.info_name)
+        ctx = ctx.parent
+    return names[-2] if len(names) > 1 else None
+
+def init_migrate(app):
+    """Register Flask-Migrate for `flask` commands only.
+
+    Importing it pulls in alembic, about a fifth of a worker's import time,
+    and servers never run migrations.
+    """
+    if cli_command() is None:
+        return
+    from flask_migrate import Migrate
+    Migrate(app, db)
 
 def create_app(testing=False):
     app = Flask(__name__)
@@ -10,24 +33,64 @@ def create_app(testing=False):
     if testing:
         app.config.from_object(TestConfig)
     else:
-        app.config.from_object(Config)
+        app.config.from_object(config_for(os.getenv('FLASK_ENV')))
+
+    from app.database import routing
+    routing.configure(app)
+
+    from app.database.pool import engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'],
+        app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}),
+        app.config.get('DB_STATEMENT_TIMEOUT_MS', 0)
+    )
     
     db.init_app(app)
+    init_migrate(app)
     
     with app.app_context():
+        from app.database import sqlite_profile
+        sqlite_profile.init_app(app)
+
+        # Before create_all, whose connection is the pool's first
+        from app.database import pool
+        pool.init_app(app)
+
         # Import models before creating tables
-        from app.models import Student, Teacher, Assignment
+        from app.models import Student, Teacher, Assignment, GradeStat
         
-        # Ensure tables exist
-        db.create_all()
+        # Production relies on migrations, and `flask db` must not create the
+        # tables it is about to migrate; elsewhere make sure the tables exist
+        if app.config.get('CREATE_ALL_ON_STARTUP', True) and cli_command() != 'db':
+            db.create_all()
+
+        from app.database import query_counter
+        query_counter.init_app(app)
+
+        from app.middleware import metrics
+        metrics.init_app(app)
         
         # Register blueprints
         from app.controllers.student import student_bp
         from app.controllers.teacher import teacher_bp
         from app.controllers.principal import principal_bp
+        from app.controllers.monitoring import monitoring_bp
         
         app.register_blueprint(student_bp)
         app.register_blueprint(teacher_bp)
         app.register_blueprint(principal_bp)
+        app.register_blueprint(monitoring_bp)
+
+        from app.services.grade_stats_service import grade_stats_cli
+        app.cli.add_command(grade_stats_cli)
+
+        from app.services.content_service import content_cli
+        app.cli.add_command(content_cli)
+
+        from app.middleware import response_cache
+        response_cache.init_app(app)
+
+        from app.services import report_service
+        report_service.init_app(app)
     
     return app
@@ -0,0 +1,91 @@
+"""Async read path: the list endpoints served by an ASGI app.
+
+The sync Flask views hold a worker thread for the whole of each request.
+Here the same list queries run on an asyncio engine (aiosqlite locally,
+asyncpg for Postgres), so one process can wait on many slow queries at
+once. Writes stay on the Flask app; put both behind the same proxy and
+route `GET /*/assignments` here.
+
+    uvicorn asgi:app
+"""
+import logging
+import os
+from werkzeug.datastructures import MultiDict
+from werkzeug.urls import url_decode
+from app.aio.db import async_url, create_engine
+from app.database.pool import engine_options as configured_engine_options
+from app.aio.views import LISTS, error, list_assignments
+from app.serializers import encode_json
+from config import TestConfig, config_for
+
+logger = logging.getLogger(__name__)
+
+class AsyncReadApp:
+    """Minimal ASGI application for the read-only list endpoints"""
+
+    def __init__(self, engine, sort_keys=True, fast_json=True):
+        self.engine = engine
+        self.sort_keys = sort_keys
+        self.fast_json = fast_json
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        path = scope['path']
+        if path not in LISTS:
+            response = error('Not Found', 404)
+        elif scope['method'] not in ('GET', 'HEAD'):
+            response = error('Method Not Allowed', 405)
+        else:
+            query_string = scope['query_string'].decode('latin-1')
+            headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+            try:
+                response = await list_assignments(
+                    self.engine, path, MultiDict(url_decode(query_string)), headers,
+                    f'{path}?{query_string}'
+                )
+            except Exception as e:
+                logger.exception("Error serving %s", path)
+                response = error(str(e), 500)
+
+        body = b'' if response.payload is None else encode_json(
+            response.payload, sort_keys=self.sort_keys, fast=self.fast_json
+        )
+        headers = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+        if response.payload is not None:
+            headers.append((b'content-type', b'application/json'))
+        headers.append((b'content-length', str(len(body)).encode()))
+        await send({'type': 'http.response.start', 'status': response.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b'' if scope['method'] == 'HEAD' else body})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+def create_asgi_app(testing=False, database_url=None, engine_options=None):
+    """Build the async read app from the same config classes as `create_app`"""
+    config = TestConfig if testing else config_for(os.getenv('FLASK_ENV'))
+    # Everything here is a read, so prefer the replica when there is one
+    url = database_url or getattr(config, 'SQLALCHEMY_REPLICA_URI', None) or config.SQLALCHEMY_DATABASE_URI
+    options = configured_engine_options(
+        async_url(url),
+        getattr(config, 'SQLALCHEMY_ENGINE_OPTIONS', {}),
+        getattr(config, 'DB_STATEMENT_TIMEOUT_MS', 0)
+    )
+    options.update(engine_options or {})
+    engine = create_engine(url, **options)
+    return AsyncReadApp(
+        engine,
+        sort_keys=getattr(config, 'JSON_SORT_KEYS', True),
+        fast_json=getattr(config, 'FAST_JSON', True)
+    )
@@ -0,0 +1,25 @@
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Relative SQLite paths resolve against the app package, as Flask-SQLAlchemy does
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgres': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def async_url(url):
+    """Swap the sync driver in `url` for its asyncio counterpart"""
+    url = make_url(url)
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:' \
+            and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(APP_ROOT, url.database))
+    return url
+
+def create_engine(url, **options):
+    return create_async_engine(async_url(url), **options)
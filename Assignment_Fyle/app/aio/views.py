@@ -0,0 +1,84 @@
+from sqlalchemy import select
+from werkzeug.http import http_date, parse_date, parse_etags
+from app.exceptions import QueryParamError
+from app.middleware.auth import ROLE_ERRORS, parse_principal
+from app.middleware.conditional import VERSION_COLUMNS, is_fresh, make_version
+from app.models.assignment import Assignment
+from app.serializers import serialize_rows
+from app.services.assignment_query_service import (
+    TEACHER_LIST_FILTERS, parse_fields, principal_filters, projected_columns,
+    student_filters, teacher_filters
+)
+from app.services.pagination_service import keyset_condition, parse_page_args, split_page
+
+class Response:
+    __slots__ = ('status', 'payload', 'headers')
+
+    def __init__(self, payload=None, status=200, headers=None):
+        self.payload = payload
+        self.status = status
+        self.headers = headers or {}
+
+def error(message, status):
+    return Response({'error': message}, status)
+
+# Path -> (principal attribute the caller needs, function of that id returning
+# (cache scope, scope filters, extra list filters)); mirrors the sync list views
+LISTS = {
+    '/student/assignments': ('student_id', lambda student_id: (
+        f'student:{student_id}', student_filters(student_id), ())),
+    '/teacher/assignments': ('teacher_id', lambda teacher_id: (
+        f'teacher:{teacher_id}', teacher_filters(teacher_id), TEACHER_LIST_FILTERS)),
+    '/principal/assignments': ('principal_id', lambda principal_id: (
+        'principal', principal_filters(), ())),
+}
+
+def authenticate(headers, id_field):
+    """Return the caller's id for `id_field`, or an error Response"""
+    header = headers.get('x-principal')
+    if not header:
+        return None, error('Missing authentication', 401)
+    try:
+        principal = parse_principal(header)
+    except ValueError:
+        return None, error('Invalid authentication format', 400)
+
+    owner_id = getattr(principal, id_field)
+    if not owner_id:
+        return None, error(*ROLE_ERRORS[id_field])
+    return owner_id, None
+
+async def list_assignments(engine, path, args, headers, full_path):
+    """One page of a list endpoint, with the same body and validators as the sync view"""
+    id_field, scope_of = LISTS[path]
+    owner_id, failure = authenticate(headers, id_field)
+    if failure:
+        return failure
+
+    try:
+        limit, cursor = parse_page_args(args)
+        fields = parse_fields(args)
+    except QueryParamError as e:
+        return error(str(e), 400)
+
+    scope, scope_filters, list_filters = scope_of(owner_id)
+    async with engine.connect() as conn:
+        last_modified, count = (await conn.execute(select(*VERSION_COLUMNS).where(*scope_filters))).one()
+        version = make_version(scope, full_path, last_modified, count)
+        validators = {'ETag': f'W/"{version.etag}"', 'Cache-Control': 'private, no-cache'}
+        if last_modified:
+            validators['Last-Modified'] = http_date(last_modified)
+
+        if_none_match = headers.get('if-none-match')
+        if is_fresh(version, if_none_match and parse_etags(if_none_match),
+                    parse_date(headers.get('if-modified-since'))):
+            return Response(status=304, headers=validators)
+
+        query = select(*projected_columns(fields)).where(*scope_filters, *list_filters)
+        if cursor:
+            query = query.where(keyset_condition(cursor))
+        result = await conn.execute(query.order_by(Assignment.created_at, Assignment.id).limit(limit + 1))
+        rows = result.all()
+
+    rows, next_cursor = split_page(rows, limit)
+    return Response({'data': serialize_rows(rows, fields), 'next_cursor': next_cursor}, headers=validators)
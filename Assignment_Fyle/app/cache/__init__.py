@@ -0,0 +1,8 @@
+from .backends import CachedResponse, CacheBackend, LocalBackend, SQLiteBackend, RedisBackend, create_backend
+from .bus import InvalidationBus
+from .resp import RespClient, RespError
+
+__all__ = [
+    'CachedResponse', 'CacheBackend', 'LocalBackend', 'SQLiteBackend', 'RedisBackend',
+    'create_backend', 'InvalidationBus', 'RespClient', 'RespError'
+]
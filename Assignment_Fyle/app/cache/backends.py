@@ -0,0 +1,270 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from app.cache.resp import RespClient
+
+class CachedResponse:
+    __slots__ = ('body', 'mimetype', 'etag', 'last_modified', 'scope', 'expires', 'size')
+
+    def __init__(self, body, mimetype, etag, last_modified, scope, expires):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = etag
+        self.last_modified = last_modified
+        self.scope = scope
+        self.expires = expires  # Wall clock, so it means the same in every process
+        self.size = len(body)
+
+    def meta(self):
+        return json.dumps({
+            'mimetype': self.mimetype,
+            'etag': self.etag,
+            'last_modified': self.last_modified and self.last_modified.isoformat(),
+            'scope': self.scope,
+            'expires': self.expires,
+        })
+
+    @classmethod
+    def from_meta(cls, meta, body):
+        meta = json.loads(meta)
+        last_modified = meta['last_modified'] and datetime.fromisoformat(meta['last_modified'])
+        return cls(body, meta['mimetype'], meta['etag'], last_modified, meta['scope'], meta['expires'])
+
+class CacheBackend:
+    """Storage for cached responses, grouped by scope"""
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, entry):
+        raise NotImplementedError
+
+    def invalidate(self, scopes):
+        """Drop every entry in `scopes`, returning how many were removed"""
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {}
+
+def _key_string(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+class LocalBackend(CacheBackend):
+    """In-process LRU bounded by the total size of the cached bodies"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._scopes = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._scopes.setdefault(entry.scope, set()).add(key)
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, scopes):
+        removed = 0
+        with self._lock:
+            for scope in scopes:
+                for key in list(self._scopes.get(scope, ())):
+                    self._remove(key)
+                    removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self._size = 0
+
+    def stats(self):
+        return {
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self._size,
+            'max_bytes': self.max_bytes,
+        }
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+        keys = self._scopes.get(entry.scope)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._scopes[entry.scope]
+
+class SQLiteBackend(CacheBackend):
+    """Cache shared by every worker on a host through one SQLite file.
+
+    SQLite's file locking makes it safe across processes; each thread keeps
+    its own connection. Least recently read entries are evicted once the
+    bodies exceed `max_bytes`.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.evictions = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, scope TEXT NOT NULL, meta TEXT NOT NULL, body BLOB NOT NULL, "
+                "size INTEGER NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_scope ON response_cache (scope)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_accessed ON response_cache (accessed)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._connect()
+        key = _key_string(key)
+        row = conn.execute("SELECT meta, body, expires FROM response_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if row[2] <= now:
+            conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            return None
+        conn.execute("UPDATE response_cache SET accessed = ? WHERE key = ?", (now, key))
+        return CachedResponse.from_meta(row[0], bytes(row[1]))
+
+    def set(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (_key_string(key), entry.scope, entry.meta(), entry.body, entry.size,
+                 entry.expires, time.time())
+            )
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM response_cache").fetchone()[0]
+            while total > self.max_bytes:
+                key, size = conn.execute(
+                    "SELECT key, size FROM response_cache ORDER BY accessed LIMIT 1"
+                ).fetchone()
+                conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                total -= size
+                self.evictions += 1
+
+    def invalidate(self, scopes):
+        scopes = list(scopes)
+        if not scopes:
+            return 0
+        placeholders = ', '.join('?' * len(scopes))
+        return self._connect().execute(
+            f"DELETE FROM response_cache WHERE scope IN ({placeholders})", scopes
+        ).rowcount
+
+    def clear(self):
+        self._connect().execute("DELETE FROM response_cache")
+
+    def stats(self):
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache"
+        ).fetchone()
+        return {'evictions': self.evictions, 'entries': entries, 'bytes': size,
+                'max_bytes': self.max_bytes}
+
+class RedisBackend(CacheBackend):
+    """Cache shared by every worker through a Redis-protocol server.
+
+    Entries expire with PX; memory is bounded by the server's maxmemory
+    policy rather than by this class. Each scope keeps a set of its keys
+    so invalidation does not need to scan; the set expires with the newest
+    entry added to it. Every key is under `prefix`, so the server can be
+    shared with other applications.
+    """
+
+    def __init__(self, client, prefix='rc:'):
+        self.client = client if isinstance(client, RespClient) else RespClient.from_url(client)
+        self.prefix = prefix
+
+    def _scope_key(self, scope):
+        return f'{self.prefix}scope:{scope}'
+
+    def get(self, key):
+        value = self.client.execute('GET', self.prefix + _key_string(key))
+        if value is None:
+            return None
+        meta, body = value.split(b'\n', 1)
+        return CachedResponse.from_meta(meta, body)
+
+    def set(self, key, entry):
+        ttl_ms = int((entry.expires - time.time()) * 1000)
+        if ttl_ms <= 0:
+            return
+        redis_key = self.prefix + _key_string(key)
+        self.client.execute('SET', redis_key, entry.meta().encode() + b'\n' + entry.body, 'PX', ttl_ms)
+        self.client.execute('SADD', self._scope_key(entry.scope), redis_key)
+        # Entries share one TTL, so the newest outlives the rest of the set
+        self.client.execute('PEXPIRE', self._scope_key(entry.scope), ttl_ms)
+
+    def invalidate(self, scopes):
+        removed = 0
+        for scope in scopes:
+            keys = self.client.execute('SMEMBERS', self._scope_key(scope)) or []
+            if keys:
+                removed += self.client.execute('DEL', *keys)
+            self.client.execute('DEL', self._scope_key(scope))
+        return removed
+
+    def clear(self):
+        cursor = b'0'
+        while True:
+            cursor, keys = self.client.execute('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 500)
+            if keys:
+                self.client.execute('DEL', *keys)
+            if cursor == b'0':
+                break
+
+def create_backend(name, url=None, max_bytes=32 * 1024 * 1024):
+    if name == 'local':
+        return LocalBackend(max_bytes)
+    if name == 'sqlite':
+        return SQLiteBackend(url or 'response_cache.db', max_bytes)
+    if name == 'redis':
+        return RedisBackend(url or 'redis://localhost:6379/0')
+    raise ValueError(f"Unknown cache backend: {name}")
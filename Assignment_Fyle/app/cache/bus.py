@@ -0,0 +1,73 @@
+import logging
+import os
+import threading
+import time
+from app.cache.resp import RespClient
+
+logger = logging.getLogger(__name__)
+
+class InvalidationBus:
+    """Broadcasts invalidated scopes to every worker over Redis pub/sub.
+
+    Each worker subscribes once (lazily, so the thread is started after a
+    gunicorn fork) and passes scopes published by other workers to `on_message`.
+    """
+
+    def __init__(self, client, channel='response-cache:invalidate'):
+        self.client = client if isinstance(client, RespClient) else RespClient.from_url(client)
+        self.channel = channel
+        self.origin = None
+        self.sent = 0
+        self.received = 0
+        self._thread = None
+        self._conn = None
+        self._stopped = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, scopes):
+        if not scopes:
+            return
+        self.client.execute('PUBLISH', self.channel, f"{os.getpid()}:{self.origin}|" + '\n'.join(scopes))
+        self.sent += 1
+
+    def start(self, on_message):
+        """Start the subscriber thread for this process if it is not running"""
+        with self._lock:
+            if self._pid == os.getpid() and self._thread and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self.origin = id(self)
+            self._stopped.clear()
+            ready = threading.Event()
+            self._thread = threading.Thread(
+                target=self._listen, args=(on_message, ready), name='cache-invalidation', daemon=True
+            )
+            self._thread.start()
+        ready.wait(self.client.timeout)
+
+    def stop(self):
+        self._stopped.set()
+        if self._conn:
+            self._conn.close()
+
+    def _listen(self, on_message, ready):
+        own_prefix = f"{os.getpid()}:{self.origin}|".encode()
+        while not self._stopped.is_set():
+            try:
+                self._conn = conn = self.client.connect()
+                conn.send('SUBSCRIBE', self.channel)
+                conn.read()
+                conn.set_timeout(None)
+                ready.set()
+                while True:
+                    kind, _, data = conn.read()
+                    if kind != b'message' or data.startswith(own_prefix):
+                        continue
+                    self.received += 1
+                    on_message(data.split(b'|', 1)[1].decode().split('\n'))
+            except Exception:
+                if self._stopped.is_set():
+                    break
+                logger.warning("Cache invalidation subscriber disconnected, retrying", exc_info=True)
+                time.sleep(1)
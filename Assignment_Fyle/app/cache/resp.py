@@ -0,0 +1,107 @@
+import os
+import socket
+import threading
+from urllib.parse import urlparse
+
+class RespError(Exception):
+    """Error reply from a Redis-protocol server"""
+    pass
+
+def _encode(args):
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif isinstance(arg, int):
+            arg = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+class RespConnection:
+    """One socket speaking RESP2, the Redis wire protocol"""
+
+    def __init__(self, host, port, timeout):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rb')
+
+    def send(self, *args):
+        self._sock.sendall(_encode(args))
+
+    def read(self):
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RespError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length == -1:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            return None if length == -1 else [self.read() for _ in range(length)]
+        raise RespError(f"Unexpected reply: {line!r}")
+
+    def set_timeout(self, timeout):
+        self._sock.settimeout(timeout)
+
+    def close(self):
+        # Shut down first so a thread blocked in read() wakes up and
+        # releases the reader before it is closed
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self._file.close()
+
+class RespClient:
+    """Minimal thread-safe Redis client, enough for the response cache.
+
+    The connection is opened lazily and reopened after a fork, so a client
+    created before gunicorn forks its workers is safe to share.
+    """
+
+    def __init__(self, host='localhost', port=6379, db=0, timeout=1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, timeout=1.0):
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip('/') or 0)
+        return cls(parsed.hostname or 'localhost', parsed.port or 6379, db, timeout)
+
+    def connect(self):
+        """Open a new dedicated connection, e.g. for SUBSCRIBE"""
+        conn = RespConnection(self.host, self.port, self.timeout)
+        if self.db:
+            conn.send('SELECT', self.db)
+            conn.read()
+        return conn
+
+    def execute(self, *args):
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                self._conn = self.connect()
+                self._pid = os.getpid()
+            try:
+                self._conn.send(*args)
+                return self._conn.read()
+            except (OSError, ConnectionError):
+                # Drop the broken connection; the next call reconnects
+                self._conn.close()
+                self._conn = None
+                raise
@@ -1,19 +1,5 @@
-import os
+# Configuration lives in the project root's config.py; this module re-exports it
+# so `app.config` and `config` cannot drift apart again.
+from config import Config, TestConfig, DevelopmentConfig, ProductionConfig, config_for
 
-class Config:
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///:memory:')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
-    TESTING = False
-    JSON_SORT_KEYS = False  # Preserve JSON response order
-
-class TestConfig(Config):
-    TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
-    WTF_CSRF_ENABLED = False
-
-class DevelopmentConfig(Config):
-    DEBUG = True
-
-class ProductionConfig(Config):
-    DEBUG = False
-    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'postgresql://postgres:postgres@db:5432/school_db')
+__all__ = ['Config', 'TestConfig', 'DevelopmentConfig', 'ProductionConfig', 'config_for']
@@ -0,0 +1,24 @@
+from flask import Blueprint, Response, current_app, jsonify
+from app.middleware.response_cache import get_cache
+from app.middleware.metrics import CONTENT_TYPE, render
+from app.database.pool import get_pool_metrics
+
+monitoring_bp = Blueprint('monitoring', __name__)
+
+@monitoring_bp.route('/monitoring/cache', methods=['GET'])
+def cache_stats():
+    """Hit, miss and eviction counters of the response cache, as seen by this worker"""
+    return jsonify({'data': get_cache().stats()})
+
+@monitoring_bp.route('/monitoring/pool', methods=['GET'])
+def pool_stats():
+    """Connection pool checkout waits, exhaustion and connection lifetimes for this worker"""
+    return jsonify({'data': get_pool_metrics().stats()})
+
+@monitoring_bp.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Request counts, latency, errors and DB time of every worker, in Prometheus text format"""
+    metrics = current_app.extensions.get('metrics')
+    if metrics is None:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return Response(render(metrics.collect()), content_type=CONTENT_TYPE)
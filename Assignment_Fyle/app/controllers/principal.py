@@ -1,14 +1,23 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, abort, jsonify, request, stream_with_context
 from app.models.teacher import Teacher
 from app.models.assignment import Assignment
-from app.middleware.auth import require_auth
-from app.services.grading_service import grade_assignment
-from app.exceptions import GradingError, StateError
-import json
+from app.middleware.auth import require_principal
+from app.services.grading_service import grade_assignment, grade_assignments
+from app.services.grade_stats_service import grade_distribution, top_a_graders
+from app.services.report_service import get_registry
+from app.services.pagination_service import paginate, parse_page_args
+from app.services.assignment_query_service import parse_fields, principal_assignments, principal_scope
+from app.middleware.conditional import add_validators, list_version, not_modified
+from app.middleware.response_cache import cached_response
+from app.serializers import ASSIGNMENT_FIELDS, serialize_assignment, serialize_rows, dumps, json_response
+from app.exceptions import GradingError, StateError, QueryParamError
 from app import db
 
 principal_bp = Blueprint('principal', __name__)
 
+# Rows fetched per round trip while streaming an export
+EXPORT_BATCH_SIZE = 1000
+
 @principal_bp.errorhandler(GradingError)
 def handle_grading_error(error):
     return jsonify({'error': str(error)}), 400
@@ -17,66 +26,73 @@ def handle_grading_error(error):
 def handle_state_error(error):
     return jsonify({'error': str(error)}), 400
 
+@principal_bp.errorhandler(QueryParamError)
+def handle_query_param_error(error):
+    return jsonify({'error': str(error)}), 400
+
 @principal_bp.route('/principal/teachers', methods=['GET'])
-@require_auth
+@require_principal
+@cached_response(lambda: 'teachers')
 def list_teachers():
-    try:
-        auth_data = json.loads(request.headers.get('X-Principal'))
-        if not auth_data.get('principal_id'):
-            return jsonify({'error': 'Principal ID not found in auth header'}), 400
-
-        teachers = Teacher.query.all()
-        return jsonify({
-            'data': [
-                {
-                    'id': teacher.id,
-                    'user_id': teacher.user_id,
-                    'created_at': teacher.created_at.isoformat(),
-                    'updated_at': teacher.updated_at.isoformat()
-                } for teacher in teachers
-            ]
-        })
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Invalid X-Principal header format'}), 400
+    teachers = Teacher.query.all()
+    return jsonify({
+        'data': [
+            {
+                'id': teacher.id,
+                'user_id': teacher.user_id,
+                'created_at': teacher.created_at.isoformat(),
+                'updated_at': teacher.updated_at.isoformat()
+            } for teacher in teachers
+        ]
+    })
 
 @principal_bp.route('/principal/assignments', methods=['GET'])
-@require_auth
+@require_principal
+@cached_response(lambda: 'principal')
 def list_assignments():
-    try:
-        auth_data = json.loads(request.headers.get('X-Principal'))
-        if not auth_data.get('principal_id'):
-            return jsonify({'error': 'Principal ID not found in auth header'}), 400
-
-        # Get all assignments that are either submitted or graded
-        assignments = Assignment.query.filter(
-            Assignment.state.in_(['SUBMITTED', 'GRADED'])
-        ).all()
-
-        return jsonify({
-            'data': [{
-                'id': a.id,
-                'content': a.content,
-                'state': a.state,
-                'grade': a.grade,
-                'student_id': a.student_id,
-                'teacher_id': a.teacher_id,
-                'created_at': a.created_at.isoformat(),
-                'updated_at': a.updated_at.isoformat()
-            } for a in assignments]
-        })
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Invalid X-Principal header format'}), 400
+    # Get all assignments that are either submitted or graded, one page at a time
+    limit, cursor = parse_page_args(request.args)
+    fields = parse_fields(request.args)
+
+    version = list_version(principal_scope(), 'principal')
+    cached = not_modified(version)
+    if cached:
+        return cached
+
+    assignments, next_cursor = paginate(principal_assignments(fields), limit, cursor)
+
+    return add_validators(json_response({
+        'data': serialize_rows(assignments, fields),
+        'next_cursor': next_cursor
+    }), version)
+
+@principal_bp.route('/principal/assignments/export', methods=['GET'])
+@require_principal
+def export_assignments():
+    """Stream every submitted or graded assignment as newline-delimited JSON"""
+    fields = parse_fields(request.args, default=ASSIGNMENT_FIELDS)
+    assignments = principal_assignments(fields).order_by(
+        Assignment.created_at, Assignment.id
+    ).yield_per(EXPORT_BATCH_SIZE)
+
+    def generate():
+        batch = []
+        for row in assignments:
+            batch.append(row)
+            if len(batch) == EXPORT_BATCH_SIZE:
+                yield b''.join(dumps(item) + b'\n' for item in serialize_rows(batch, fields))
+                batch = []
+        if batch:
+            yield b''.join(dumps(item) + b'\n' for item in serialize_rows(batch, fields))
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 @principal_bp.route('/principal/assignments/grade', methods=['POST'])
-@require_auth
+@require_principal
 def grade_assignment_route():
     try:
         data = request.get_json()
-        auth_data = json.loads(request.headers.get('X-Principal'))
-        principal_id = auth_data.get('principal_id')
-
-        if not principal_id:
-            return jsonify({'error': 'Principal ID not found in auth header'}), 400
+        principal_id = request.auth.principal_id
 
         assignment = Assignment.query.get_or_404(data['id'])
         
@@ -87,19 +103,38 @@ def grade_assignment_route():
         graded_assignment = grade_assignment(assignment, data['grade'], grader_id=principal_id)
         db.session.commit()
 
-        return jsonify({
-            'data': {
-                'id': graded_assignment.id,
-                'content': graded_assignment.content,
-                'grade': graded_assignment.grade,
-                'state': graded_assignment.state,
-                'student_id': graded_assignment.student_id,
-                'teacher_id': graded_assignment.teacher_id,
-                'created_at': graded_assignment.created_at.isoformat(),
-                'updated_at': graded_assignment.updated_at.isoformat()
-            }
-        })
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Invalid X-Principal header format'}), 400
+        return json_response({'data': serialize_assignment(graded_assignment)})
     except KeyError:
         return jsonify({'error': 'Missing required fields'}), 400
+
+@principal_bp.route('/principal/assignments/grade/bulk', methods=['POST'])
+@require_principal
+def grade_assignments_bulk_route():
+    data = request.get_json()
+    if not isinstance(data, dict):
+        raise GradingError("Request body must be a JSON object")
+    results = grade_assignments(data.get('grades'), as_principal=True)
+    db.session.commit()
+
+    return json_response({'data': results})
+
+@principal_bp.route('/principal/grade-stats/grades', methods=['GET'])
+@require_principal
+def grade_stats_distribution():
+    """Graded assignments per grade, served from the grade_stats summary table"""
+    return json_response({'data': grade_distribution()})
+
+@principal_bp.route('/principal/grade-stats/top-a-graders', methods=['GET'])
+@require_principal
+def grade_stats_top_a_graders():
+    """Teachers who gave the most A grades, served from the grade_stats summary table"""
+    return json_response({'data': top_a_graders()})
+
+@principal_bp.route('/principal/reports/<name>', methods=['GET'])
+@require_principal
+def run_report(name):
+    """Run one of the sql/ reports (grade-distribution, top-a-graders)"""
+    registry = get_registry()
+    if name not in registry:
+        abort(404)
+    return json_response({'data': registry.run(name)})
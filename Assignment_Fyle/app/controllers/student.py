@@ -1,10 +1,15 @@
 from flask import Blueprint, jsonify, request
-import json
 from app.models.student import Student
 from app.models.assignment import Assignment
-from app.middleware.auth import require_auth
+from app.middleware.auth import require_student
 from app import db
-from app.exceptions import StateError
+from app.exceptions import AssignmentError, StateError, QueryParamError
+from app.services.assignment_service import create_assignments, submit_assignments
+from app.services.pagination_service import paginate, parse_page_args
+from app.services.assignment_query_service import parse_fields, student_assignments, student_scope
+from app.middleware.conditional import add_validators, list_version, not_modified
+from app.serializers import serialize_assignment, serialize_rows, json_response
+from app.middleware.response_cache import assignment_scopes, cached_response, mark_dirty
 from datetime import datetime
 
 student_bp = Blueprint('student', __name__)
@@ -13,57 +18,49 @@ student_bp = Blueprint('student', __name__)
 def handle_state_error(error):
     return jsonify({'error': str(error)}), 400
 
+@student_bp.errorhandler(AssignmentError)
+def handle_assignment_error(error):
+    return jsonify({'error': str(error)}), 400
+
+@student_bp.errorhandler(QueryParamError)
+def handle_query_param_error(error):
+    return jsonify({'error': str(error)}), 400
+
 @student_bp.route('/student/assignments', methods=['GET'])
-@require_auth
+@require_student
+@cached_response(lambda: f'student:{request.auth.student_id}')
 def list_assignments():
-    try:
-        auth_header = request.headers.get('X-Principal')
-        if not auth_header:
-            return jsonify({'error': 'Missing authentication'}), 401
-            
-        try:
-            auth_data = json.loads(auth_header)
-        except json.JSONDecodeError:
-            return jsonify({'error': 'Invalid authentication format'}), 400
-            
-        student_id = auth_data.get('student_id')
-        if not student_id:
-            return jsonify({'error': 'Student ID not found in auth header'}), 400
-            
-        assignments = Assignment.query.filter_by(student_id=student_id).all()
-        
-        return jsonify({
-            'data': [{
-                'id': a.id,
-                'content': a.content,
-                'state': a.state,
-                'grade': a.grade,
-                'student_id': a.student_id,
-                'teacher_id': a.teacher_id,
-                'created_at': a.created_at.isoformat(),
-                'updated_at': a.updated_at.isoformat()
-            } for a in assignments]
-        })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    student_id = request.auth.student_id
+    limit, cursor = parse_page_args(request.args)
+    fields = parse_fields(request.args)
+
+    version = list_version(student_scope(student_id), f'student:{student_id}')
+    cached = not_modified(version)
+    if cached:
+        return cached
+
+    assignments, next_cursor = paginate(student_assignments(student_id, fields), limit, cursor)
+
+    return add_validators(json_response({
+        'data': serialize_rows(assignments, fields),
+        'next_cursor': next_cursor
+    }), version)
 
 @student_bp.route('/student/assignments', methods=['POST'])
-@require_auth
+@require_student
 def create_or_edit_assignment():
     try:
         data = request.get_json()
-        auth_data = json.loads(request.headers.get('X-Principal'))
-        student_id = auth_data.get('student_id')
-        
-        if not student_id:
-            return jsonify({'error': 'Student ID not found in auth header'}), 400
+        student_id = request.auth.student_id
 
         if 'id' in data:  # Edit existing assignment
             assignment = Assignment.query.get_or_404(data['id'])
-            if assignment.student_id != int(student_id):
+            if assignment.student_id != student_id:
                 return jsonify({'error': 'Not authorized to edit this assignment'}), 403
             if assignment.state != 'DRAFT':
                 return jsonify({'error': 'Can only edit draft assignments'}), 400
+            if data.get('content') and not isinstance(data['content'], str):
+                return jsonify({'error': 'Content must be a string'}), 400
             
             assignment.content = data.get('content')
             if not assignment.content:
@@ -71,43 +68,29 @@ def create_or_edit_assignment():
         else:  # Create new assignment
             if not data.get('content'):
                 return jsonify({'error': 'Content is required'}), 400
+            if not isinstance(data['content'], str):
+                return jsonify({'error': 'Content must be a string'}), 400
                 
             assignment = Assignment(
                 content=data['content'],
-                student_id=int(student_id),
+                student_id=student_id,
                 state='DRAFT'
             )
             db.session.add(assignment)
         
+        mark_dirty(*assignment_scopes(assignment))
         db.session.commit()
         
-        return jsonify({
-            'data': {
-                'id': assignment.id,
-                'content': assignment.content,
-                'state': assignment.state,
-                'grade': assignment.grade,
-                'student_id': assignment.student_id,
-                'teacher_id': assignment.teacher_id,
-                'created_at': assignment.created_at.isoformat(),
-                'updated_at': assignment.updated_at.isoformat()
-            }
-        })
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Invalid X-Principal header format'}), 400
+        return json_response({'data': serialize_assignment(assignment)})
     except KeyError:
         return jsonify({'error': 'Missing required fields'}), 400
 
 @student_bp.route('/student/assignments/submit', methods=['POST'])
-@require_auth
+@require_student
 def submit_assignment():
     try:
         data = request.get_json()
-        auth_data = json.loads(request.headers.get('X-Principal'))
-        student_id = auth_data.get('student_id')
-
-        if not student_id:
-            return jsonify({'error': 'Student ID not found in auth header'}), 400
+        student_id = request.auth.student_id
 
         assignment = Assignment.query.get_or_404(data['id'])
         
@@ -124,21 +107,31 @@ def submit_assignment():
         assignment.state = 'SUBMITTED'
         assignment.updated_at = datetime.utcnow()
         
+        mark_dirty(*assignment_scopes(assignment))
         db.session.commit()
         
-        return jsonify({
-            'data': {
-                'id': assignment.id,
-                'content': assignment.content,
-                'state': assignment.state,
-                'grade': assignment.grade,
-                'student_id': assignment.student_id,
-                'teacher_id': assignment.teacher_id,
-                'created_at': assignment.created_at.isoformat(),
-                'updated_at': assignment.updated_at.isoformat()
-            }
-        })
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Invalid X-Principal header format'}), 400
+        return json_response({'data': serialize_assignment(assignment)})
     except KeyError as e:
         return jsonify({'error': f'Missing required field: {str(e)}'}), 400
+
+@student_bp.route('/student/assignments/bulk', methods=['POST'])
+@require_student
+def create_assignments_bulk():
+    data = request.get_json()
+    if not isinstance(data, dict):
+        raise AssignmentError("Request body must be a JSON object")
+    results = create_assignments(request.auth.student_id, data.get('assignments'))
+    db.session.commit()
+
+    return json_response({'data': results})
+
+@student_bp.route('/student/assignments/submit/bulk', methods=['POST'])
+@require_student
+def submit_assignments_bulk():
+    data = request.get_json()
+    if not isinstance(data, dict):
+        raise AssignmentError("Request body must be a JSON object")
+    results = submit_assignments(request.auth.student_id, data.get('assignments'))
+    db.session.commit()
+
+    return json_response({'data': results})
@@ -1,9 +1,13 @@
 from flask import Blueprint, jsonify, request
-import json
-from app.exceptions import GradingError, StateError
+from app.exceptions import GradingError, StateError, QueryParamError
 from app.models.assignment import Assignment
-from app.services.grading_service import grade_assignment
-from app.middleware.auth import require_auth
+from app.services.grading_service import grade_assignment, grade_assignments
+from app.services.pagination_service import paginate, parse_page_args
+from app.services.assignment_query_service import parse_fields, teacher_assignments, teacher_scope
+from app.middleware.conditional import add_validators, list_version, not_modified
+from app.serializers import serialize_assignment, serialize_rows, json_response
+from app.middleware.response_cache import cached_response
+from app.middleware.auth import require_teacher
 from app import db
 
 teacher_bp = Blueprint('teacher', __name__)
@@ -16,67 +20,61 @@ def handle_grading_error(error):
 def handle_state_error(error):
     return jsonify({'error': str(error)}), 400
 
+@teacher_bp.errorhandler(QueryParamError)
+def handle_query_param_error(error):
+    return jsonify({'error': str(error)}), 400
+
 @teacher_bp.route('/teacher/assignments/grade', methods=['POST'])
-@require_auth
+@require_teacher
 def grade_assignment_route():
-    try:
-        data = request.get_json()
-        auth_data = json.loads(request.headers.get('X-Principal'))
-        teacher_id = auth_data.get('teacher_id')
+    data = request.get_json()
+    teacher_id = request.auth.teacher_id
+
+    assignment = Assignment.query.get_or_404(data['id'])
 
-        if not teacher_id:
-            return jsonify({'error': 'Teacher ID not found in auth header'}), 403
+    if assignment.state == 'DRAFT':
+        return jsonify({'error': 'Cannot grade a draft assignment'}), 400
 
-        assignment = Assignment.query.get_or_404(data['id'])
+    if 'grade' not in data or data['grade'] not in ['A', 'B', 'C', 'D', 'F']:
+        return jsonify({'error': 'Invalid grade'}), 400
 
-        if assignment.state == 'DRAFT':
-            return jsonify({'error': 'Cannot grade a draft assignment'}), 400
+    graded_assignment = grade_assignment(assignment, data['grade'], grader_id=teacher_id)
+    db.session.commit()
 
-        if 'grade' not in data or data['grade'] not in ['A', 'B', 'C', 'D', 'F']:
-            return jsonify({'error': 'Invalid grade'}), 400
+    return json_response({
+        'data': serialize_assignment(graded_assignment, fields=('id', 'content', 'grade', 'state'))
+    })
 
-        graded_assignment = grade_assignment(assignment, data['grade'], grader_id=teacher_id)
-        db.session.commit()
+@teacher_bp.route('/teacher/assignments/grade/bulk', methods=['POST'])
+@require_teacher
+def grade_assignments_bulk_route():
+    data = request.get_json()
+    if not isinstance(data, dict):
+        raise GradingError("Request body must be a JSON object")
+    results = grade_assignments(data.get('grades'), teacher_id=request.auth.teacher_id)
+    db.session.commit()
 
-        return jsonify({
-            'data': {
-                'id': graded_assignment.id,
-                'content': graded_assignment.content,
-                'grade': graded_assignment.grade,
-                'state': graded_assignment.state
-            }
-        })
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Invalid auth header format'}), 400
+    return json_response({'data': results})
 
 @teacher_bp.route('/teacher/assignments', methods=['GET'])
-@require_auth
+@require_teacher
+@cached_response(lambda: f'teacher:{request.auth.teacher_id}')
 def list_assignments():
-    try:
-        auth_data = json.loads(request.headers.get('X-Principal'))
-        teacher_id = auth_data.get('teacher_id')
-        
-        if not teacher_id:
-            return jsonify({'error': 'Teacher ID not found in auth header'}), 403
-            
-        assignments = Assignment.query.filter_by(
-            teacher_id=teacher_id,
-            state='SUBMITTED'
-        ).all()
-        
-        return jsonify({
-            'data': [{
-                'id': a.id,
-                'content': a.content,
-                'state': a.state,
-                'grade': a.grade,
-                'student_id': a.student_id,
-                'teacher_id': a.teacher_id,
-                'created_at': a.created_at.isoformat(),
-                'updated_at': a.updated_at.isoformat()
-            } for a in assignments]
-        })
-    except json.JSONDecodeError:
-        return jsonify({'error': 'Invalid X-Principal header format'}), 400
+    teacher_id = request.auth.teacher_id
+
+    limit, cursor = parse_page_args(request.args)
+    fields = parse_fields(request.args)
+
+    version = list_version(teacher_scope(teacher_id), f'teacher:{teacher_id}')
+    cached = not_modified(version)
+    if cached:
+        return cached
+
+    assignments, next_cursor = paginate(teacher_assignments(teacher_id, fields), limit, cursor)
+    
+    return add_validators(json_response({
+        'data': serialize_rows(assignments, fields),
+        'next_cursor': next_cursor
+    }), version)
 
 # ...existing code...
@@ -0,0 +1 @@
+"""Engine-level configuration and instrumentation"""
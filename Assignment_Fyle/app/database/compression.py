@@ -0,0 +1,69 @@
+import hashlib
+import zlib
+from flask import current_app, has_app_context
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is optional
+    zstandard = None
+
+# First byte of every stored value: how the rest is encoded
+RAW, ZLIB, ZSTD = b'\x00', b'\x01', b'\x02'
+
+# Used outside an app context, e.g. by benchmarks.datagen
+DEFAULT_MIN_BYTES = 1024
+DEFAULT_CODEC = 'zstd'
+
+def digest(text):
+    """SHA-256 of the UTF-8 text, the key content is stored and deduplicated under"""
+    return hashlib.sha256(text.encode()).digest()
+
+def encode(text, min_bytes=DEFAULT_MIN_BYTES, codec=DEFAULT_CODEC):
+    """Text -> tagged bytes, compressed when it is at least `min_bytes` long
+    and compression makes it smaller. zstd falls back to zlib when the
+    zstandard package is not installed."""
+    data = text.encode()
+    if len(data) >= min_bytes:
+        if codec == 'zstd' and zstandard is not None:
+            packed = ZSTD + zstandard.compress(data, 3)
+        else:
+            packed = ZLIB + zlib.compress(data, 6)
+        if len(packed) < len(data) + 1:
+            return packed
+    return RAW + data
+
+def decode(value):
+    """Inverse of encode()"""
+    tag, data = value[:1], value[1:]
+    if tag == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Content is zstd-compressed but the zstandard package is not installed")
+        data = zstandard.decompress(data)
+    elif tag == ZLIB:
+        data = zlib.decompress(data)
+    elif tag != RAW:
+        raise ValueError(f"Unknown content encoding {tag!r}")
+    return data.decode()
+
+def _settings():
+    if not has_app_context():
+        return DEFAULT_MIN_BYTES, DEFAULT_CODEC
+    config = current_app.config
+    return config.get('CONTENT_COMPRESSION_MIN_BYTES', DEFAULT_MIN_BYTES), config.get('CONTENT_CODEC', DEFAULT_CODEC)
+
+class CompressedText(TypeDecorator):
+    """Text column stored as encode()d bytes; reads always come back as str"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        min_bytes, codec = _settings()
+        return encode(value, min_bytes, codec)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decode(bytes(value))
@@ -0,0 +1,163 @@
+import bisect
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# Options only a queue pool accepts; SQLite's default pools reject them
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_use_lifo')
+
+# Upper bounds, in seconds, of the checkout wait and connection lifetime histograms
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+LIFETIME_BUCKETS = (1, 10, 60, 300, 900, 1800, 3600, 14400)
+
+def engine_options(uri, options, statement_timeout_ms=0):
+    """Adapt SQLALCHEMY_ENGINE_OPTIONS to the database behind `uri`"""
+    url = make_url(uri)
+    options = dict(options)
+    if url.get_backend_name() == 'sqlite' and 'poolclass' not in options:
+        for key in QUEUE_POOL_OPTIONS:
+            options.pop(key, None)
+
+    if statement_timeout_ms and url.get_backend_name() == 'postgresql':
+        connect_args = dict(options.get('connect_args', {}))
+        if url.get_driver_name() == 'asyncpg':
+            settings = dict(connect_args.get('server_settings', {}), statement_timeout=str(statement_timeout_ms))
+            connect_args['server_settings'] = settings
+        else:
+            connect_args['options'] = f"{connect_args.get('options', '')} -c statement_timeout={statement_timeout_ms}".strip()
+        options['connect_args'] = connect_args
+    return options
+
+class Histogram:
+    """Cumulative bucket counts plus sum and max, enough for percentiles and Prometheus"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self):
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {'count': self.count, 'sum': round(self.sum, 6), 'max': round(self.max, 6), 'buckets': cumulative}
+
+class PoolMetrics:
+    """Checkout wait, exhaustion and connection lifetime for one engine's pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.closes = 0
+        self.invalidations = 0
+        self.exhausted = 0
+        self.timeouts = 0
+        self.wait = Histogram(WAIT_BUCKETS)
+        self.lifetime = Histogram(LIFETIME_BUCKETS)
+        self.pool = None
+
+    def record_checkout(self, waited, exhausted, timed_out=False):
+        with self._lock:
+            self.wait.observe(waited)
+            if exhausted:
+                self.exhausted += 1
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+    def increment(self, name, lifetime=None):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            if lifetime is not None:
+                self.lifetime.observe(lifetime)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'connects': self.connects,
+                'closes': self.closes,
+                'invalidations': self.invalidations,
+                'exhausted': self.exhausted,
+                'timeouts': self.timeouts,
+                'wait_seconds': self.wait.to_dict(),
+                'connection_lifetime_seconds': self.lifetime.to_dict(),
+            }
+        pool = self.pool
+        stats['pool'] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            stats.update(size=pool.size(), checked_in=pool.checkedin(),
+                         checked_out=pool.checkedout(), overflow=pool.overflow())
+        return stats
+
+def _is_full(pool):
+    return isinstance(pool, QueuePool) and pool._max_overflow >= 0 \
+        and pool.checkedout() >= pool.size() + pool._max_overflow
+
+def _wrap_connect(pool, metrics):
+    """Time pool.connect(), which blocks while the pool is exhausted"""
+    connect = pool.connect
+
+    def timed_connect():
+        exhausted = _is_full(pool)
+        started = time.perf_counter()
+        try:
+            connection = connect()
+        except exc.TimeoutError:
+            metrics.record_checkout(time.perf_counter() - started, exhausted, timed_out=True)
+            raise
+        metrics.record_checkout(time.perf_counter() - started, exhausted)
+        return connection
+
+    pool.connect = timed_connect
+    metrics.pool = pool
+
+def instrument(engine, metrics=None):
+    """Attach PoolMetrics to `engine`, surviving engine.dispose()"""
+    metrics = metrics or PoolMetrics()
+    _wrap_connect(engine.pool, metrics)
+    # dispose() swaps in a fresh pool; the pool events below carry over, the wrapper does not
+    event.listen(engine, 'engine_disposed', lambda engine: _wrap_connect(engine.pool, metrics))
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, record):
+        record.info['connected_at'] = time.monotonic()
+        metrics.increment('connects')
+
+    @event.listens_for(engine, 'close')
+    def on_close(dbapi_connection, record):
+        connected_at = record.info.pop('connected_at', None)
+        metrics.increment('closes', connected_at and time.monotonic() - connected_at)
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, record):
+        metrics.increment('checkins')
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, record, exception):
+        metrics.increment('invalidations')
+
+    return metrics
+
+def init_app(app):
+    from app import db
+    app.extensions['pool_metrics'] = instrument(db.get_engine(app))
+
+def get_pool_metrics():
+    return current_app.extensions['pool_metrics']
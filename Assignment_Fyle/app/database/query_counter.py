@@ -0,0 +1,102 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Lists that receive a QueryRecord for every finished request, see recording()
+_recorders = []
+
+# Transaction control rather than queries; drivers issue COMMIT and ROLLBACK
+# without a cursor, so leaving these out keeps counts the same whether or
+# not SAVEPOINTs are in play (as in the test fixtures)
+TRANSACTION_CONTROL = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+class QueryStats:
+    """Statements run while serving one request"""
+    __slots__ = ('count', 'duration', 'statements')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def repeated(self, threshold):
+        """Statements that ran at least `threshold` times, most frequent first"""
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+class QueryRecord:
+    __slots__ = ('method', 'path', 'endpoint', 'count', 'duration')
+
+    def __init__(self, method, path, endpoint, count, duration):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.count = count
+        self.duration = duration
+
+    def __repr__(self):
+        return f'<QueryRecord {self.method} {self.path}: {self.count} queries>'
+
+def _current_stats():
+    if not has_request_context() or not current_app.config.get('QUERY_COUNTER_ENABLED', True):
+        return None
+    stats = getattr(request, 'query_stats', None)
+    if stats is None:
+        stats = request.query_stats = QueryStats()
+    return stats
+
+# The start time lives on the execution context, which is dropped with the
+# statement whether or not it succeeds; nothing is left on pooled connections
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_started', None)
+    if started is None:  # Began before the listeners were registered
+        return
+    if statement.startswith(TRANSACTION_CONTROL):
+        return
+    stats = _current_stats()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+        stats.statements[statement] += 1
+
+def _report(response):
+    stats = getattr(request, 'query_stats', None) or QueryStats()
+    response.headers['X-Query-Count'] = str(stats.count)
+    timing = f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'
+    existing = response.headers.get('Server-Timing')
+    response.headers['Server-Timing'] = f'{existing}, {timing}' if existing else timing
+
+    for statement, count in stats.repeated(current_app.config.get('N_PLUS_ONE_THRESHOLD', 5)):
+        logger.warning("Possible N+1 in %s %s: statement ran %d times: %s",
+                       request.method, request.path, count, ' '.join(statement.split())[:300])
+
+    record = QueryRecord(request.method, request.path, request.endpoint, stats.count, stats.duration)
+    for records in _recorders:
+        records.append(record)
+    return response
+
+@contextmanager
+def recording():
+    """Collect a QueryRecord for every request finished inside the block"""
+    records = []
+    _recorders.append(records)
+    try:
+        yield records
+    finally:
+        _recorders.remove(records)
+
+def init_app(app):
+    """Count each request's statements and report them in X-Query-Count and Server-Timing"""
+    if app.config.get('QUERY_COUNTER_ENABLED', True):
+        app.after_request(_report)
@@ -0,0 +1,49 @@
+from flask import has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import event, orm
+
+# Bind key of the read replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+def configure(app):
+    """Register the replica bind from SQLALCHEMY_REPLICA_URI, if one is configured"""
+    uri = app.config.get('SQLALCHEMY_REPLICA_URI')
+    if uri:
+        app.config['SQLALCHEMY_BINDS'] = {**(app.config.get('SQLALCHEMY_BINDS') or {}), REPLICA_BIND: uri}
+
+class RoutingSession(SignallingSession):
+    """Session that sends the reads of read-only requests to the replica.
+
+    Statements run while serving GET/HEAD/OPTIONS go to the replica bind;
+    flushes, other methods and work outside a request use the primary. Once
+    the session commits, the rest of the request stays on the primary so it
+    reads its own writes.
+    """
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._use_replica(mapper):
+            return self.db.get_engine(self.app, bind=REPLICA_BIND)
+        return super().get_bind(mapper, clause)
+
+    def _use_replica(self, mapper):
+        if REPLICA_BIND not in (self.app.config.get('SQLALCHEMY_BINDS') or {}):
+            return False
+        if self._flushing or not has_request_context():
+            return False
+        if mapper is not None and mapper.persist_selectable.info.get('bind_key') is not None:
+            return False
+        return request.method in READ_METHODS and not getattr(request, 'stick_to_primary', False)
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _stick_to_primary(session):
+    if has_request_context():
+        request.stick_to_primary = True
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
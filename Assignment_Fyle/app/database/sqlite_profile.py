@@ -0,0 +1,42 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+def profile_pragmas(config):
+    """PRAGMA statements of the SQLite performance profile, in the order they are applied"""
+    return [
+        # Readers no longer block the writer, and commits append to the WAL instead
+        # of rewriting pages; journal_mode is persistent, the rest are per connection
+        ('journal_mode', 'WAL'),
+        # With WAL, NORMAL only fsyncs at checkpoints; a power loss can drop the last
+        # commits but cannot corrupt the database
+        ('synchronous', 'NORMAL'),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('cache_size', -config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),  # Negative means KiB
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        ('temp_store', 'MEMORY'),
+    ]
+
+def _is_file_database(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:')
+
+def apply_profile(engine, pragmas):
+    """Run `pragmas` on every new DBAPI connection of `engine`"""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+def init_app(app):
+    """Apply the profile when SQLITE_TUNING is on and the app uses an SQLite file.
+
+    Must run before the engine opens its first connection.
+    """
+    if not app.config.get('SQLITE_TUNING') or not _is_file_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+    from app import db
+    apply_profile(db.get_engine(app), profile_pragmas(app.config))
@@ -9,3 +9,11 @@ class GradingError(AssignmentError):
 class StateError(AssignmentError):
     """Exception raised for invalid state transitions"""
     pass
+
+class QueryParamError(Exception):
+    """Exception raised for invalid query string parameters"""
+    pass
+
+class PaginationError(QueryParamError):
+    """Exception raised for invalid pagination parameters"""
+    pass
@@ -1,7 +1,57 @@
-from functools import wraps
+from functools import lru_cache, wraps
 from flask import request, jsonify
 import json
 
+class AuthPrincipal:
+    """Identity carried by the X-Principal header.
+
+    Instances are cached and shared between requests, so treat them as read-only.
+    """
+    __slots__ = ('user_id', 'student_id', 'teacher_id', 'principal_id')
+
+    def __init__(self, user_id=None, student_id=None, teacher_id=None, principal_id=None):
+        self.user_id = user_id
+        self.student_id = student_id
+        self.teacher_id = teacher_id
+        self.principal_id = principal_id
+
+    @property
+    def role(self):
+        if self.principal_id:
+            return 'principal'
+        if self.teacher_id:
+            return 'teacher'
+        if self.student_id:
+            return 'student'
+        return None
+
+    def __repr__(self):
+        return f'<AuthPrincipal user={self.user_id} role={self.role}>'
+
+def _optional_int(value):
+    """An id from the header: a JSON integer, or a string of digits as older clients send.
+    Plain int() would also log `true` and `1.7` in as user 1."""
+    if value is None:
+        return None
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError("X-Principal ids must be integers")
+    return value
+
+@lru_cache(maxsize=1024)
+def parse_principal(header):
+    """Parse a raw X-Principal header, raising ValueError if it is malformed"""
+    data = json.loads(header)
+    if not isinstance(data, dict):
+        raise ValueError("X-Principal must be a JSON object")
+    return AuthPrincipal(
+        user_id=_optional_int(data.get('user_id')),
+        student_id=_optional_int(data.get('student_id')),
+        teacher_id=_optional_int(data.get('teacher_id')),
+        principal_id=_optional_int(data.get('principal_id'))
+    )
+
 def require_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
@@ -10,10 +60,32 @@ def require_auth(f):
             return jsonify({'error': 'Missing authentication'}), 401
             
         try:
-            auth_data = json.loads(auth)
-            request.auth = auth_data
-            return f(*args, **kwargs)
-        except json.JSONDecodeError:
+            request.auth = parse_principal(auth)
+        except ValueError:
             return jsonify({'error': 'Invalid authentication format'}), 400
+
+        return f(*args, **kwargs)
             
     return decorated
+
+def _require_role(id_field, message, status):
+    def decorator(f):
+        @wraps(f)
+        @require_auth
+        def decorated(*args, **kwargs):
+            if not getattr(request.auth, id_field):
+                return jsonify({'error': message}), status
+            return f(*args, **kwargs)
+        return decorated
+    return decorator
+
+# Principal attribute each role needs -> error message and status when it is missing
+ROLE_ERRORS = {
+    'student_id': ('Student ID not found in auth header', 400),
+    'teacher_id': ('Teacher ID not found in auth header', 403),
+    'principal_id': ('Principal ID not found in auth header', 400),
+}
+
+require_student = _require_role('student_id', *ROLE_ERRORS['student_id'])
+require_teacher = _require_role('teacher_id', *ROLE_ERRORS['teacher_id'])
+require_principal = _require_role('principal_id', *ROLE_ERRORS['principal_id'])
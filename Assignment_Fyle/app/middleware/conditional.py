@@ -0,0 +1,53 @@
+import hashlib
+from flask import current_app, request
+from sqlalchemy import func
+from app.models.assignment import Assignment
+
+# Aggregates a list's version is derived from
+VERSION_COLUMNS = (func.max(Assignment.updated_at), func.count(Assignment.id))
+
+class ListVersion:
+    """Validators for a list response, derived without loading its rows"""
+    __slots__ = ('etag', 'last_modified')
+
+    def __init__(self, etag, last_modified):
+        self.etag = etag
+        self.last_modified = last_modified
+
+def list_version(scope_query, scope):
+    """Build a ListVersion from MAX(updated_at) and COUNT(*) over `scope_query`.
+
+    `scope_query` should cover every row that can enter or leave the list, so
+    that a row moving out of it still changes the version. The request's query
+    string is part of the ETag because it selects the page and fields.
+    """
+    last_modified, count = scope_query.with_entities(*VERSION_COLUMNS).one()
+    return make_version(scope, request.full_path, last_modified, count)
+
+def make_version(scope, full_path, last_modified, count):
+    key = f"{scope}|{full_path}|{last_modified and last_modified.isoformat()}|{count}"
+    return ListVersion(hashlib.sha1(key.encode()).hexdigest(), last_modified)
+
+def is_fresh(version, if_none_match, if_modified_since):
+    """Whether the client's copy, described by its parsed conditional headers, matches `version`"""
+    if if_none_match:
+        return if_none_match.contains_weak(version.etag)
+    if if_modified_since and version.last_modified:
+        # HTTP dates have one second resolution
+        since = if_modified_since.replace(tzinfo=None)
+        return version.last_modified.replace(microsecond=0) <= since
+    return False
+
+def not_modified(version):
+    """Return a 304 response if the client's cached copy matches `version`, else None"""
+    if not is_fresh(version, request.if_none_match, request.if_modified_since):
+        return None
+    return add_validators(current_app.response_class(status=304), version)
+
+def add_validators(response, version):
+    response.set_etag(version.etag, weak=True)
+    if version.last_modified:
+        response.last_modified = version.last_modified
+    # Let clients keep the response but revalidate it on every use
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
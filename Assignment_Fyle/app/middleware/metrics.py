@@ -0,0 +1,279 @@
+import json
+import os
+import threading
+import time
+from flask import current_app, request
+from app.database.pool import Histogram
+
+# Upper bounds, in seconds, of the request latency and DB time histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (field, metric name, type, help, label names) of everything served at /metrics
+METRICS = (
+    ('requests', 'http_requests_total', 'counter', 'Requests served',
+     ('blueprint', 'endpoint', 'method', 'status')),
+    ('exceptions', 'http_request_exceptions_total', 'counter', 'Exceptions raised while serving requests, by type',
+     ('blueprint', 'endpoint', 'exception')),
+    ('in_flight', 'http_requests_in_flight', 'gauge', 'Requests being served',
+     ('blueprint', 'endpoint')),
+    ('latency', 'http_request_duration_seconds', 'histogram', 'Time to build the response',
+     ('blueprint', 'endpoint', 'method')),
+    ('db_time', 'http_request_db_seconds', 'histogram', 'Time spent in SQL statements per request',
+     ('blueprint', 'endpoint', 'method')),
+    ('queries', 'http_request_queries_total', 'counter', 'SQL statements run while serving requests',
+     ('blueprint', 'endpoint', 'method')),
+)
+FIELDS = tuple(metric[0] for metric in METRICS)
+HISTOGRAMS = ('latency', 'db_time')
+
+class Shard:
+    """Metrics recorded by one thread. Only that thread writes to it, so nothing is locked."""
+    __slots__ = ('thread',) + FIELDS
+
+    def __init__(self, thread):
+        self.thread = thread
+        for field in FIELDS:
+            setattr(self, field, {})
+
+    def count(self, field, key, n=1):
+        values = getattr(self, field)
+        values[key] = values.get(key, 0) + n
+
+    def observe(self, field, key, value):
+        histograms = getattr(self, field)
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(value)
+
+    def snapshot(self):
+        # dict.copy() is atomic, so the owning thread can keep writing meanwhile
+        snapshot = {field: getattr(self, field).copy() for field in FIELDS}
+        for field in HISTOGRAMS:
+            snapshot[field] = {key: h.counts + [h.sum, h.count] for key, h in snapshot[field].items()}
+        return snapshot
+
+def _empty():
+    return {field: {} for field in FIELDS}
+
+def _merge(totals, snapshot):
+    for field, values in snapshot.items():
+        merged = totals[field]
+        for key, value in values.items():
+            if field in HISTOGRAMS:  # Bucket counts followed by sum and count
+                current = merged.get(key)
+                merged[key] = list(value) if current is None else [a + b for a, b in zip(current, value)]
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return totals
+
+def _worker_pid(filename):
+    if filename.startswith('worker-') and filename.endswith('.json'):
+        try:
+            return int(filename[len('worker-'):-len('.json')])
+        except ValueError:
+            pass
+    return None
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class RequestMetrics:
+    """Request metrics of one worker process.
+
+    Each thread counts into its own Shard; shards are only summed when
+    metrics are read. With a `directory`, every worker writes its totals
+    there every `flush_interval` seconds and collect() adds them up, so any
+    worker can answer for all of them.
+    """
+
+    def __init__(self, directory=None, flush_interval=5):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()  # Guards the shard list, never the counters
+        self._shards = []
+        self._retired = _empty()  # Totals of shards whose thread has exited
+        self._flusher_pid = None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = Shard(threading.current_thread())
+            with self._lock:
+                self._retire_dead()
+                self._shards.append(shard)
+        return shard
+
+    def _retire_dead(self):
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                _merge(self._retired, shard.snapshot())
+        self._shards = alive
+
+    def snapshot(self):
+        """Totals of this worker"""
+        with self._lock:
+            self._retire_dead()
+            shards = list(self._shards)
+            totals = _merge(_empty(), self._retired)
+        for shard in shards:
+            _merge(totals, shard.snapshot())
+        return totals
+
+    def flush(self):
+        """Write this worker's totals where the other workers read them"""
+        if not self.directory:
+            return
+        data = {field: [[list(key), value] for key, value in values.items()]
+                for field, values in self.snapshot().items()}
+        path = os.path.join(self.directory, f'worker-{os.getpid()}.json')
+        partial = f'{path}.{threading.get_ident()}.tmp'
+        with open(partial, 'w') as f:
+            json.dump(data, f)
+        os.replace(partial, path)
+
+    def start_flushing(self):
+        """Flush every `flush_interval` seconds from a daemon thread, started
+        lazily so each forked worker gets its own"""
+        if not self.directory or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True).start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def collect(self):
+        """Totals of every worker sharing `directory`.
+
+        Counters of exited workers are kept so totals never go backwards;
+        their in-flight gauges are dropped.
+        """
+        totals = self.snapshot()
+        if not self.directory:
+            return totals
+
+        own_pid = os.getpid()
+        for filename in os.listdir(self.directory):
+            pid = _worker_pid(filename)
+            if pid is None or pid == own_pid:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):  # Cleared while reading
+                continue
+            snapshot = {field: {tuple(key): value for key, value in data.get(field, [])} for field in FIELDS}
+            if not _alive(pid):
+                snapshot['in_flight'] = {}
+            _merge(totals, snapshot)
+        return totals
+
+def clear_directory(directory):
+    """Remove the files of a previous run's workers"""
+    if not directory or not os.path.isdir(directory):
+        return
+    for filename in os.listdir(directory):
+        if _worker_pid(filename) is not None:
+            os.remove(os.path.join(directory, filename))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def render(totals):
+    """Prometheus text exposition of collect()"""
+    lines = []
+    for field, name, kind, help_text, label_names in METRICS:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key, value in sorted(totals[field].items()):
+            pairs = list(zip(label_names, key))
+            if kind == 'histogram':
+                *counts, total, count = value
+                cumulative = 0
+                for bound, n in zip(LATENCY_BUCKETS + ('+Inf',), counts):
+                    cumulative += n
+                    lines.append(f'{name}_bucket{_labels(pairs + [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(pairs)} {total}')
+                lines.append(f'{name}_count{_labels(pairs)} {count}')
+            else:
+                lines.append(f'{name}{_labels(pairs)} {value}')
+    return '\n'.join(lines) + '\n'
+
+def _route():
+    return request.blueprint or '', request.endpoint or ''
+
+def _start():
+    request.metrics_started = time.perf_counter()
+    get_metrics().shard().count('in_flight', _route())
+
+def _finish(response):
+    started = getattr(request, 'metrics_started', None)
+    if started is None:
+        return response
+
+    metrics = get_metrics()
+    shard = metrics.shard()
+    blueprint, endpoint = _route()
+    key = (blueprint, endpoint, request.method)
+    shard.count('requests', key + (str(response.status_code),))
+    shard.observe('latency', key, time.perf_counter() - started)
+    if current_app.config.get('QUERY_COUNTER_ENABLED', True):
+        stats = getattr(request, 'query_stats', None)
+        shard.observe('db_time', key, stats.duration if stats else 0.0)
+        shard.count('queries', key, stats.count if stats else 0)
+    metrics.start_flushing()
+    return response
+
+def _leave(error):
+    if getattr(request, 'metrics_started', None) is not None:
+        get_metrics().shard().count('in_flight', _route(), -1)
+
+def _count_exceptions(app, metrics):
+    """Wrap handle_user_exception, which sees every exception a view raises,
+    including those a blueprint errorhandler turns into a 400"""
+    handle_user_exception = app.handle_user_exception
+
+    def counted(e):
+        metrics.shard().count('exceptions', _route() + (type(e).__name__,))
+        return handle_user_exception(e)
+
+    app.handle_user_exception = counted
+
+def init_app(app):
+    """Count requests, errors and DB time per endpoint, served at /metrics"""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    metrics = app.extensions['metrics'] = RequestMetrics(
+        app.config.get('METRICS_MULTIPROC_DIR'),
+        app.config.get('METRICS_FLUSH_INTERVAL', 5)
+    )
+    _count_exceptions(app, metrics)
+    app.before_request(_start)
+    app.after_request(_finish)
+    app.teardown_request(_leave)
+
+def get_metrics():
+    return current_app.extensions['metrics']
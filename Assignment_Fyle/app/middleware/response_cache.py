@@ -0,0 +1,200 @@
+import logging
+import sqlite3
+import threading
+import time
+from functools import wraps
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.cache import CachedResponse, InvalidationBus, RespError, create_backend
+
+logger = logging.getLogger(__name__)
+
+# What a backend or the bus raises when its server is down or misbehaving
+BACKEND_ERRORS = (OSError, RespError, sqlite3.Error)
+
+class ResponseCache:
+    """Cache of rendered responses, stored in a pluggable backend.
+
+    Entries are grouped by scope (e.g. `student:1`) so a write can drop
+    exactly the responses it affects. With a `bus`, invalidations are also
+    broadcast so every worker drops its copies, not only the one that wrote.
+    Backend failures are logged and counted, never raised: a read becomes a
+    miss and a write or invalidation is skipped.
+    """
+
+    def __init__(self, backend, ttl, bus=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.bus = bus
+        self._listeners = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    def listen(self):
+        """Start receiving broadcast invalidations in this process, if not yet"""
+        if self.bus:
+            self.bus.start(self._invalidate_local)
+
+    def get(self, key):
+        try:
+            entry = self.backend.get(key)
+        except BACKEND_ERRORS:
+            self._failed('get')
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def set(self, key, entry):
+        try:
+            self.backend.set(key, entry)
+        except BACKEND_ERRORS:
+            self._failed('set')
+
+    def invalidate(self, scopes):
+        self._invalidate_local(scopes)
+        if self.bus:
+            try:
+                self.bus.publish(sorted(scopes))
+            except BACKEND_ERRORS:
+                self._failed('publish')
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        stats = {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'errors': self.errors,
+        }
+        try:
+            stats.update(self.backend.stats())
+        except BACKEND_ERRORS:
+            self._failed('stats')
+        if self.bus:
+            stats.update(broadcasts_sent=self.bus.sent, broadcasts_received=self.bus.received)
+        return stats
+
+    def on_invalidate(self, callback):
+        """Call `callback(scopes)` on every invalidation, local or broadcast"""
+        self._listeners.append(callback)
+
+    def _invalidate_local(self, scopes):
+        try:
+            removed = self.backend.invalidate(scopes)
+        except BACKEND_ERRORS:
+            self._failed('invalidate')
+            removed = 0
+        with self._lock:
+            self.invalidations += removed
+        for callback in self._listeners:
+            callback(scopes)
+
+    def _failed(self, operation):
+        with self._lock:
+            self.errors += 1
+        logger.warning("Response cache %s failed, continuing without the cache", operation, exc_info=True)
+
+def init_app(app):
+    backend_name = app.config.get('CACHE_BACKEND', 'local')
+    bus_url = app.config.get('CACHE_INVALIDATION_URL')
+    if app.config.get('RESPONSE_CACHE_ENABLED', False) and backend_name == 'local' and not bus_url:
+        logger.warning("Response cache is local to each worker and CACHE_INVALIDATION_URL is not set: "
+                       "with several workers, writes are not seen on the others until RESPONSE_CACHE_TTL")
+    backend = create_backend(
+        backend_name,
+        app.config.get('CACHE_URL'),
+        max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024)
+    )
+    cache = app.extensions['response_cache'] = ResponseCache(
+        backend,
+        ttl=app.config.get('RESPONSE_CACHE_TTL', 60),
+        bus=InvalidationBus(bus_url) if bus_url else None
+    )
+    if cache.bus:
+        # Every worker subscribes on its first request, whatever it serves:
+        # the report cache listens too, even with response caching off
+        app.before_request(cache.listen)
+
+def get_cache():
+    return current_app.extensions['response_cache']
+
+def cached_response(scope_of):
+    """Serve a GET view from the response cache.
+
+    `scope_of()` names the data the response depends on; it is called after
+    authentication, so it can use `request.auth`. Only 200 responses are stored.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not current_app.config.get('RESPONSE_CACHE_ENABLED', False):
+                return f(*args, **kwargs)
+
+            cache = get_cache()
+            scope = scope_of()
+            key = (request.endpoint, scope, tuple(sorted(request.args.items(multi=True))))
+
+            entry = cache.get(key)
+            if entry is not None:
+                return _from_cache(entry)
+
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                etag, _ = response.get_etag()
+                cache.set(key, CachedResponse(
+                    response.get_data(), response.mimetype, etag, response.last_modified,
+                    scope, time.time() + cache.ttl
+                ))
+            return response
+        return decorated
+    return decorator
+
+def _from_cache(entry):
+    response = current_app.response_class(entry.body, mimetype=entry.mimetype)
+    if entry.etag:
+        response.set_etag(entry.etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        if request.if_none_match.contains_weak(entry.etag):
+            response = current_app.response_class(status=304, headers=response.headers)
+    if entry.last_modified:
+        response.last_modified = entry.last_modified
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+def mark_dirty(*scopes):
+    """Drop cached responses for `scopes` once the current transaction commits"""
+    db.session.info.setdefault('dirty_scopes', set()).update(scopes)
+
+def assignment_scopes(assignment):
+    """Cache scopes that show `assignment`"""
+    scopes = {f'student:{assignment.student_id}'}
+    if assignment.teacher_id:
+        scopes.add(f'teacher:{assignment.teacher_id}')
+    if assignment.state in ('SUBMITTED', 'GRADED'):
+        scopes.add('principal')
+    return scopes
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    scopes = session.info.pop('dirty_scopes', None)
+    if scopes and has_app_context():
+        cache = current_app.extensions.get('response_cache')
+        if cache:
+            cache.invalidate(scopes)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('dirty_scopes', None)
@@ -11,7 +11,9 @@ class Base(db.Model):
 # Import all models here
 from .student import Student
 from .teacher import Teacher
+from .assignment_content import AssignmentContent
 from .assignment import Assignment
+from .grade_stat import GradeStat
 
 # Export models
-__all__ = ['Student', 'Teacher', 'Assignment', 'Base']
+__all__ = ['Student', 'Teacher', 'Assignment', 'AssignmentContent', 'GradeStat', 'Base']
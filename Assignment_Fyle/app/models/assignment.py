@@ -1,12 +1,32 @@
 from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.hybrid import hybrid_property
 from app import db
+from app.database.compression import digest
 from app.exceptions import StateError, GradingError
+from app.models.assignment_content import AssignmentContent
 
 class Assignment(db.Model):
     __tablename__ = 'assignments'
+    __table_args__ = (
+        # GET /student/assignments: filter by student, keyset order by (created_at, id)
+        db.Index('ix_assignments_student_id_created_at', 'student_id', 'created_at', 'id'),
+        # GET /teacher/assignments: filter by teacher and state, keyset order
+        db.Index('ix_assignments_teacher_id_state_created_at', 'teacher_id', 'state', 'created_at', 'id'),
+        # GET /principal/assignments: filter by state, keyset order
+        db.Index('ix_assignments_state_created_at', 'state', 'created_at', 'id'),
+        # sql/ grade reports: state = 'GRADED' grouped by grade / teacher
+        db.Index('ix_assignments_state_grade_teacher_id', 'state', 'grade', 'teacher_id'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    content = db.Column(db.Text, nullable=False)
+    # The text lives in assignment_contents; read and write it through `content`
+    content_digest = db.Column(
+        db.LargeBinary(32),
+        db.ForeignKey('assignment_contents.digest', name='fk_assignments_content_digest'),
+        nullable=False, index=True
+    )
+    stored_content = db.relationship(AssignmentContent, lazy='select', viewonly=True)
     state = db.Column(db.String(20), default='DRAFT')  # DRAFT, SUBMITTED, GRADED
     grade = db.Column(db.String(2), nullable=True)
     
@@ -26,6 +46,30 @@ class Assignment(db.Model):
             raise StateError(f"Invalid state: {kwargs['state']}")
         super().__init__(**kwargs)
 
+    @hybrid_property
+    def content(self):
+        # Text set on this instance is kept, so reading it back needs no query
+        cached = self.__dict__.get('_content_text')
+        if cached is not None and cached[0] == self.content_digest:
+            return cached[1]
+        if self.content_digest is None:
+            return None
+        return self.stored_content.body
+
+    @content.setter
+    def content(self, value):
+        if value is not None and not isinstance(value, str):
+            raise ValueError("Content must be a string")
+        self.content_digest = digest(value) if value else None
+        self._content_text = (self.content_digest, value)
+        self._unstored_content = value  # Saved by the before_flush hook in assignment_content
+
+    @content.expression
+    def content(cls):
+        return select(AssignmentContent.body).where(
+            AssignmentContent.digest == cls.content_digest
+        ).scalar_subquery()
+
     def set_content(self, content):
         if not content:
             raise ValueError("Content cannot be empty")
@@ -0,0 +1,81 @@
+from sqlalchemy import event, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+from app.database.compression import CompressedText, digest
+
+class AssignmentContent(db.Model):
+    """Assignment text, stored once per distinct value.
+
+    Keyed by the SHA-256 of the text, so identical submissions share a row,
+    and compressed above CONTENT_COMPRESSION_MIN_BYTES. Keeping it out of
+    `assignments` keeps the table every list and report scans small.
+    Rows no assignment points to any more are removed by
+    `flask content prune`.
+    """
+    __tablename__ = 'assignment_contents'
+
+    digest = db.Column(db.LargeBinary(32), primary_key=True)
+    body = db.Column(CompressedText, nullable=False)
+
+    def __repr__(self):
+        return f'<AssignmentContent {self.digest.hex()[:12]}>'
+
+# Dialects with INSERT ... ON CONFLICT
+_UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def upsert_statement(dialect):
+    """INSERT skipping texts already stored, or None where the dialect has no
+    ON CONFLICT. PostgreSQL touches existing rows instead (see store())."""
+    insert = _UPSERT_INSERTS.get(dialect.name)
+    if insert is None:
+        return None
+    statement = insert(AssignmentContent.__table__)
+    if dialect.name == 'postgresql':
+        return statement.on_conflict_do_update(index_elements=['digest'], set_={'digest': statement.excluded.digest})
+    return statement.on_conflict_do_nothing(index_elements=['digest'])
+
+def store(connection, texts):
+    """Save each distinct text not stored yet; returns the digests of `texts`, in order.
+
+    On PostgreSQL texts already stored are touched with a no-op update, which
+    locks their rows until this transaction ends, so a concurrent
+    prune_contents() skips them instead of deleting a text about to be used.
+    SQLite runs one writer at a time and needs no lock.
+    """
+    digests = [digest(text) for text in texts]
+    rows = {key: text for key, text in zip(digests, texts)}
+    if not rows:
+        return digests
+
+    table = AssignmentContent.__table__
+    statement = upsert_statement(connection.dialect)
+    if statement is None:
+        existing = connection.execute(select(table.c.digest).where(table.c.digest.in_(list(rows)))).scalars()
+        for key in existing:
+            del rows[key]
+        statement = table.insert()
+    if rows:
+        connection.execute(statement, [{'digest': key, 'body': text} for key, text in rows.items()])
+    return digests
+
+def with_stored_content(connection, rows):
+    """Assignment rows for a Core insert: each row's 'content' is stored and
+    replaced by its 'content_digest'"""
+    digests = store(connection, [row['content'] for row in rows])
+    return [
+        {**{k: v for k, v in row.items() if k != 'content'}, 'content_digest': key}
+        for row, key in zip(rows, digests)
+    ]
+
+@event.listens_for(Session, 'before_flush')
+def _store_new_content(session, flush_context, instances):
+    """Write the text set through Assignment.content before the rows pointing to it"""
+    texts = [
+        obj.__dict__.pop('_unstored_content')
+        for obj in list(session.new) + list(session.dirty)
+        if '_unstored_content' in obj.__dict__
+    ]
+    texts = [text for text in texts if text]
+    if texts:
+        store(session.connection(mapper=AssignmentContent.__mapper__), texts)
@@ -0,0 +1,16 @@
+from app import db
+
+class GradeStat(db.Model):
+    """Number of graded assignments per teacher and grade.
+
+    Maintained incrementally by the grading service; rebuild with
+    `flask grade-stats rebuild` if rows were written around it.
+    """
+    __tablename__ = 'grade_stats'
+
+    teacher_id = db.Column(db.Integer, db.ForeignKey('teachers.id'), primary_key=True)
+    grade = db.Column(db.String(2), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<GradeStat teacher={self.teacher_id} grade={self.grade} count={self.count}>'
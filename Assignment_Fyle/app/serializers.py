@@ -0,0 +1,65 @@
+import json
+from flask import current_app
+from app.models.assignment import Assignment
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+ASSIGNMENT_FIELDS = (
+    'id', 'content', 'state', 'grade', 'student_id', 'teacher_id', 'created_at', 'updated_at'
+)
+DATETIME_FIELDS = frozenset(('created_at', 'updated_at'))
+
+def assignment_columns(fields=ASSIGNMENT_FIELDS):
+    """Columns to pass to `with_entities` so rows come back as plain tuples"""
+    return [getattr(Assignment, field) for field in fields]
+
+def serialize_rows(rows, fields=ASSIGNMENT_FIELDS):
+    """Convert rows of column values (ordered as `fields`) into dicts.
+
+    Datetimes are formatted once per distinct value: list queries are ordered
+    by created_at, so rows written together share the previous row's string.
+    """
+    datetime_positions = [i for i, field in enumerate(fields) if field in DATETIME_FIELDS]
+    if not datetime_positions:
+        return [dict(zip(fields, row)) for row in rows]
+
+    previous = dict.fromkeys(datetime_positions)
+    formatted = dict.fromkeys(datetime_positions)
+    result = []
+    for row in rows:
+        values = list(row)
+        for i in datetime_positions:
+            value = values[i]
+            if value is None:
+                continue
+            if value != previous[i]:
+                previous[i] = value
+                formatted[i] = value.isoformat()
+            values[i] = formatted[i]
+        result.append(dict(zip(fields, values)))
+    return result
+
+def serialize_assignment(assignment, fields=ASSIGNMENT_FIELDS):
+    """Serialize a single Assignment instance"""
+    return serialize_rows([[getattr(assignment, field) for field in fields]], fields)[0]
+
+def encode_json(payload, sort_keys=True, fast=True):
+    """Encode `payload` to JSON bytes, using orjson when it is installed and `fast` is set"""
+    if orjson is not None and fast:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(payload, sort_keys=sort_keys, separators=(',', ':')).encode()
+
+def dumps(payload):
+    """Encode `payload` with the current app's JSON settings"""
+    return encode_json(
+        payload,
+        sort_keys=current_app.config.get('JSON_SORT_KEYS', True),
+        fast=current_app.config.get('FAST_JSON', True)
+    )
+
+def json_response(payload, status=200):
+    """Drop-in replacement for `jsonify` backed by `dumps`"""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
@@ -0,0 +1,71 @@
+from app.models.assignment import Assignment
+from app.serializers import ASSIGNMENT_FIELDS, assignment_columns
+from app.exceptions import QueryParamError
+
+# List responses leave out the (potentially large) content unless it is requested
+LIST_FIELDS = tuple(field for field in ASSIGNMENT_FIELDS if field != 'content')
+# Columns the keyset cursor is built from, always selected
+KEYSET_FIELDS = ('created_at', 'id')
+
+def parse_fields(args, default=LIST_FIELDS):
+    """Read the `fields` query parameter: a comma separated list, or `all`"""
+    value = args.get('fields')
+    if not value:
+        return default
+    if value == 'all':
+        return ASSIGNMENT_FIELDS
+
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in ASSIGNMENT_FIELDS]
+    if unknown or not fields:
+        raise QueryParamError(f"Unknown fields: {', '.join(unknown)}. Must be from {list(ASSIGNMENT_FIELDS)}")
+    return fields
+
+def projected_columns(fields):
+    """Columns for `fields` followed by any keyset columns not among them.
+
+    The extra keyset columns trail the requested ones, so serializing with
+    `fields` drops them again.
+    """
+    extra = tuple(field for field in KEYSET_FIELDS if field not in fields)
+    return assignment_columns(fields + extra)
+
+def project(query, fields):
+    """Select only `fields` (plus the keyset columns) as plain row tuples"""
+    return query.with_entities(*projected_columns(fields))
+
+# Filters shared by the sync views and the async read app (app.aio)
+
+def student_filters(student_id):
+    return (Assignment.student_id == student_id,)
+
+def teacher_filters(teacher_id):
+    return (Assignment.teacher_id == teacher_id,)
+
+def principal_filters():
+    return (Assignment.state.in_(['SUBMITTED', 'GRADED']),)
+
+# Narrows the teacher scope to the assignments still waiting for a grade
+TEACHER_LIST_FILTERS = (Assignment.state == 'SUBMITTED',)
+
+def student_scope(student_id):
+    """Every assignment belonging to `student_id`"""
+    return Assignment.query.filter(*student_filters(student_id))
+
+def teacher_scope(teacher_id):
+    """Every assignment submitted to `teacher_id`, graded or not"""
+    return Assignment.query.filter(*teacher_filters(teacher_id))
+
+def principal_scope():
+    """Every assignment that has been submitted or graded"""
+    return Assignment.query.filter(*principal_filters())
+
+def student_assignments(student_id, fields=LIST_FIELDS):
+    return project(student_scope(student_id), fields)
+
+def teacher_assignments(teacher_id, fields=LIST_FIELDS):
+    """Submitted assignments waiting for `teacher_id` to grade them"""
+    return project(teacher_scope(teacher_id), fields).filter(*TEACHER_LIST_FILTERS)
+
+def principal_assignments(fields=LIST_FIELDS):
+    return project(principal_scope(), fields)
@@ -0,0 +1,145 @@
+from sqlalchemy import select
+from app import db
+from app.models.assignment import Assignment
+from app.models.assignment_content import AssignmentContent, store
+from app.exceptions import AssignmentError
+from app.middleware.response_cache import assignment_scopes, mark_dirty
+from datetime import datetime
+
+# Largest number of assignments accepted by a single bulk request
+MAX_BULK_ASSIGNMENTS = 1000
+
+def is_id(value):
+    """True for a JSON integer usable as a primary key (bools are ints in Python)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _check_batch(items):
+    if not isinstance(items, list) or not items:
+        raise AssignmentError("A non-empty list of assignments is required")
+    if len(items) > MAX_BULK_ASSIGNMENTS:
+        raise AssignmentError(f"At most {MAX_BULK_ASSIGNMENTS} assignments can be sent at once")
+
+def create_assignments(student_id, items):
+    """Create draft assignments for `student_id` from a list of {'content': ...} dicts.
+
+    Valid items are written with a single multi-row insert; invalid ones are
+    reported in place. Returns one result dict per item; the caller commits.
+    """
+    _check_batch(items)
+
+    now = datetime.utcnow()
+    results = []
+    mappings = []
+    contents = []
+    for item in items:
+        content = item.get('content') if isinstance(item, dict) else None
+        if not content:
+            results.append({'error': 'Content is required'})
+            continue
+        if not isinstance(content, str):
+            results.append({'error': 'Content must be a string'})
+            continue
+        mapping = {
+            'state': 'DRAFT',
+            'student_id': student_id,
+            'created_at': now,
+            'updated_at': now
+        }
+        mappings.append(mapping)
+        contents.append(content)
+        results.append(mapping)
+
+    if mappings:
+        # The texts go to assignment_contents first, in one statement
+        digests = store(db.session.connection(mapper=AssignmentContent.__mapper__), contents)
+        for mapping, content_digest in zip(mappings, digests):
+            mapping['content_digest'] = content_digest
+        for mapping, assignment_id in zip(mappings, _insert_assignments(mappings, student_id, now)):
+            mapping['id'] = assignment_id
+        mark_dirty(f'student:{student_id}')
+
+    return [
+        result if 'error' in result else {
+            'id': result['id'],
+            'state': result['state'],
+            'student_id': result['student_id'],
+            'created_at': result['created_at'].isoformat()
+        } for result in results
+    ]
+
+def _insert_assignments(mappings, student_id, created_at):
+    """Insert `mappings` in one statement; returns their ids, in order.
+
+    bulk_insert_mappings(return_defaults=True) would run one INSERT per row
+    to learn each id. Where INSERT ... RETURNING is available the ids come
+    back with the insert. On SQLite the transaction holds the database's
+    write lock from its first write until it commits, so the newest rows
+    are this batch's; they are checked against the batch before use. Other
+    databases keep the row-at-a-time insert.
+    """
+    connection = db.session.connection(mapper=Assignment.__mapper__)
+    table = Assignment.__table__
+    if connection.dialect.full_returning:
+        return connection.execute(table.insert().values(mappings).returning(table.c.id)).scalars().all()
+    if connection.dialect.name != 'sqlite':
+        db.session.bulk_insert_mappings(Assignment, mappings, return_defaults=True)
+        return [mapping['id'] for mapping in mappings]
+
+    connection.execute(table.insert(), mappings)
+    rows = connection.execute(
+        select(table.c.id, table.c.student_id, table.c.created_at)
+        .order_by(table.c.id.desc())
+        .limit(len(mappings))
+    ).all()
+    if len(rows) != len(mappings) or any(
+        row.student_id != student_id or row.created_at != created_at for row in rows
+    ):
+        raise RuntimeError("Newest assignments are not the batch just inserted")
+    return [row.id for row in reversed(rows)]
+
+def submit_assignments(student_id, items):
+    """Submit many of `student_id`'s drafts, given [{'id': ..., 'teacher_id': ...}].
+
+    Ownership and state are checked against a single query; items that fail
+    are reported instead of aborting the batch. The caller commits.
+    """
+    _check_batch(items)
+
+    ids = [item.get('id') for item in items if isinstance(item, dict) and is_id(item.get('id'))]
+    assignments = {
+        assignment.id: assignment
+        for assignment in Assignment.query.filter(
+            Assignment.id.in_(ids)
+        )
+    }
+
+    now = datetime.utcnow()
+    results = []
+    for item in items:
+        if not isinstance(item, dict) or 'id' not in item or not item.get('teacher_id'):
+            results.append({'id': item.get('id') if isinstance(item, dict) else None,
+                            'error': 'Missing required fields'})
+            continue
+        if not is_id(item['id']) or not is_id(item['teacher_id']):
+            results.append({'id': item['id'], 'error': 'id and teacher_id must be integers'})
+            continue
+
+        assignment = assignments.get(item['id'])
+        if assignment is None:
+            results.append({'id': item['id'], 'error': 'Assignment not found'})
+            continue
+        if assignment.student_id != student_id:
+            results.append({'id': item['id'], 'error': 'Not authorized to submit this assignment'})
+            continue
+        if assignment.state != 'DRAFT':
+            results.append({'id': item['id'], 'error': 'Only draft assignments can be submitted'})
+            continue
+
+        assignment.teacher_id = item['teacher_id']
+        assignment.state = 'SUBMITTED'
+        assignment.updated_at = now
+        mark_dirty(*assignment_scopes(assignment))
+        results.append({'id': assignment.id, 'state': assignment.state,
+                        'teacher_id': assignment.teacher_id})
+
+    return results
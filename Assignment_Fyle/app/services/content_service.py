@@ -0,0 +1,52 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import exists, func, select
+from app import db
+from app.models.assignment import Assignment
+from app.models.assignment_content import AssignmentContent
+
+def prune_contents():
+    """Delete stored texts that no assignment points to, e.g. after drafts
+    were edited; returns how many were removed. The caller commits.
+
+    Safe to run while the app writes. A text a concurrent transaction has
+    just stored or reused is not referenced by a committed assignment yet,
+    but store() holds its row lock, and on PostgreSQL the rows to delete are
+    picked FOR UPDATE SKIP LOCKED, so those texts are left for the next run.
+    On SQLite writers are serialized by the database lock.
+    """
+    table = AssignmentContent.__table__
+    return db.session.execute(table.delete().where(table.c.digest.in_(unused_contents()))).rowcount
+
+def unused_contents():
+    """Digests no assignment points to, skipping rows other transactions have locked"""
+    table = AssignmentContent.__table__
+    referenced = exists().where(Assignment.content_digest == table.c.digest)
+    return select(table.c.digest).where(~referenced).with_for_update(skip_locked=True)
+
+def content_stats():
+    """(stored texts, their size in bytes as stored, assignments pointing to them)"""
+    texts, stored_bytes = db.session.execute(
+        select(func.count(), func.coalesce(func.sum(func.length(AssignmentContent.body)), 0))
+    ).one()
+    assignments = db.session.execute(select(func.count(Assignment.id))).scalar()
+    return texts, stored_bytes, assignments
+
+@click.group('content')
+def content_cli():
+    """Maintain the assignment_contents store."""
+
+@content_cli.command('stats')
+@with_appcontext
+def stats_command():
+    """Report how many texts are stored and how much space they take."""
+    texts, stored_bytes, assignments = content_stats()
+    click.echo(f"{texts} texts, {stored_bytes} bytes stored, for {assignments} assignments")
+
+@content_cli.command('prune')
+@with_appcontext
+def prune_command():
+    """Delete texts no assignment uses any more."""
+    removed = prune_contents()
+    db.session.commit()
+    click.echo(f"Removed {removed} unused texts")
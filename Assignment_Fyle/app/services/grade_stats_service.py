@@ -0,0 +1,129 @@
+from collections import Counter
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.assignment import Assignment
+from app.models.grade_stat import GradeStat
+
+def grade_delta(assignment, new_grade):
+    """Changes to the per-teacher grade counts caused by giving `assignment` `new_grade`"""
+    deltas = Counter()
+    if assignment.state == 'GRADED' and assignment.grade:
+        deltas[(assignment.teacher_id, assignment.grade)] -= 1
+    deltas[(assignment.teacher_id, new_grade)] += 1
+    return deltas
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+def apply_grade_deltas(deltas):
+    """Apply count changes to grade_stats in the current transaction.
+
+    Every key goes into one executemany upsert, so concurrent first grades
+    for the same teacher and grade add up instead of colliding on insert.
+    Keys are sorted so concurrent batches lock rows in the same order.
+    """
+    changes = sorted((key, delta) for key, delta in deltas.items() if delta and key[0] is not None)
+    if not changes:
+        return
+
+    table = GradeStat.__table__
+    insert = _UPSERT_INSERTS.get(db.session.connection(mapper=GradeStat.__mapper__).dialect.name)
+    if insert is not None:
+        statement = insert(table)
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['teacher_id', 'grade'],
+            set_={'count': table.c.count + statement.excluded['count']}
+        ), [{'teacher_id': teacher_id, 'grade': grade, 'count': delta} for (teacher_id, grade), delta in changes])
+        return
+
+    for (teacher_id, grade), delta in changes:
+        updated = db.session.execute(
+            table.update()
+            .where(table.c.teacher_id == teacher_id, table.c.grade == grade)
+            .values(count=table.c.count + delta)
+        ).rowcount
+        if not updated and delta > 0:
+            db.session.execute(table.insert().values(teacher_id=teacher_id, grade=grade, count=delta))
+
+def _counts_from_assignments():
+    rows = db.session.query(
+        Assignment.teacher_id, Assignment.grade, func.count(Assignment.id)
+    ).filter(
+        Assignment.state == 'GRADED',
+        Assignment.grade.isnot(None),
+        Assignment.teacher_id.isnot(None)
+    ).group_by(Assignment.teacher_id, Assignment.grade)
+    return {(teacher_id, grade): count for teacher_id, grade, count in rows}
+
+def _counts_from_stats():
+    return {
+        (stat.teacher_id, stat.grade): stat.count
+        for stat in GradeStat.query.filter(GradeStat.count != 0)
+    }
+
+def find_grade_stat_drift():
+    """Compare grade_stats with a full scan of assignments.
+
+    Returns {(teacher_id, grade): (stored, actual)} for every mismatch.
+    """
+    actual = _counts_from_assignments()
+    stored = _counts_from_stats()
+    return {
+        key: (stored.get(key, 0), actual.get(key, 0))
+        for key in set(actual) | set(stored)
+        if stored.get(key, 0) != actual.get(key, 0)
+    }
+
+def rebuild_grade_stats():
+    """Recompute grade_stats from scratch; the caller commits"""
+    counts = _counts_from_assignments()
+    db.session.execute(GradeStat.__table__.delete())
+    if counts:
+        db.session.execute(GradeStat.__table__.insert(), [
+            {'teacher_id': teacher_id, 'grade': grade, 'count': count}
+            for (teacher_id, grade), count in counts.items()
+        ])
+    return counts
+
+def grade_distribution():
+    """Graded assignments per grade, same shape as sql/count_assignments_in_each_grade.sql"""
+    rows = db.session.query(GradeStat.grade, func.sum(GradeStat.count)).group_by(
+        GradeStat.grade
+    ).having(func.sum(GradeStat.count) > 0).order_by(GradeStat.grade)
+    return [{'grade': grade, 'assignment_count': int(count)} for grade, count in rows]
+
+def top_a_graders():
+    """Teachers with the most A grades, same shape as
+    sql/count_grade_A_assignments_by_teacher_with_max_grading.sql"""
+    stats = GradeStat.query.filter(GradeStat.grade == 'A', GradeStat.count > 0).all()
+    if not stats:
+        return []
+    best = max(stat.count for stat in stats)
+    return [
+        {'teacher_id': stat.teacher_id, 'grade_a_count': stat.count}
+        for stat in stats if stat.count == best
+    ]
+
+@click.group('grade-stats')
+def grade_stats_cli():
+    """Maintain the grade_stats summary table."""
+
+@grade_stats_cli.command('check')
+@with_appcontext
+def check_command():
+    """Report rows of grade_stats that disagree with assignments."""
+    drift = find_grade_stat_drift()
+    for (teacher_id, grade), (stored, actual) in sorted(drift.items(), key=str):
+        click.echo(f"teacher {teacher_id} grade {grade}: stored {stored}, actual {actual}")
+    click.echo("grade_stats is consistent" if not drift else f"{len(drift)} mismatched rows")
+
+@grade_stats_cli.command('rebuild')
+@with_appcontext
+def rebuild_command():
+    """Recompute grade_stats from the assignments table."""
+    counts = rebuild_grade_stats()
+    db.session.commit()
+    click.echo(f"Rebuilt grade_stats with {len(counts)} rows")
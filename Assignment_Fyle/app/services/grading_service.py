@@ -1,29 +1,50 @@
+from collections import Counter
 from app import db
+from app.models.assignment import Assignment
+from app.services.assignment_service import is_id
+from app.services.grade_stats_service import apply_grade_deltas, grade_delta
+from app.services.report_service import mark_grades_changed
+from app.middleware.response_cache import assignment_scopes, mark_dirty
 from app.exceptions import GradingError, StateError
 from datetime import datetime
 
+# Largest number of grades accepted by a single bulk request
+MAX_BULK_GRADES = 1000
+
+def validate_grade(assignment, grade, regrade=False):
+    """Raise GradingError or StateError if `assignment` cannot be given `grade`.
+
+    Only with `regrade` (principals) may a graded assignment be graded again.
+    """
+    if not assignment:
+        raise GradingError("Assignment not found")
+    
+    if not grade:
+        raise GradingError("Grade is required")
+        
+    if grade not in assignment.VALID_GRADES:
+        raise GradingError(f"Invalid grade: {grade}. Must be one of {assignment.VALID_GRADES}")
+
+    # Principal can regrade any assignment
+    if assignment.state == 'GRADED' and not regrade:
+        raise StateError("Assignment already graded")
+        
+    # For teachers, only allow grading submitted assignments
+    if not regrade and assignment.state != 'SUBMITTED':
+        raise StateError("Can only grade submitted assignments")
+
+def _apply_grade(assignment, grade):
+    assignment.grade = grade
+    assignment.state = 'GRADED'
+    assignment.updated_at = datetime.utcnow()
+
 def grade_assignment(assignment, grade, grader_id=None):
     try:
-        if not assignment:
-            raise GradingError("Assignment not found")
-        
-        if not grade:
-            raise GradingError("Grade is required")
-            
-        if grade not in assignment.VALID_GRADES:
-            raise GradingError(f"Invalid grade: {grade}. Must be one of {assignment.VALID_GRADES}")
-
-        # Principal can regrade any assignment
-        if assignment.state == 'GRADED' and not grader_id:
-            raise StateError("Assignment already graded")
-            
-        # For teachers, only allow grading submitted assignments
-        if not grader_id and assignment.state != 'SUBMITTED':
-            raise StateError("Can only grade submitted assignments")
-
-        assignment.grade = grade
-        assignment.state = 'GRADED'
-        assignment.updated_at = datetime.utcnow()
+        validate_grade(assignment, grade, regrade=bool(grader_id))
+        apply_grade_deltas(grade_delta(assignment, grade))
+        _apply_grade(assignment, grade)
+        mark_grades_changed()
+        mark_dirty(*assignment_scopes(assignment))
         
         db.session.add(assignment)
         return assignment
@@ -34,3 +55,72 @@ def grade_assignment(assignment, grade, grader_id=None):
     except Exception as e:
         db.session.rollback()
         raise GradingError(f"Unexpected error: {str(e)}")
+
+def grade_assignments(items, teacher_id=None, as_principal=False):
+    """Grade many assignments at once.
+
+    `items` is a list of {'id': ..., 'grade': ...} dicts. Pass exactly one of
+    `teacher_id`, for a teacher grading their own submitted assignments, or
+    `as_principal=True`, which may also regrade any assignment. All targets
+    are loaded with a single IN query and invalid items are reported instead
+    of aborting the batch. Returns one result dict per item; the caller commits.
+    """
+    if as_principal == (teacher_id is not None):
+        raise ValueError("Grade either as a principal or as a teacher")
+    if not isinstance(items, list) or not items:
+        raise GradingError("A non-empty list of grades is required")
+    if len(items) > MAX_BULK_GRADES:
+        raise GradingError(f"At most {MAX_BULK_GRADES} grades can be submitted at once")
+
+    ids = [item.get('id') for item in items if isinstance(item, dict) and is_id(item.get('id'))]
+    assignments = {
+        assignment.id: assignment
+        for assignment in Assignment.query.filter(
+            Assignment.id.in_(ids)
+        )
+    }
+
+    results = []
+    seen = set()
+    deltas = Counter()
+    for item in items:
+        if not isinstance(item, dict) or 'id' not in item or 'grade' not in item:
+            results.append({'id': item.get('id') if isinstance(item, dict) else None,
+                            'error': 'Missing required fields'})
+            continue
+
+        assignment_id = item['id']
+        if not is_id(assignment_id):
+            results.append({'id': assignment_id, 'error': 'Assignment id must be an integer'})
+            continue
+        assignment = assignments.get(assignment_id)
+        if assignment_id in seen:
+            results.append({'id': assignment_id, 'error': 'Duplicate assignment id'})
+            continue
+        seen.add(assignment_id)
+
+        if assignment is None:
+            results.append({'id': assignment_id, 'error': 'Assignment not found'})
+            continue
+        if teacher_id is not None and assignment.teacher_id != teacher_id:
+            results.append({'id': assignment_id, 'error': 'Not authorized to grade this assignment'})
+            continue
+        if assignment.state == 'DRAFT':
+            results.append({'id': assignment_id, 'error': 'Cannot grade a draft assignment'})
+            continue
+
+        try:
+            validate_grade(assignment, item['grade'], regrade=as_principal)
+        except (GradingError, StateError) as e:
+            results.append({'id': assignment_id, 'error': str(e)})
+            continue
+
+        deltas.update(grade_delta(assignment, item['grade']))
+        _apply_grade(assignment, item['grade'])
+        mark_dirty(*assignment_scopes(assignment))
+        results.append({'id': assignment_id, 'grade': assignment.grade, 'state': assignment.state})
+
+    if deltas:
+        apply_grade_deltas(deltas)
+        mark_grades_changed()
+    return results
@@ -0,0 +1,64 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+from app.models.assignment import Assignment
+from app.exceptions import PaginationError
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def encode_cursor(created_at, row_id):
+    """Encode the (created_at, id) keyset of the last row into an opaque cursor"""
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor back into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+def parse_page_args(args):
+    """Read `limit` and `cursor` from the query string"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise PaginationError("Limit must be an integer")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise PaginationError(f"Limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    cursor = args.get('cursor')
+    return limit, decode_cursor(cursor) if cursor else None
+
+def keyset_condition(cursor):
+    """Filter selecting the rows that come after `cursor` in (created_at, id) order"""
+    created_at, row_id = cursor
+    return or_(
+        Assignment.created_at > created_at,
+        and_(Assignment.created_at == created_at, Assignment.id > row_id)
+    )
+
+def paginate(query, limit, cursor=None):
+    """Return one page of assignments and the cursor for the next page.
+
+    Rows are ordered by (created_at, id) and the page after `cursor` is
+    located with a keyset filter, so deep pages cost the same as the first.
+    """
+    if cursor:
+        query = query.filter(keyset_condition(cursor))
+
+    rows = query.order_by(Assignment.created_at, Assignment.id).limit(limit + 1).all()
+    return split_page(rows, limit)
+
+def split_page(rows, limit):
+    """Trim the look-ahead row fetched past `limit` and build the next cursor from the last kept row"""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
@@ -0,0 +1,78 @@
+import os
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from app import db
+
+# Response cache scope used to tell other workers that reports are stale
+REPORTS_SCOPE = 'reports'
+
+SQL_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'sql')
+
+# Report name -> file in sql/
+REPORTS = {
+    'grade-distribution': 'count_assignments_in_each_grade.sql',
+    'top-a-graders': 'count_grade_A_assignments_by_teacher_with_max_grading.sql',
+}
+
+class ReportRegistry:
+    """The sql/ reports, loaded once, with results cached for `ttl` seconds"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._statements = {}
+        self._cache = {}
+
+    def load(self, reports=REPORTS, sql_dir=SQL_DIR):
+        for name, filename in reports.items():
+            with open(os.path.join(sql_dir, filename)) as f:
+                self._statements[name] = text(f.read())
+
+    def __contains__(self, name):
+        return name in self._statements
+
+    def run(self, name):
+        """Return the rows of report `name` as dicts, from cache while fresh"""
+        cached = self._cache.get(name)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        rows = [dict(row._mapping) for row in db.session.execute(self._statements[name])]
+        self._cache[name] = (time.monotonic() + self.ttl, rows)
+        return rows
+
+    def invalidate(self):
+        self._cache.clear()
+
+def init_app(app):
+    registry = ReportRegistry(ttl=app.config.get('REPORT_CACHE_TTL', 30))
+    registry.load()
+    app.extensions['reports'] = registry
+
+    cache = app.extensions.get('response_cache')
+    if cache:
+        cache.on_invalidate(lambda scopes: REPORTS_SCOPE in scopes and registry.invalidate())
+
+def get_registry():
+    return current_app.extensions['reports']
+
+def mark_grades_changed():
+    """Flag the current transaction so cached reports are dropped once it commits"""
+    db.session.info['grades_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    if session.info.pop('grades_changed', False) and has_app_context():
+        cache = current_app.extensions.get('response_cache')
+        if cache:
+            cache.invalidate({REPORTS_SCOPE})  # Also reaches other workers through the bus
+            return
+        registry = current_app.extensions.get('reports')
+        if registry:
+            registry.invalidate()
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_after_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('grades_changed', None)
@@ -0,0 +1,7 @@
+from dotenv import load_dotenv
+from app.aio import create_asgi_app
+
+load_dotenv()
+
+# Async read endpoints; serve with `uvicorn asgi:app` (see README)
+app = create_asgi_app()
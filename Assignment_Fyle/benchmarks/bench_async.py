@@ -0,0 +1,118 @@
+"""Throughput of the sync list views against the async read app under many clients.
+
+Both servers run as a single process on a seeded SQLite file: gunicorn with
+one gthread worker (GUNICORN_THREADS threads) and uvicorn with the app.aio
+ASGI app. Every SELECT is delayed by --query-delay-ms inside the database
+driver's thread to stand in for the round trip to a networked database,
+which is the wait the async path is meant to overlap. Clients are asyncio
+coroutines over keep-alive connections.
+
+    python -m benchmarks.bench_async [--clients 100 500] [--duration 10] [--query-delay-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from benchmarks.bench_servers import ROOT, free_port, seed, wait_for
+
+PATH = '/principal/assignments?limit=20'
+HEADERS = '{"user_id": 3, "principal_id": 1}'
+
+SERVERS = {
+    'sync (gunicorn)': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                        'benchmarks.bench_async:sync_app'],
+    'async (uvicorn)': [sys.executable, '-m', 'uvicorn', 'benchmarks.bench_async:async_app',
+                        '--log-level', 'warning', '--no-access-log', '--backlog', '2048'],
+}
+
+def _install_delay(delay):
+    """Sleep before each SELECT in the thread that runs it, like a slow database would"""
+    @event.listens_for(Engine, 'connect')
+    def connect(dbapi_connection, connection_record):
+        # aiosqlite wraps the sqlite3 connection that its worker thread drives
+        adapted = getattr(dbapi_connection, '_connection', None)
+        raw = adapted._conn if adapted is not None else dbapi_connection
+        raw.set_trace_callback(lambda statement: statement.startswith('SELECT') and time.sleep(delay))
+
+def __getattr__(name):
+    """Build the served apps lazily, so importing this module to run the client stays cheap"""
+    if name not in ('sync_app', 'async_app'):
+        raise AttributeError(name)
+    _install_delay(float(os.environ.get('BENCH_QUERY_DELAY_MS', 0)) / 1000)
+    if name == 'sync_app':
+        from app import create_app
+        return create_app()
+    from app.aio import create_asgi_app
+    return create_asgi_app()
+
+async def _client(port, stop_at, latencies, errors):
+    request = (f'GET {PATH} HTTP/1.1\r\nHost: localhost\r\nX-Principal: {HEADERS}\r\n\r\n').encode()
+    reader = writer = None
+    while time.monotonic() < stop_at:
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(head.lower().split(b'content-length:')[1].split(b'\r\n')[0])
+            await reader.readexactly(length)
+            if not head.startswith(b'HTTP/1.1 200'):
+                raise ValueError(head.split(b'\r\n')[0])
+            latencies.append(time.perf_counter() - started)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            errors.append(1)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+async def _drive(port, clients, duration):
+    latencies, errors = [], []
+    started = time.monotonic()
+    await asyncio.gather(*(_client(port, started + duration, latencies, errors) for _ in range(clients)))
+    # Requests in flight at the deadline still finish, so divide by the real elapsed time
+    elapsed = time.monotonic() - started
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    return len(latencies) / elapsed, pct(0.50), pct(0.99), len(errors)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, nargs='+', default=[100, 500])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--query-delay-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    database_url = f'sqlite:///{os.path.join(tempfile.mkdtemp(), "bench.db")}'
+    seed(database_url, args.rows)
+
+    print(f"{'server':<18} {'clients':>7} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'errors':>7}")
+    for name, command in SERVERS.items():
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=database_url, PORT=str(port), WEB_CONCURRENCY='1',
+                   RESPONSE_CACHE_ENABLED='false', GUNICORN_ACCESS_LOG='', FLASK_ENV='production',
+                   BENCH_QUERY_DELAY_MS=str(args.query_delay_ms), GUNICORN_TIMEOUT='120')
+        if 'uvicorn' in name:
+            command = command + ['--port', str(port)]
+        server = subprocess.Popen(command, cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            for clients in args.clients:
+                rps, p50, p99, errors = asyncio.run(_drive(port, clients, args.duration))
+                print(f"{name:<18} {clients:>7} {rps:>8.0f} {p50:>8.1f} {p99:>9.1f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
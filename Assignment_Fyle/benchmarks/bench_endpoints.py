@@ -0,0 +1,420 @@
+"""Throughput, latency percentiles and peak memory of every API route.
+
+Copies a cached benchmarks.datagen dataset (or uses --database-url),
+then runs each case below through the Flask test client in this process
+and over HTTP against gunicorn. Every route of the student, teacher and
+principal blueprints has a case, plus both sql/ reports; a route without
+one stops the run. The response cache and the report cache are off so
+requests reach the database. Write cases submit fresh drafts and regrade
+existing assignments, so a --database-url dataset changes between runs.
+
+    python -m benchmarks.bench_endpoints [--size small] [--mode both] [--requests 200] [--clients 8]
+    python -m benchmarks.bench_endpoints --save benchmarks/baseline.json
+    python -m benchmarks.bench_endpoints --compare benchmarks/baseline.json [--tolerance 0.2]
+
+--compare exits with status 1 if any case got slower at p95, lost
+throughput or used more memory than the tolerance allows.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from benchmarks.bench_servers import ROOT, free_port, wait_for
+
+BLUEPRINTS = ('student', 'teacher', 'principal')
+PRINCIPAL = {'user_id': 9, 'principal_id': 1}
+BULK_SIZE = 20
+PAGE_SIZE = 50
+
+def student(student_id):
+    return {'user_id': 1000000 + student_id, 'student_id': student_id}
+
+def teacher(teacher_id):
+    return {'user_id': teacher_id, 'teacher_id': teacher_id}
+
+class Case:
+    """One benchmarked request; build(i) returns the i-th (method, path, principal, body)"""
+
+    def __init__(self, name, endpoint, build, heavy=False):
+        self.name = name
+        self.endpoint = endpoint
+        self.build = build
+        self.heavy = heavy
+
+class Workload:
+    """Ids the cases draw from, read from (or added to) the benchmark database"""
+
+    def __init__(self, engine, requests, seed=1):
+        from sqlalchemy import select
+        from app.models import Assignment
+        from benchmarks.datagen import add_drafts, counts
+        self.rng = random.Random(seed)
+        self.teachers, self.students, _ = counts(engine)
+        table = Assignment.__table__
+
+        with engine.connect() as conn:
+            self.existing_drafts = conn.execute(
+                select(table.c.id, table.c.student_id).where(table.c.state == 'DRAFT').limit(1000)
+            ).all()
+            self.gradable = conn.execute(
+                select(table.c.id, table.c.teacher_id).where(table.c.state != 'DRAFT').limit(5000)
+            ).all()
+        if not self.existing_drafts or len(self.gradable) < BULK_SIZE:
+            raise SystemExit("The dataset needs drafts and at least %d submitted or graded assignments" % BULK_SIZE)
+
+        # Submitting uses a draft up, so every submit request gets a new one
+        owners = self.rng.sample(range(1, self.students + 1), min(requests, self.students))
+        per_owner = -(-requests // len(owners))
+        self.single_drafts = [(s, a) for s, ids in add_drafts(engine, owners, per_owner).items() for a in ids]
+        self.bulk_drafts = list(add_drafts(engine, owners, BULK_SIZE).items())
+
+        # Teachers grade only their own submissions, and only once, so every
+        # teacher bulk grade gets a fresh batch submitted to that teacher
+        batches = add_drafts(engine, owners, BULK_SIZE).values()
+        self.teacher_batches = []
+        with engine.begin() as conn:
+            for ids in batches:
+                teacher_id = self.any_teacher()
+                conn.execute(table.update().where(table.c.id.in_(ids)).values(state='SUBMITTED', teacher_id=teacher_id))
+                self.teacher_batches.append((teacher_id, ids))
+
+    def any_student(self):
+        return self.rng.randint(1, self.students)
+
+    def any_teacher(self):
+        return self.rng.randint(1, self.teachers)
+
+    def to_grade(self, count):
+        return self.rng.sample(self.gradable, count)
+
+def cases(work):
+    def grade_body(i):
+        return {'grades': [{'id': a, 'grade': 'ABCDF'[(i + n) % 5]} for n, (a, _) in enumerate(work.to_grade(BULK_SIZE))]}
+
+    def teacher_bulk_grade(i):
+        teacher_id, ids = work.teacher_batches[i % len(work.teacher_batches)]
+        return 'POST', '/teacher/assignments/grade/bulk', teacher(teacher_id), {
+            'grades': [{'id': a, 'grade': 'ABCDF'[(i + n) % 5]} for n, a in enumerate(ids)]
+        }
+
+    def single_grade(i, as_teacher):
+        assignment_id, teacher_id = work.to_grade(1)[0]
+        path = '/teacher/assignments/grade' if as_teacher else '/principal/assignments/grade'
+        return 'POST', path, teacher(teacher_id) if as_teacher else PRINCIPAL, {'id': assignment_id, 'grade': 'ABCDF'[i % 5]}
+
+    def edit(i):
+        assignment_id, student_id = work.existing_drafts[i % len(work.existing_drafts)]
+        return 'POST', '/student/assignments', student(student_id), {'id': assignment_id, 'content': f'Revision {i}'}
+
+    def submit(i):
+        student_id, assignment_id = work.single_drafts[i % len(work.single_drafts)]
+        return 'POST', '/student/assignments/submit', student(student_id), {'id': assignment_id, 'teacher_id': work.any_teacher()}
+
+    def bulk_submit(i):
+        student_id, ids = work.bulk_drafts[i % len(work.bulk_drafts)]
+        return 'POST', '/student/assignments/submit/bulk', student(student_id), {
+            'assignments': [{'id': a, 'teacher_id': work.any_teacher()} for a in ids]
+        }
+
+    return [
+        Case('student list', 'student.list_assignments',
+             lambda i: ('GET', f'/student/assignments?limit={PAGE_SIZE}', student(work.any_student()), None)),
+        Case('student create', 'student.create_or_edit_assignment',
+             lambda i: ('POST', '/student/assignments', student(work.any_student()), {'content': f'Essay {i}'})),
+        Case('student edit', 'student.create_or_edit_assignment', edit),
+        Case('student bulk create', 'student.create_assignments_bulk',
+             lambda i: ('POST', '/student/assignments/bulk', student(work.any_student()),
+                        {'assignments': [{'content': f'Essay {i}.{n}'} for n in range(BULK_SIZE)]})),
+        Case('student submit', 'student.submit_assignment', submit),
+        Case('student bulk submit', 'student.submit_assignments_bulk', bulk_submit),
+        Case('teacher list', 'teacher.list_assignments',
+             lambda i: ('GET', f'/teacher/assignments?limit={PAGE_SIZE}', teacher(work.any_teacher()), None)),
+        Case('teacher grade', 'teacher.grade_assignment_route', lambda i: single_grade(i, True)),
+        Case('teacher bulk grade', 'teacher.grade_assignments_bulk_route', teacher_bulk_grade),
+        Case('principal teachers', 'principal.list_teachers',
+             lambda i: ('GET', '/principal/teachers', PRINCIPAL, None)),
+        Case('principal list', 'principal.list_assignments',
+             lambda i: ('GET', f'/principal/assignments?limit={PAGE_SIZE}', PRINCIPAL, None)),
+        Case('principal grade', 'principal.grade_assignment_route', lambda i: single_grade(i, False)),
+        Case('principal bulk grade', 'principal.grade_assignments_bulk_route',
+             lambda i: ('POST', '/principal/assignments/grade/bulk', PRINCIPAL, grade_body(i))),
+        Case('grade stats grades', 'principal.grade_stats_distribution',
+             lambda i: ('GET', '/principal/grade-stats/grades', PRINCIPAL, None)),
+        Case('grade stats top A', 'principal.grade_stats_top_a_graders',
+             lambda i: ('GET', '/principal/grade-stats/top-a-graders', PRINCIPAL, None)),
+        Case('report grade distribution', 'principal.run_report',
+             lambda i: ('GET', '/principal/reports/grade-distribution', PRINCIPAL, None), heavy=True),
+        Case('report top A graders', 'principal.run_report',
+             lambda i: ('GET', '/principal/reports/top-a-graders', PRINCIPAL, None), heavy=True),
+        Case('principal export', 'principal.export_assignments',
+             lambda i: ('GET', '/principal/assignments/export', PRINCIPAL, None), heavy=True),
+    ]
+
+def check_coverage(app, all_cases):
+    routes = {rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.split('.')[0] in BLUEPRINTS}
+    missing = routes - {case.endpoint for case in all_cases}
+    if missing:
+        raise SystemExit(f"No benchmark case for: {', '.join(sorted(missing))}")
+
+def reset_peak_rss(pid):
+    """Restart the kernel's peak RSS (VmHWM) counting for `pid`; Linux only"""
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+def peak_rss_mb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
+
+def generate_database(size, path=None):
+    """Copy the benchmarks.datagen snapshot of `size` to `path`, by default a
+    temporary SQLite file; returns its URL.
+
+    The snapshot is generated in a child process the first time and reused
+    by later runs, which only pay for the copy.
+    """
+    from benchmarks import datagen
+
+    def build(database_url):
+        subprocess.run([sys.executable, '-m', 'benchmarks.datagen', database_url, '--size', size], cwd=ROOT, check=True)
+
+    path = path or os.path.join(tempfile.mkdtemp(), 'bench.db')
+    shutil.copyfile(datagen.snapshot(*datagen.SIZES[size], build=build), path)
+    return f'sqlite:///{path}'
+
+def start_gunicorn(workers, **env):
+    """Start gunicorn with this process's environment plus `env`; returns (process, port)"""
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers), GUNICORN_ACCESS_LOG='', **env)
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(port)
+    except RuntimeError:
+        server.terminate()
+        raise
+    return server, port
+
+def children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(child) for child in f.read().split()]
+    except OSError:
+        return []
+
+def percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+
+def summarize(latencies, errors, elapsed, rss):
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 0.50), 2),
+        'p95_ms': round(percentile(latencies, 0.95), 2),
+        'p99_ms': round(percentile(latencies, 0.99), 2),
+        'peak_rss_mb': rss and round(rss, 1),
+    }
+
+def run_client(app, case, count):
+    """Send `count` requests through the test client, one after another"""
+    client = app.test_client()
+    latencies, errors = [], 0
+    reset_peak_rss(os.getpid())
+    started = time.perf_counter()
+    for i in range(count):
+        method, path, principal, body = case.build(i)
+        begun = time.perf_counter()
+        response = client.open(path, method=method, json=body, headers={'X-Principal': json.dumps(principal)})
+        response.get_data()  # Drain streamed responses
+        if response.status_code == 200:
+            latencies.append(time.perf_counter() - begun)
+        else:
+            errors += 1
+    return summarize(latencies, errors, time.perf_counter() - started, peak_rss_mb(os.getpid()))
+
+def run_http(port, workers, case, count, clients):
+    """Send `count` requests from `clients` keep-alive connections"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    numbers = itertools.count()
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+        local, failed = [], 0
+        while True:
+            i = next(numbers)
+            if i >= count:
+                break
+            method, path, principal, body = case.build(i)
+            headers = {'X-Principal': json.dumps(principal)}
+            if body is not None:
+                headers['Content-Type'] = 'application/json'
+                body = json.dumps(body)
+            begun = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - begun)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    for pid in workers:
+        reset_peak_rss(pid)
+    threads = [threading.Thread(target=client) for _ in range(min(clients, count))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    peaks = [rss for rss in map(peak_rss_mb, workers) if rss is not None]
+    return summarize(latencies, errors[0], elapsed, max(peaks) if peaks else None)
+
+def print_header(mode):
+    print(f"\n{mode}")
+    print(f"{'case':<27} {'req':>5} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+
+def print_row(name, result):
+    rss = f"{result['peak_rss_mb']:.0f}" if result['peak_rss_mb'] is not None else '-'
+    print(f"{name:<27} {result['requests']:>5} {result['errors']:>4} {result['rps']:>8.1f} "
+          f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {rss:>8}", flush=True)
+
+def compare(results, baseline, tolerance):
+    """Print the change of every case against `baseline`; returns the regressed cases"""
+    regressions = []
+    print(f"\nAgainst baseline from {baseline['meta']['date']} (tolerance {tolerance:.0%})")
+    if baseline['meta'].get('dataset') != results['meta'].get('dataset'):
+        print(f"warning: baseline dataset {baseline['meta'].get('dataset')} differs from {results['meta'].get('dataset')}")
+    print(f"{'mode':<7} {'case':<27} {'req/s':<19} {'p95 ms':<21} {'peak MB':<17}")
+    for mode, cases_now in results['results'].items():
+        for name, now in cases_now.items():
+            before = baseline['results'].get(mode, {}).get(name)
+            if not before:
+                continue
+            slower = now['p95_ms'] > before['p95_ms'] * (1 + tolerance)
+            fewer = now['rps'] < before['rps'] * (1 - tolerance)
+            bigger = bool(now['peak_rss_mb'] and before['peak_rss_mb']
+                          and now['peak_rss_mb'] > before['peak_rss_mb'] * (1 + tolerance))
+            if slower or fewer or bigger:
+                regressions.append((mode, name))
+            print(f"{mode:<7} {name:<27} "
+                  f"{before['rps']:>7.1f} -> {now['rps']:<7.1f}{'!' if fewer else ' '} "
+                  f"{before['p95_ms']:>8.1f} -> {now['p95_ms']:<8.1f}{'!' if slower else ' '} "
+                  f"{before['peak_rss_mb'] or 0:>6.0f} -> {now['peak_rss_mb'] or 0:<6.0f}{'!' if bigger else ' '}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database-url', help='reuse a database made by benchmarks.datagen')
+    parser.add_argument('--size', default='small', help='dataset size for benchmarks.datagen (small, medium, large)')
+    parser.add_argument('--mode', choices=('client', 'http', 'both'), default='both')
+    parser.add_argument('--requests', type=int, default=200, help='requests per case')
+    parser.add_argument('--heavy-requests', type=int, default=3, help='requests per report and export case')
+    parser.add_argument('--clients', type=int, default=8, help='concurrent connections in http mode')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers in http mode')
+    parser.add_argument('--only', help='run the cases whose name contains this')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='compare with results saved by --save')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    path = None if args.database_url else os.path.join(tempfile.mkdtemp(), 'bench.db')
+    database_url = args.database_url or f'sqlite:///{path}'
+    # Cached responses and report results would hide the queries being measured.
+    # Set before the snapshot imports the app: config reads them once, on import.
+    os.environ.update(DATABASE_URL=database_url, RESPONSE_CACHE_ENABLED='false', REPORT_CACHE_TTL='0',
+                      FLASK_ENV='production')
+    if path:
+        generate_database(args.size, path)
+    # SQLite flushes the graded rows one UPDATE each, which the query counter
+    # reports as a possible N+1 on every bulk grade; keep the table readable
+    logging.getLogger('app.database.query_counter').setLevel(logging.ERROR)
+
+    from sqlalchemy import create_engine
+    from app import create_app
+    from benchmarks.datagen import counts
+    engine = create_engine(database_url)
+    dataset = dict(zip(('teachers', 'students', 'assignments'), counts(engine)))
+    results = {
+        'meta': {'date': datetime.now().isoformat(timespec='seconds'), 'dataset': dataset,
+                 'python': platform.python_version(), 'cpus': os.cpu_count(), 'requests': args.requests,
+                 'clients': args.clients, 'workers': args.workers},
+        'results': {},
+    }
+    print(f"Dataset: {dataset}")
+
+    app = create_app()
+    modes = ('client', 'http') if args.mode == 'both' else (args.mode,)
+    for mode in modes:
+        work = Workload(engine, args.requests)
+        all_cases = cases(work)
+        check_coverage(app, all_cases)
+        selected = [case for case in all_cases if not args.only or args.only in case.name]
+        results['results'][mode] = {}
+        print_header(mode)
+
+        server = port = None
+        if mode == 'http':
+            server, port = start_gunicorn(args.workers)
+        try:
+            for case in selected:
+                count = args.heavy_requests if case.heavy else args.requests
+                if server:
+                    result = run_http(port, children(server.pid), case, count, args.clients)
+                else:
+                    result = run_client(app, case, count)
+                results['results'][mode][case.name] = result
+                print_row(case.name, result)
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved to {args.save}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(f'{m}/{n}' for m, n in regressions)}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Per-row cost of serializing assignment list responses.
+
+Compares the previous approach (hydrate ORM objects, build dicts with two
+isoformat() calls each, encode with the stdlib) against app.serializers
+(tuple rows from with_entities, memoized datetime formatting, orjson).
+
+    python -m benchmarks.bench_serializer [rows ...]
+"""
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from app import create_app, db
+from sqlalchemy.orm import joinedload
+from app.models import Assignment, Student, Teacher
+from app.models.assignment_content import with_stored_content
+from app.serializers import assignment_columns, dumps, serialize_rows
+
+def seed(count):
+    db.session.query(Assignment).delete()
+    db.session.commit()
+    student = Student.query.first() or Student(user_id=1)
+    teacher = Teacher.query.first() or Teacher(user_id=2)
+    db.session.add_all([student, teacher])
+    db.session.commit()
+
+    start = datetime(2025, 1, 1)
+    db.session.execute(Assignment.__table__.insert(), with_stored_content(db.session.connection(), [
+        {
+            'content': f'Essay {i}',
+            'state': 'SUBMITTED',
+            'student_id': student.id,
+            'teacher_id': teacher.id,
+            # Imports write rows in batches that share a timestamp
+            'created_at': start + timedelta(seconds=i // 50),
+            'updated_at': start + timedelta(seconds=i // 50),
+        } for i in range(count)
+    ]))
+    db.session.commit()
+
+def before():
+    assignments = Assignment.query.options(joinedload(Assignment.stored_content)).order_by(
+        Assignment.created_at, Assignment.id
+    ).all()
+    return json.dumps({'data': [{
+        'id': a.id,
+        'content': a.content,
+        'state': a.state,
+        'grade': a.grade,
+        'student_id': a.student_id,
+        'teacher_id': a.teacher_id,
+        'created_at': a.created_at.isoformat(),
+        'updated_at': a.updated_at.isoformat()
+    } for a in assignments]}).encode()
+
+def after():
+    rows = Assignment.query.with_entities(*assignment_columns()).order_by(
+        Assignment.created_at, Assignment.id
+    ).all()
+    return dumps({'data': serialize_rows(rows)})
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main(sizes):
+    app = create_app(testing=True)
+    with app.test_request_context():
+        print(f"{'rows':>8} {'before us/row':>14} {'after us/row':>13} {'speedup':>8}")
+        for count in sizes:
+            seed(count)
+            old = timed(before) / count * 1e6
+            new = timed(after) / count * 1e6
+            print(f"{count:>8} {old:>14.2f} {new:>13.2f} {old / new:>7.1f}x")
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [10000, 100000])
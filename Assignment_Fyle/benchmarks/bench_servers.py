@@ -0,0 +1,139 @@
+"""Requests/sec and latency of the dev server against gunicorn.
+
+Seeds a throwaway SQLite database, starts each server on it in turn and
+drives the list endpoints from `clients` threads over keep-alive
+connections. The response cache is switched off so every request reaches
+the view and the database.
+
+    python -m benchmarks.bench_servers [--clients 16] [--duration 10] [--rows 2000]
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = {
+    '/student/assignments': '{"user_id": 1, "student_id": 1}',
+    '/teacher/assignments': '{"user_id": 2, "teacher_id": 1}',
+    '/principal/assignments': '{"user_id": 3, "principal_id": 1}',
+}
+
+SERVERS = {
+    'flask dev server': [sys.executable, 'run.py'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+}
+
+def seed(database_url, rows):
+    os.environ['DATABASE_URL'] = database_url
+    from app import create_app, db
+    from app.models import Assignment, Student, Teacher
+    from app.models.assignment_content import with_stored_content
+
+    app = create_app()
+    with app.app_context():
+        db.session.add_all([Student(user_id=1), Teacher(user_id=2)])
+        db.session.commit()
+        start = datetime(2025, 1, 1)
+        db.session.execute(Assignment.__table__.insert(), with_stored_content(db.session.connection(), [
+            {
+                'content': f'Essay {i}',
+                'state': 'SUBMITTED',
+                'student_id': 1,
+                'teacher_id': 1,
+                'created_at': start + timedelta(seconds=i),
+                'updated_at': start + timedelta(seconds=i),
+            } for i in range(rows)
+        ]))
+        db.session.commit()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_for(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def drive(port, path, headers, clients, duration):
+    """Hit `path` from `clients` threads for `duration` seconds"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - started)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    return len(latencies) / duration, pct(0.50), pct(0.99), errors[0]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--rows', type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    database_url = f'sqlite:///{os.path.join(workdir, "bench.db")}'
+    seed(database_url, args.rows)
+
+    print(f"{'server':<18} {'endpoint':<24} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for name, command in SERVERS.items():
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=database_url, PORT=str(port),
+                   RESPONSE_CACHE_ENABLED='false', GUNICORN_ACCESS_LOG='', FLASK_ENV='production')
+        server = subprocess.Popen(command, cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            for path, principal in ENDPOINTS.items():
+                rps, p50, p99, errors = drive(port, path, {'X-Principal': principal},
+                                              args.clients, args.duration)
+                print(f"{name:<18} {path:<24} {rps:>8.0f} {p50:>8.1f} {p99:>8.1f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
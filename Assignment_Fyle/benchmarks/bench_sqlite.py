@@ -0,0 +1,132 @@
+"""Write throughput on SQLite with and without the SQLITE_TUNING profile.
+
+For each setting, seeds a fresh database file and starts gunicorn
+(WEB_CONCURRENCY workers, so writes come from several processes as in
+production), then hammers the submit and grade endpoints from `clients`
+threads. Each student client submits its own drafts; grade clients
+re-grade random submitted assignments as the principal.
+
+    python -m benchmarks.bench_sqlite [--clients 24] [--duration 10] [--workers 3]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from benchmarks.bench_servers import ROOT, free_port, wait_for
+
+GRADES = ['A', 'B', 'C', 'D']
+
+def seed(database_url, students, drafts_per_student, submitted):
+    """Create the rows in a child process, so this one never imports the app"""
+    script = f"""
+from app import create_app, db
+from app.models import Assignment, Student, Teacher
+from app.models.assignment_content import with_stored_content
+app = create_app()
+with app.app_context():
+    db.session.add_all([Teacher(user_id=1)] + [Student(user_id=100 + i) for i in range({students})])
+    db.session.commit()
+    rows = [dict(content='Essay', state='DRAFT', student_id=s + 1) for s in range({students}) for _ in range({drafts_per_student})]
+    rows += [dict(content='Essay', state='SUBMITTED', student_id=1, teacher_id=1) for _ in range({submitted})]
+    db.session.execute(Assignment.__table__.insert(), with_stored_content(db.session.connection(), rows))
+    db.session.commit()
+"""
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, check=True,
+                   env=dict(os.environ, DATABASE_URL=database_url))
+    drafts = {s + 1: list(range(s * drafts_per_student + 1, (s + 1) * drafts_per_student + 1))
+              for s in range(students)}
+    first_submitted = students * drafts_per_student + 1
+    return drafts, list(range(first_submitted, first_submitted + submitted))
+
+def drive(port, clients, duration, next_request):
+    """Run `clients` threads posting `next_request(client)` -> (path, principal, body) until `duration` ends"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    started = time.monotonic()
+
+    def client(number):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local, failed = [], 0
+        while time.monotonic() < started + duration:
+            request = next_request(number)
+            if request is None:
+                break
+            path, principal, body = request
+            begun = time.perf_counter()
+            try:
+                conn.request('POST', path, body=json.dumps(body),
+                             headers={'X-Principal': json.dumps(principal), 'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - begun)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0
+    return len(latencies) / elapsed, pct(0.50), pct(0.99), errors[0]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=24)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--workers', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'endpoint':<32} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for tuning in ('false', 'true'):
+        database_url = f'sqlite:///{os.path.join(tempfile.mkdtemp(), "bench.db")}'
+        drafts, submitted = seed(database_url, args.clients, 5000, 2000)
+        port = free_port()
+        env = dict(os.environ, DATABASE_URL=database_url, PORT=str(port), SQLITE_TUNING=tuning,
+                   WEB_CONCURRENCY=str(args.workers), RESPONSE_CACHE_ENABLED='false',
+                   GUNICORN_ACCESS_LOG='', FLASK_ENV='production')
+        server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'run:app'],
+                                  cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+
+            def submit(client):
+                student_id = client + 1
+                if not drafts[student_id]:
+                    return None
+                return ('/student/assignments/submit', {'user_id': 100 + client, 'student_id': student_id},
+                        {'id': drafts[student_id].pop(), 'teacher_id': 1})
+
+            def grade(client):
+                return ('/principal/assignments/grade', {'user_id': 1, 'principal_id': 1},
+                        {'id': random.choice(submitted), 'grade': random.choice(GRADES)})
+
+            name = 'tuned' if tuning == 'true' else 'default'
+            for path, next_request in (('/student/assignments/submit', submit),
+                                       ('/principal/assignments/grade', grade)):
+                rps, p50, p99, errors = drive(port, args.clients, args.duration, next_request)
+                print(f"{name:<8} {path:<32} {rps:>8.0f} {p50:>8.1f} {p99:>8.1f} {errors:>7}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Time for a fresh worker process to import the app and build it.
+
+Each sample is a new interpreter, as a gunicorn worker without preload
+(or the master with it) starts: import `app`, then call create_app()
+against a database whose tables already exist. Modes:
+
+- create_all + alembic: tables checked on every boot and Flask-Migrate
+  imported, as before CREATE_ALL_ON_STARTUP existed
+- create_all: tables checked, Flask-Migrate left to the `flask` command
+- migrations only: CREATE_ALL_ON_STARTUP=false, the ProductionConfig default
+
+--rtt-ms adds that delay to every connection and statement, to stand in
+for a database on another host.
+
+    python -m benchmarks.bench_startup [--samples 20] [--rtt-ms 2] [--database-url postgresql://...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.bench_servers import ROOT
+
+MODES = {
+    'create_all + alembic': {'CREATE_ALL_ON_STARTUP': 'true', 'BENCH_IMPORT_MIGRATE': '1'},
+    'create_all': {'CREATE_ALL_ON_STARTUP': 'true'},
+    'migrations only': {'CREATE_ALL_ON_STARTUP': 'false'},
+}
+
+CHILD = """
+import json, os, resource, sys, time
+started = time.perf_counter()
+if os.environ.get('BENCH_IMPORT_MIGRATE'):
+    import flask_migrate
+import app
+imported = time.perf_counter()
+
+rtt = float(os.environ.get('BENCH_RTT_MS', 0)) / 1000
+if rtt:
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.pool import Pool
+    event.listen(Pool, 'connect', lambda *args: time.sleep(rtt))
+    event.listen(Engine, 'before_cursor_execute', lambda *args: time.sleep(rtt))
+
+statements = []
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+event.listen(Engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+app.create_app()
+built = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'factory': built - imported,
+    'statements': len(statements),
+    'modules': len(sys.modules),
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+def create_schema(database_url):
+    from sqlalchemy import create_engine
+    from app import db
+    import app.models  # noqa: F401 - registers the tables
+    engine = create_engine(database_url)
+    db.metadata.create_all(engine)
+    engine.dispose()
+
+def sample(database_url, mode_env, rtt_ms):
+    env = dict(os.environ, DATABASE_URL=database_url, FLASK_ENV='production', BENCH_RTT_MS=str(rtt_ms), **mode_env)
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process'] = time.perf_counter() - started
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--rtt-ms', type=float, default=0)
+    parser.add_argument('--database-url', help='Database with the tables already migrated; default a temporary SQLite file')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = f'sqlite:///{os.path.join(tempfile.mkdtemp(), "bench.db")}'
+        create_schema(database_url)
+
+    print(f"{'mode':<22} {'import ms':>10} {'factory ms':>11} {'process ms':>11} {'statements':>11} {'modules':>8} {'RSS MB':>7}")
+    for name, mode_env in MODES.items():
+        sample(database_url, mode_env, args.rtt_ms)  # Warm the OS file cache
+        results = [sample(database_url, mode_env, args.rtt_ms) for _ in range(args.samples)]
+
+        def median(key):
+            return statistics.median(result[key] for result in results)
+
+        print(f"{name:<22} {median('import') * 1000:>10.1f} {median('factory') * 1000:>11.1f} "
+              f"{median('process') * 1000:>11.1f} {median('statements'):>11.0f} {median('modules'):>8.0f} "
+              f"{median('rss_mb'):>7.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+"""Synthetic school data for the benchmarks.
+
+Creates teachers, students and assignments with a configurable state and
+grade mix using batched executemany inserts, then fills grade_stats to
+match, so every endpoint sees a consistent database. Indexes on
+assignments are built after the load. Runs without an app: only the
+models' tables and a plain engine are used.
+
+snapshot() keeps generated SQLite files around, so tests and benchmarks
+that need the same sizes only pay for the load once.
+
+    python -m benchmarks.datagen sqlite:///bench.db --size large
+    python -m benchmarks.datagen sqlite:///bench.db --teachers 500 --students 50000 \\
+        --assignments 5000000 --states DRAFT=0.2,SUBMITTED=0.3,GRADED=0.5 --grades A=0.3,B=0.3,C=0.2,D=0.15,F=0.05
+"""
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+# (teachers, students, assignments)
+SIZES = {
+    'small': (20, 1000, 20000),
+    'medium': (100, 10000, 500000),
+    'large': (500, 50000, 5000000),
+}
+SNAPSHOT_DIR = os.path.join(tempfile.gettempdir(), 'assignment-snapshots')
+STATES = {'DRAFT': 0.2, 'SUBMITTED': 0.3, 'GRADED': 0.5}
+GRADES = {'A': 0.3, 'B': 0.3, 'C': 0.2, 'D': 0.15, 'F': 0.05}
+
+# Assignments are spread over one school year
+TERM_START = datetime(2024, 9, 1)
+TERM_SECONDS = 300 * 24 * 3600
+
+WORDS = ('essay analysis history photosynthesis theorem equation chapter evidence argument '
+         'experiment hypothesis conclusion poem novel climate economy democracy algebra').split()
+
+def parse_mix(text):
+    """'A=0.3,B=0.7' -> {'A': 0.3, 'B': 0.7}, normalised to sum to 1"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip().upper()] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(f"Mix {text!r} has no positive weights")
+    return {name: weight / total for name, weight in mix.items()}
+
+def _tables():
+    from app.models import Assignment, GradeStat, Student, Teacher
+    return Teacher.__table__, Student.__table__, Assignment.__table__, GradeStat.__table__
+
+def _contents(rng, count, size):
+    contents = []
+    for _ in range(count):
+        words, length = [], 0
+        while length < size:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        contents.append(' '.join(words)[:size].capitalize())
+    return contents
+
+def _fast_sqlite_load(engine):
+    """Skip fsync while loading; the file is rebuilt from scratch anyway"""
+    if engine.dialect.name == 'sqlite':
+        @event.listens_for(engine, 'connect')
+        def on_connect(dbapi_connection, record):
+            dbapi_connection.execute('PRAGMA synchronous=OFF')
+
+def _insert(engine, table, rows):
+    with engine.begin() as conn:
+        conn.execute(table.insert(), rows)
+
+def generate(database_url, teachers, students, assignments, states=None, grades=None,
+             content_bytes=200, seed=1, batch_size=10000, log=None):
+    """Fill a fresh database at `database_url`; returns the row counts by state"""
+    from app import db
+    states = states or STATES
+    grades = grades or GRADES
+    rng = random.Random(seed)
+    engine = create_engine(database_url)
+    _fast_sqlite_load(engine)
+    teacher_table, student_table, assignment_table, stat_table = _tables()
+    db.metadata.drop_all(engine)
+    db.metadata.create_all(engine)
+    # Building the indexes once at the end is much faster than updating them on every batch
+    for index in assignment_table.indexes:
+        index.drop(engine)
+
+    now = datetime.utcnow()
+    # Teachers use user ids from 1, students from 1_000_000
+    _insert(engine, teacher_table, [
+        {'user_id': n + 1, 'created_at': now, 'updated_at': now} for n in range(teachers)
+    ])
+    for start in range(0, students, batch_size):
+        _insert(engine, student_table, [
+            {'user_id': 1000000 + n + 1, 'created_at': now, 'updated_at': now}
+            for n in range(start, min(start + batch_size, students))
+        ])
+
+    from app.models.assignment_content import store
+    with engine.begin() as conn:
+        contents = store(conn, _contents(rng, 1000, content_bytes))  # Digests of the texts
+    state_names, state_weights = list(states), list(states.values())
+    grade_names, grade_weights = list(grades), list(grades.values())
+    by_state, grade_counts = Counter(), Counter()
+    started = time.monotonic()
+    for start in range(0, assignments, batch_size):
+        size = min(batch_size, assignments - start)
+        rows = []
+        for state in rng.choices(state_names, state_weights, k=size):
+            created_at = TERM_START + timedelta(seconds=rng.randrange(TERM_SECONDS))
+            teacher_id = rng.randint(1, teachers) if state != 'DRAFT' else None
+            grade = rng.choices(grade_names, grade_weights)[0] if state == 'GRADED' else None
+            if grade:
+                grade_counts[(teacher_id, grade)] += 1
+            rows.append({
+                'content_digest': rng.choice(contents),
+                'state': state,
+                'grade': grade,
+                'student_id': rng.randint(1, students),
+                'teacher_id': teacher_id,
+                'created_at': created_at,
+                'updated_at': created_at + timedelta(seconds=rng.randrange(7 * 24 * 3600)),
+            })
+            by_state[state] += 1
+        _insert(engine, assignment_table, rows)
+        if log:
+            done = start + size
+            log(f"{done:>10,} / {assignments:,} assignments ({done / (time.monotonic() - started):,.0f}/s)")
+
+    for index in assignment_table.indexes:
+        index.create(engine)
+    if grade_counts:
+        _insert(engine, stat_table, [
+            {'teacher_id': teacher_id, 'grade': grade, 'count': count}
+            for (teacher_id, grade), count in grade_counts.items()
+        ])
+    engine.dispose()
+    return dict(by_state)
+
+def fingerprint():
+    """Changes with the schema or this generator, so stale snapshots are not reused"""
+    from app import db
+    _tables()
+    digest = hashlib.sha1()
+    for table in db.metadata.sorted_tables:
+        digest.update(str(CreateTable(table)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index)).encode())
+    with open(__file__, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+def snapshot(teachers, students, assignments, seed=1, directory=SNAPSHOT_DIR, build=None):
+    """Path of a SQLite file generated with these sizes, built on first use.
+
+    Copy it before writing to it. `build(database_url)` replaces the call
+    to generate(), e.g. to run it in a child process.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'school-{teachers}-{students}-{assignments}-{seed}-{fingerprint()}.db')
+    if not os.path.exists(path):
+        # Concurrent builders (xdist workers) each write their own file; the last rename wins
+        partial = f'{path}.{os.getpid()}.tmp'
+        if build:
+            build(f'sqlite:///{partial}')
+        else:
+            generate(f'sqlite:///{partial}', teachers, students, assignments, seed=seed)
+        os.replace(partial, path)
+    return path
+
+def add_drafts(engine, student_ids, per_student):
+    """Insert `per_student` drafts for each student.
+
+    Returns {student_id: [assignment ids]} for benchmarks that use drafts up.
+    """
+    from app.models.assignment_content import store
+    _, _, assignment_table, _ = _tables()
+    with engine.begin() as conn:
+        last_id = conn.execute(select(func.max(assignment_table.c.id))).scalar() or 0
+        content_digest = store(conn, ['Benchmark draft'])[0]
+    now = datetime.utcnow()
+    _insert(engine, assignment_table, [
+        {'content_digest': content_digest, 'state': 'DRAFT', 'student_id': student_id, 'created_at': now, 'updated_at': now}
+        for student_id in student_ids for _ in range(per_student)
+    ])
+    drafts = {}
+    with engine.connect() as conn:
+        query = select(assignment_table.c.id, assignment_table.c.student_id).where(
+            assignment_table.c.id > last_id
+        ).order_by(assignment_table.c.id)
+        for assignment_id, student_id in conn.execute(query):
+            drafts.setdefault(student_id, []).append(assignment_id)
+    return drafts
+
+def counts(engine):
+    """(teachers, students, assignments) already in the database behind `engine`"""
+    teacher_table, student_table, assignment_table, _ = _tables()
+    with engine.connect() as conn:
+        return tuple(conn.execute(select(func.count()).select_from(table)).scalar()
+                     for table in (teacher_table, student_table, assignment_table))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database_url')
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--teachers', type=int)
+    parser.add_argument('--students', type=int)
+    parser.add_argument('--assignments', type=int)
+    parser.add_argument('--states', type=parse_mix, default=STATES, help='e.g. DRAFT=0.2,SUBMITTED=0.3,GRADED=0.5')
+    parser.add_argument('--grades', type=parse_mix, default=GRADES, help='e.g. A=0.3,B=0.3,C=0.2,D=0.15,F=0.05')
+    parser.add_argument('--content-bytes', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    teachers, students, assignments = SIZES[args.size]
+    started = time.monotonic()
+    by_state = generate(
+        args.database_url,
+        args.teachers or teachers, args.students or students, args.assignments or assignments,
+        states=args.states, grades=args.grades, content_bytes=args.content_bytes, seed=args.seed,
+        log=lambda line: print(line, file=sys.stderr, end='\r')
+    )
+    print(file=sys.stderr)
+    print(f"Generated {sum(by_state.values()):,} assignments {dict(by_state)} in {time.monotonic() - started:.0f} s")
+
+if __name__ == '__main__':
+    main()
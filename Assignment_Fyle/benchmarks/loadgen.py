@@ -0,0 +1,360 @@
+"""Mixed term-end traffic against the API, with latency over time.
+
+Runs `--users` virtual users at once, each playing a role drawn from `--mix`:
+
+- students create a draft, edit it, submit it to a teacher and list their work
+- teachers list what waits for them and grade it
+- principals list submitted work, regrade it and run the reports
+
+Every response is checked against the assignment lifecycle: an edited
+draft stays a draft, a submission is SUBMITTED to the chosen teacher, a
+grade leaves the assignment GRADED with that grade, lists only hold what
+the role may see, and editing a submitted assignment is refused. Broken
+rules are reported as violations, apart from HTTP errors, and make the
+run exit with status 1.
+
+Without --url, a dataset is generated and gunicorn started on it; with
+--url, --database-url must point at the server's database so that users
+act as students and teachers that exist.
+
+    python -m benchmarks.loadgen [--users 50] [--duration 60] [--mix student=0.7,teacher=0.25,principal=0.05]
+    python -m benchmarks.loadgen --url http://127.0.0.1:5000 --database-url postgresql://... --csv load.csv
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+from benchmarks.bench_endpoints import PRINCIPAL, generate_database, percentile, start_gunicorn, student, teacher
+
+ROLES = ('student', 'teacher', 'principal')
+MIX = {'student': 0.7, 'teacher': 0.25, 'principal': 0.05}
+GRADES = 'ABCDF'
+REPORTS = ('grade-distribution', 'top-a-graders')
+
+def parse_mix(text):
+    """'student=0.7,teacher=0.3' -> weights per role"""
+    mix = {}
+    for part in text.split(','):
+        role, _, weight = part.partition('=')
+        role = role.strip().lower()
+        if role not in ROLES:
+            raise argparse.ArgumentTypeError(f"Unknown role {role!r}, expected one of {', '.join(ROLES)}")
+        mix[role] = float(weight)
+    return mix
+
+def assign_roles(mix, users):
+    """Split `users` between the roles in proportion to `mix`, largest remainders first"""
+    total = sum(mix.values())
+    shares = {role: users * weight / total for role, weight in mix.items()}
+    counts = {role: int(share) for role, share in shares.items()}
+    for role in sorted(shares, key=lambda r: shares[r] - counts[r], reverse=True)[:users - sum(counts.values())]:
+        counts[role] += 1
+    return [role for role in ROLES for _ in range(counts.get(role, 0))]
+
+class Run:
+    """Samples and violations shared by every virtual user"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stop_at = None
+        self.samples = []  # (seconds since start, action, latency, status)
+        self.violations = []
+        self._lock = threading.Lock()
+
+    def add_samples(self, samples):
+        with self._lock:
+            self.samples.extend(samples)
+
+    def violation(self, action, message):
+        with self._lock:
+            self.violations.append((round(time.monotonic() - self.started, 1), action, message))
+
+class User(threading.Thread):
+    """One virtual user looping over its role's session until the run ends"""
+
+    def __init__(self, run, role, host, port, teachers, students, think, seed, delay):
+        super().__init__(daemon=True)
+        self.run_state = run
+        self.role = role
+        self.host, self.port = host, port
+        self.teachers, self.students = teachers, students
+        self.think = think
+        self.rng = random.Random(seed)
+        self.delay = delay
+        self.samples = []
+        self.conn = None
+
+    def running(self):
+        return time.monotonic() < self.run_state.stop_at
+
+    def pause(self):
+        if self.think:
+            time.sleep(min(self.rng.expovariate(1 / self.think), self.think * 5))
+
+    def call(self, action, method, path, principal, body=None):
+        """Send one request; returns (status, parsed JSON or None)"""
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=120)
+        headers = {'X-Principal': json.dumps(principal)}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(body)
+        begun = time.monotonic()
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            status, data = 0, b''  # 0: connection failed
+        self.samples.append((begun - self.run_state.started, action, time.monotonic() - begun, status))
+        try:
+            return status, json.loads(data) if data else None
+        except ValueError:
+            return status, None
+
+    def check(self, action, condition, message):
+        if not condition:
+            self.run_state.violation(action, message)
+        return condition
+
+    def expect(self, action, status, wanted, payload):
+        """Record a violation for an unexpected 4xx; 5xx and failed connections are errors, not violations"""
+        if status == wanted:
+            return True
+        if 400 <= status < 500:
+            error = payload.get('error') if isinstance(payload, dict) else payload
+            self.run_state.violation(action, f"expected {wanted}, got {status}: {error}")
+        return False
+
+    def run(self):
+        time.sleep(self.delay)
+        session = getattr(self, f'{self.role}_session')
+        while self.running():
+            session()
+        self.run_state.add_samples(self.samples)
+
+    def student_session(self):
+        student_id = self.rng.randint(1, self.students)
+        me = student(student_id)
+
+        status, body = self.call('student create', 'POST', '/student/assignments', me,
+                                 {'content': f'Term paper {self.rng.random():.6f}'})
+        if not self.expect('student create', status, 200, body):
+            return
+        draft = body['data']
+        self.check('student create', draft['state'] == 'DRAFT' and draft['student_id'] == student_id,
+                   f"new assignment {draft['id']} is {draft['state']} for student {draft['student_id']}")
+        self.pause()
+
+        content = f'Term paper, revised {self.rng.random():.6f}'
+        status, body = self.call('student edit', 'POST', '/student/assignments', me,
+                                 {'id': draft['id'], 'content': content})
+        if self.expect('student edit', status, 200, body):
+            edited = body['data']
+            self.check('student edit', edited['state'] == 'DRAFT' and edited['content'] == content,
+                       f"edited draft {draft['id']} is {edited['state']} with content {edited['content']!r}")
+        self.pause()
+
+        teacher_id = self.rng.randint(1, self.teachers)
+        status, body = self.call('student submit', 'POST', '/student/assignments/submit', me,
+                                 {'id': draft['id'], 'teacher_id': teacher_id})
+        if not self.expect('student submit', status, 200, body):
+            return
+        submitted = body['data']
+        self.check('student submit', submitted['state'] == 'SUBMITTED' and submitted['teacher_id'] == teacher_id,
+                   f"submitted {draft['id']} is {submitted['state']} for teacher {submitted['teacher_id']}")
+        self.pause()
+
+        # Edits after submission must be refused
+        status, body = self.call('student late edit', 'POST', '/student/assignments', me,
+                                 {'id': draft['id'], 'content': 'Too late'})
+        if status < 500 and status != 0:
+            self.check('student late edit', status == 400, f"editing submitted {draft['id']} returned {status}")
+        self.pause()
+
+        status, body = self.call('student list', 'GET', '/student/assignments?limit=20', me)
+        if self.expect('student list', status, 200, body):
+            strangers = [row['id'] for row in body['data'] if row['student_id'] != student_id]
+            self.check('student list', not strangers, f"student {student_id} sees assignments {strangers}")
+        self.pause()
+
+    def teacher_session(self):
+        teacher_id = self.rng.randint(1, self.teachers)
+        me = teacher(teacher_id)
+
+        status, body = self.call('teacher list', 'GET', '/teacher/assignments?limit=20', me)
+        if not self.expect('teacher list', status, 200, body):
+            return
+        rows = body['data']
+        wrong = [row['id'] for row in rows if row['state'] != 'SUBMITTED' or row['teacher_id'] != teacher_id]
+        self.check('teacher list', not wrong, f"teacher {teacher_id} is offered {wrong}")
+        self.pause()
+
+        for row in self.rng.sample(rows, min(3, len(rows))):
+            grade = self.rng.choice(GRADES)
+            status, body = self.call('teacher grade', 'POST', '/teacher/assignments/grade', me,
+                                     {'id': row['id'], 'grade': grade})
+            if self.expect('teacher grade', status, 200, body):
+                graded = body['data']
+                self.check('teacher grade', graded['state'] == 'GRADED' and graded['grade'] == grade,
+                           f"graded {row['id']} is {graded['state']} with grade {graded['grade']}")
+            self.pause()
+            if not self.running():
+                return
+
+    def principal_session(self):
+        status, body = self.call('principal list', 'GET', '/principal/assignments?limit=50', PRINCIPAL)
+        if not self.expect('principal list', status, 200, body):
+            return
+        rows = body['data']
+        wrong = [row['id'] for row in rows if row['state'] not in ('SUBMITTED', 'GRADED')]
+        self.check('principal list', not wrong, f"principal list shows unsubmitted {wrong}")
+        self.pause()
+
+        graded = [row for row in rows if row['state'] == 'GRADED']
+        if graded:
+            row = self.rng.choice(graded)
+            grade = self.rng.choice(GRADES)
+            status, body = self.call('principal regrade', 'POST', '/principal/assignments/grade', PRINCIPAL,
+                                     {'id': row['id'], 'grade': grade})
+            if self.expect('principal regrade', status, 200, body):
+                self.check('principal regrade', body['data']['grade'] == grade,
+                           f"regraded {row['id']} has grade {body['data']['grade']}, not {grade}")
+            self.pause()
+
+        report = self.rng.choice(REPORTS)
+        status, body = self.call('principal report', 'GET', f'/principal/reports/{report}', PRINCIPAL)
+        self.expect('principal report', status, 200, body)
+        self.pause()
+
+def summarize(samples):
+    latencies = sorted(latency for _, _, latency, _ in samples)
+    failed = sum(1 for _, _, _, status in samples if status == 0 or status >= 500)
+    return {
+        'count': len(samples),
+        'failed': failed,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] * 1000 if latencies else 0,
+    }
+
+def report(run, interval, duration, csv_path=None):
+    """Print latency per interval and per action; optionally write both to CSV"""
+    buckets = {}
+    for sample in run.samples:
+        buckets.setdefault(int(sample[0] // interval), []).append(sample)
+
+    print(f"\n{'time s':>9} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'5xx/err':>8}")
+    for index in range(int(duration // interval) + 1):
+        samples = buckets.get(index, [])
+        if not samples:
+            continue
+        stats = summarize(samples)
+        label = f"{index * interval:.0f}-{(index + 1) * interval:.0f}"
+        print(f"{label:>9} {stats['count'] / interval:>7.1f} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+              f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} {stats['failed']:>8}")
+
+    actions = {}
+    for sample in run.samples:
+        actions.setdefault(sample[1], []).append(sample)
+    print(f"\n{'action':<18} {'count':>6} {'5xx/err':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for action in sorted(actions):
+        stats = summarize(actions[action])
+        print(f"{action:<18} {stats['count']:>6} {stats['failed']:>8} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+              f"{stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+
+    statuses = {}
+    for _, _, _, status in run.samples:
+        statuses[status] = statuses.get(status, 0) + 1
+    codes = ', '.join(f"{status or 'no response'}: {n}" for status, n in sorted(statuses.items()))
+    print(f"\nStatus codes: {codes}")
+
+    if csv_path:
+        with open(csv_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['interval_start_s', 'action', 'count', 'failed', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+            for index, samples in sorted(buckets.items()):
+                by_action = {}
+                for sample in samples:
+                    by_action.setdefault(sample[1], []).append(sample)
+                for action, action_samples in sorted(by_action.items()):
+                    stats = summarize(action_samples)
+                    writer.writerow([index * interval, action, stats['count'], stats['failed']] +
+                                    [round(stats[key], 2) for key in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')])
+        print(f"Wrote {csv_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='server to load; by default gunicorn is started on a generated dataset')
+    parser.add_argument('--database-url', help="the server's database, read for teacher and student ids")
+    parser.add_argument('--size', default='small', help='dataset size for benchmarks.datagen (small, medium, large)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn workers when no --url is given')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--mix', type=parse_mix, default=MIX, help='e.g. student=0.7,teacher=0.25,principal=0.05')
+    parser.add_argument('--duration', type=float, default=60, help='seconds')
+    parser.add_argument('--ramp-up', type=float, default=5, help='seconds over which users start')
+    parser.add_argument('--think-ms', type=float, default=200, help='mean pause between a user\'s requests')
+    parser.add_argument('--interval', type=float, default=5, help='seconds per row of the latency report')
+    parser.add_argument('--csv', help='also write latency per interval and action to this file')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    if args.url and not args.database_url:
+        parser.error('--url needs --database-url')
+
+    database_url = args.database_url or generate_database(args.size)
+    from sqlalchemy import create_engine
+    from benchmarks.datagen import counts
+    engine = create_engine(database_url)
+    teachers, students, assignments = counts(engine)
+    engine.dispose()
+
+    server = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        os.environ['DATABASE_URL'] = database_url
+        server, port = start_gunicorn(args.workers, FLASK_ENV='production')
+        host = '127.0.0.1'
+
+    roles = assign_roles(args.mix, args.users)
+    print(f"{teachers} teachers, {students} students, {assignments} assignments; "
+          f"{', '.join(f'{roles.count(r)} {r}s' for r in ROLES if r in roles)} for {args.duration:.0f} s")
+
+    run = Run()
+    run.stop_at = run.started + args.duration
+    users = [
+        User(run, role, host, port, teachers, students, args.think_ms / 1000, args.seed + n,
+             args.ramp_up * n / max(len(roles), 1))
+        for n, role in enumerate(roles)
+    ]
+    try:
+        for user in users:
+            user.start()
+        for user in users:
+            user.join()
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    report(run, args.interval, args.duration, args.csv)
+    if run.violations:
+        print(f"\n{len(run.violations)} lifecycle violation(s):")
+        for at, action, message in run.violations[:20]:
+            print(f"  {at:>7.1f}s {action}: {message}")
+        sys.exit(1)
+    print("\nNo lifecycle violations")
+
+if __name__ == '__main__':
+    main()
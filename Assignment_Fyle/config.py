@@ -3,14 +3,76 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _pool_options(size, overflow, timeout, recycle):
+    """Queue pool settings, each overridable from the environment"""
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', size)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', overflow)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', timeout)),  # Seconds to wait for a free connection
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', recycle)),  # Seconds, keep below the server's idle timeout
+        'pool_pre_ping': True,  # Replace connections the server dropped instead of failing the request
+    }
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///app.db')
+    SQLALCHEMY_REPLICA_URI = os.getenv('DATABASE_REPLICA_URL')  # Read replica for GET requests, optional
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-key-123')
+    # Run db.create_all() in create_app; off in production, where `flask db upgrade` owns the schema
+    CREATE_ALL_ON_STARTUP = os.getenv('CREATE_ALL_ON_STARTUP', 'true').lower() == 'true'
+    FAST_JSON = os.getenv('FAST_JSON', 'true').lower() == 'true'  # Use orjson when installed
+    # Assignment texts of at least this many bytes are stored compressed (see app.database.compression)
+    CONTENT_COMPRESSION_MIN_BYTES = int(os.getenv('CONTENT_COMPRESSION_MIN_BYTES', 1024))
+    CONTENT_CODEC = os.getenv('CONTENT_CODEC', 'zstd')  # zstd (zlib when zstandard is missing) or zlib
+    REPORT_CACHE_TTL = int(os.getenv('REPORT_CACHE_TTL', 30))  # Seconds
+    # Off by default: with the local backend each worker only drops entries for its own writes,
+    # so turn it on with a shared backend or CACHE_INVALIDATION_URL when running several workers
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'false').lower() == 'true'
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))  # Seconds, bounds staleness from writes made elsewhere
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'local')  # local, sqlite or redis
+    CACHE_URL = os.getenv('CACHE_URL')  # File path for sqlite, redis://host:port/db for redis
+    CACHE_INVALIDATION_URL = os.getenv('CACHE_INVALIDATION_URL')  # Redis URL to broadcast invalidations between workers
+    # Pool options are dropped for SQLite, which does not use a queue pool (see app.database.pool)
+    SQLALCHEMY_ENGINE_OPTIONS = _pool_options(size=5, overflow=10, timeout=30, recycle=1800)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0))  # Postgres only, 0 disables
+    QUERY_COUNTER_ENABLED = os.getenv('QUERY_COUNTER_ENABLED', 'true').lower() == 'true'  # X-Query-Count, Server-Timing
+    N_PLUS_ONE_THRESHOLD = int(os.getenv('N_PLUS_ONE_THRESHOLD', 5))  # Log statements repeated this often in a request
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'  # Served at /metrics
+    METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')  # Shared by workers so /metrics covers all of them
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))  # Seconds between writes to that directory
+    # Opt-in SQLite performance profile: WAL, synchronous=NORMAL, mmap (see app.database.sqlite_profile)
+    SQLITE_TUNING = os.getenv('SQLITE_TUNING', 'false').lower() == 'true'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # Bytes
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    SQLALCHEMY_ENGINE_OPTIONS = _pool_options(size=2, overflow=3, timeout=10, recycle=1800)
+
+class ProductionConfig(Config):
+    DEBUG = False
+    # Sized per worker process: gunicorn threads plus headroom for bursts
+    SQLALCHEMY_ENGINE_OPTIONS = _pool_options(size=10, overflow=20, timeout=10, recycle=1800)
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+    CREATE_ALL_ON_STARTUP = os.getenv('CREATE_ALL_ON_STARTUP', 'false').lower() == 'true'
+
+# FLASK_ENV -> config class; anything else gets the base Config
+CONFIGS = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+}
+
+def config_for(env):
+    return CONFIGS.get(env, Config)
 
 class TestConfig:
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'  # Use in-memory database
+    # In-memory by default; each xdist worker gets its own copy of any other database (see tests/conftest.py)
+    SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///:memory:')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = 'test-key-123'
+    FAST_JSON = True
+    RESPONSE_CACHE_ENABLED = False  # Tests write rows directly, around the invalidation hooks
     PRESERVE_CONTEXT_ON_EXCEPTION = False  # Important for testing
@@ -0,0 +1,57 @@
+"""Production server settings: gunicorn -c gunicorn.conf.py run:app
+
+Every setting can be overridden from the environment. SIGHUP to the master
+restarts the workers gracefully: new ones start before the old ones stop,
+and in-flight requests get `graceful_timeout` seconds to finish. With
+preload on, the code itself is loaded in the master, so deploy new code
+with SIGUSR2 (start a new master) followed by SIGTERM to the old one.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# Views mostly wait on the database, so each worker runs a few threads;
+# the (2 x cores) + 1 worker count is gunicorn's own recommendation
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Import the app once in the master so workers fork with it already loaded
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Longer than the load balancer's idle timeout, so it closes connections first
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 75))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers now and then to bound slow memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None  # Empty to disable
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+# Workers write their metrics here so /metrics on any of them covers all
+os.environ.setdefault('METRICS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'assignment-metrics'))
+
+def on_starting(server):
+    """Forget the metrics of a previous run"""
+    from app.middleware.metrics import clear_directory
+    clear_directory(os.environ['METRICS_MULTIPROC_DIR'])
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the preloaded master"""
+    from app import db
+    app = server.app.wsgi()
+    with app.app_context():
+        db.engine.dispose()
+
+def worker_exit(server, worker):
+    """Save the exiting worker's last counts, which /metrics keeps reporting"""
+    app = getattr(worker, 'wsgi', None)
+    metrics = app and app.extensions.get('metrics')
+    if metrics:
+        metrics.flush()
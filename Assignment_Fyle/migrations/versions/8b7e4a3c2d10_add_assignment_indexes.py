@@ -0,0 +1,36 @@
+"""add composite indexes for assignment list and report queries
+
+Revision ID: 8b7e4a3c2d10
+Revises: 5f2c1d8e9a01
+Create Date: 2025-01-26 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b7e4a3c2d10'
+down_revision = '5f2c1d8e9a01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.create_index('ix_assignments_student_id_created_at',
+                              ['student_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_assignments_teacher_id_state_created_at',
+                              ['teacher_id', 'state', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_assignments_state_created_at',
+                              ['state', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_assignments_state_grade_teacher_id',
+                              ['state', 'grade', 'teacher_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.drop_index('ix_assignments_state_grade_teacher_id')
+        batch_op.drop_index('ix_assignments_state_created_at')
+        batch_op.drop_index('ix_assignments_teacher_id_state_created_at')
+        batch_op.drop_index('ix_assignments_student_id_created_at')
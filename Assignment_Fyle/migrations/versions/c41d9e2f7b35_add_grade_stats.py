@@ -0,0 +1,38 @@
+"""add grade_stats summary table
+
+Revision ID: c41d9e2f7b35
+Revises: 8b7e4a3c2d10
+Create Date: 2025-01-27 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d9e2f7b35'
+down_revision = '8b7e4a3c2d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'grade_stats',
+        sa.Column('teacher_id', sa.Integer(), nullable=False),
+        sa.Column('grade', sa.String(length=2), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['teacher_id'], ['teachers.id'], ),
+        sa.PrimaryKeyConstraint('teacher_id', 'grade')
+    )
+    # Backfill from the assignments graded so far
+    op.execute(
+        "INSERT INTO grade_stats (teacher_id, grade, count) "
+        "SELECT teacher_id, grade, COUNT(*) FROM assignments "
+        "WHERE state = 'GRADED' AND grade IS NOT NULL AND teacher_id IS NOT NULL "
+        "GROUP BY teacher_id, grade"
+    )
+
+
+def downgrade():
+    op.drop_table('grade_stats')
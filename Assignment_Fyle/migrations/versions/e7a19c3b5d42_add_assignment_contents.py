@@ -0,0 +1,110 @@
+"""move assignment content to the assignment_contents store
+
+Revision ID: e7a19c3b5d42
+Revises: c41d9e2f7b35
+Create Date: 2025-01-28 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+from app.database.compression import decode, digest, encode
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a19c3b5d42'
+down_revision = 'c41d9e2f7b35'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+assignments = sa.table(
+    'assignments',
+    sa.column('id', sa.Integer),
+    sa.column('content', sa.Text),
+    sa.column('content_digest', sa.LargeBinary),
+)
+contents = sa.table(
+    'assignment_contents',
+    sa.column('digest', sa.LargeBinary),
+    sa.column('body', sa.LargeBinary),
+)
+
+
+def insert_new_contents(conn, new_contents):
+    """Insert {digest: body}, skipping digests earlier batches stored"""
+    insert = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}.get(conn.dialect.name)
+    if insert is not None:
+        statement = insert(contents).on_conflict_do_nothing(index_elements=['digest'])
+    else:
+        existing = conn.execute(sa.select(contents.c.digest).where(contents.c.digest.in_(list(new_contents))))
+        for key, in existing:
+            new_contents.pop(bytes(key), None)
+        statement = contents.insert()
+    if new_contents:
+        conn.execute(statement, [{'digest': key, 'body': body} for key, body in new_contents.items()])
+
+
+def upgrade():
+    op.create_table(
+        'assignment_contents',
+        sa.Column('digest', sa.LargeBinary(length=32), nullable=False),
+        sa.Column('body', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('digest')
+    )
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_digest', sa.LargeBinary(length=32), nullable=True))
+
+    # Move the texts over in batches, storing each distinct one once. Only
+    # the batch is deduplicated in memory; the primary key does the rest.
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(assignments.c.id, assignments.c.content)
+            .where(assignments.c.id > last_id)
+            .order_by(assignments.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+        new_contents, updates = {}, []
+        for assignment_id, text in rows:
+            key = digest(text)
+            if key not in new_contents:
+                new_contents[key] = encode(text)
+            updates.append({'assignment_id': assignment_id, 'digest': key})
+        insert_new_contents(conn, new_contents)
+        conn.execute(
+            assignments.update()
+            .where(assignments.c.id == sa.bindparam('assignment_id'))
+            .values(content_digest=sa.bindparam('digest')),
+            updates
+        )
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.alter_column('content_digest', existing_type=sa.LargeBinary(length=32), nullable=False)
+        batch_op.create_foreign_key('fk_assignments_content_digest', 'assignment_contents',
+                                    ['content_digest'], ['digest'])
+        batch_op.create_index('ix_assignments_content_digest', ['content_digest'], unique=False)
+        batch_op.drop_column('content')
+
+
+def downgrade():
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content', sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    for key, body in conn.execute(sa.select(contents.c.digest, contents.c.body)):
+        conn.execute(
+            assignments.update().where(assignments.c.content_digest == key).values(content=decode(bytes(body)))
+        )
+
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.alter_column('content', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_index('ix_assignments_content_digest')
+        batch_op.drop_constraint('fk_assignments_content_digest', type_='foreignkey')
+        batch_op.drop_column('content_digest')
+    op.drop_table('assignment_contents')
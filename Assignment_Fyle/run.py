@@ -1,23 +1,10 @@
 import os
-from app import create_app, db  # Import db directly from app
-from dotenv import load_dotenv
+from app import create_app
 from flask import jsonify
 
-# Load environment variables
-load_dotenv()
-
-# Create the application instance
+# Config (including .env) and table creation are handled by create_app
 app = create_app()
 
-# Configure the app
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///app.db')
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-key-123')
-
-# Initialize database
-with app.app_context():
-    db.create_all()
-
 # Add root route
 @app.route('/')
 def index():
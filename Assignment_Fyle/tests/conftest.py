@@ -1,8 +1,63 @@
 import pytest
 from app import create_app, db
+from app.database.query_counter import recording
 from app.models import Student, Teacher, Assignment
+from benchmarks import datagen
+from config import TestConfig
 import json
+import os
+import shutil
 from contextlib import contextmanager
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'query_budget(n): fail if any request made by the test runs more than n SQL statements'
+    )
+    worker = os.environ.get('PYTEST_XDIST_WORKER')
+    if worker:
+        TestConfig.SQLALCHEMY_DATABASE_URI = worker_database(TestConfig.SQLALCHEMY_DATABASE_URI, worker)
+
+def worker_database(url, worker):
+    """URL of a database private to one xdist worker.
+
+    In-memory SQLite already is; a SQLite file gets a sibling per worker and
+    a Postgres database a copy named after the worker, created if missing.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            return url.render_as_string(hide_password=False)
+        root, ext = os.path.splitext(url.database)
+        return url.set(database=f'{root}-{worker}{ext}').render_as_string(hide_password=False)
+    if url.get_backend_name() != 'postgresql':
+        raise pytest.UsageError(f"Parallel runs support SQLite and Postgres, not {url.get_backend_name()}")
+
+    name = f'{url.database}_{worker}'
+    engine = create_engine(url.set(database='postgres'), isolation_level='AUTOCOMMIT')
+    with engine.connect() as conn:
+        exists = conn.execute(text('SELECT 1 FROM pg_database WHERE datname = :name'), {'name': name}).scalar()
+        if not exists:
+            conn.execute(text(f'CREATE DATABASE "{name}"'))
+    engine.dispose()
+    return url.set(database=name).render_as_string(hide_password=False)
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+
+    budget = marker.args[0]
+    with recording() as records:
+        outcome = yield
+    over = [record for record in records if record.count > budget]
+    if over and outcome.excinfo is None:
+        pytest.fail('Query budget of %d exceeded: %s' % (
+            budget, ', '.join(f'{r.method} {r.path} ran {r.count}' for r in over)
+        ), pytrace=False)
 
 class UniqueIdGenerator:
     def __init__(self, start=1000):
@@ -28,23 +83,56 @@ def app():
 def id_generator():
     return UniqueIdGenerator()
 
+def _own_transactions(connection):
+    """pysqlite begins and ends transactions by itself, which breaks SAVEPOINT;
+    let SQLAlchemy emit BEGIN on this connection instead. Returns the undo."""
+    dbapi_connection = connection.connection.dbapi_connection
+    isolation_level = dbapi_connection.isolation_level
+    dbapi_connection.isolation_level = None
+
+    def begin(conn):
+        conn.exec_driver_sql('BEGIN')
+
+    event.listen(connection, 'begin', begin)
+
+    def undo():
+        event.remove(connection, 'begin', begin)
+        dbapi_connection.isolation_level = isolation_level
+
+    return undo
+
 @pytest.fixture(scope='function')
 def db_session(app):
-    """Create a fresh database session for each test."""
+    """Run the test in a transaction that is rolled back afterwards.
+
+    db.session is bound to one connection inside a SAVEPOINT. Commits, from
+    the test or the views it calls, end the SAVEPOINT and a new one starts,
+    so after_commit hooks still fire but nothing outlives the test. Rows are
+    only visible on that connection, not to other engines or threads.
+    """
     with app.app_context():
-        # Clear all data before test
-        for table in reversed(db.metadata.sorted_tables):
-            db.session.execute(table.delete())
-        db.session.commit()
-        
-        yield db.session
-        
-        # Rollback any changes
-        db.session.rollback()
-        # Clear all data after test
-        for table in reversed(db.metadata.sorted_tables):
-            db.session.execute(table.delete())
-        db.session.commit()
+        connection = db.engine.connect()
+        undo = _own_transactions(connection) if connection.dialect.name == 'sqlite' else None
+        transaction = connection.begin()
+        savepoint = connection.begin_nested()
+        session = db.create_scoped_session(options={'bind': connection, 'binds': {}})
+
+        @event.listens_for(session(), 'after_transaction_end')
+        def restart_savepoint(session, ended):
+            nonlocal savepoint
+            if not savepoint.is_active:
+                savepoint = connection.begin_nested()
+
+        original, db.session = db.session, session
+        try:
+            yield session
+        finally:
+            db.session = original
+            session.remove()
+            transaction.rollback()
+            if undo:
+                undo()
+            connection.close()
 
 @pytest.fixture
 def test_data(db_session, id_generator):
@@ -65,6 +153,30 @@ def test_data(db_session, id_generator):
     
     return {'student': student, 'teacher': teacher, 'assignment': assignment}
 
+@pytest.fixture(scope='session')
+def school_snapshot(request):
+    """school_snapshot(teachers, students, assignments) -> path of a SQLite file
+    filled by benchmarks.datagen. Kept in the pytest cache, so it is only
+    generated again when the schema or the generator changes."""
+    cache = getattr(request.config, 'cache', None)  # None with -p no:cacheprovider
+    directory = str(cache.mkdir('snapshots')) if cache else datagen.SNAPSHOT_DIR
+
+    def snapshot(teachers, students, assignments):
+        return datagen.snapshot(teachers, students, assignments, directory=directory)
+
+    return snapshot
+
+@pytest.fixture
+def snapshot_app(school_snapshot, tmp_path, monkeypatch):
+    """snapshot_app(teachers, students, assignments) -> app over a private copy of that snapshot"""
+    def make(teachers, students, assignments):
+        path = tmp_path / 'school.db'
+        shutil.copyfile(school_snapshot(teachers, students, assignments), path)
+        monkeypatch.setattr(TestConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{path}')
+        return create_app(testing=True)
+
+    return make
+
 @pytest.fixture
 def client(app):
     return app.test_client()
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy.pool import NullPool
+
+pytest.importorskip('aiosqlite')
+
+from app import create_app, db
+from app.aio import create_asgi_app
+from app.aio.db import APP_ROOT, async_url
+from app.models import Assignment, Student, Teacher
+from config import Config
+
+STUDENT = {'X-Principal': '{"user_id": 1, "student_id": 1}'}
+TEACHER = {'X-Principal': '{"user_id": 2, "teacher_id": 1}'}
+PRINCIPAL = {'X-Principal': '{"user_id": 3, "principal_id": 1}'}
+
+@pytest.fixture(scope='module')
+def apps(tmp_path_factory):
+    """The Flask app and the async read app on one seeded SQLite file"""
+    url = f"sqlite:///{tmp_path_factory.mktemp('aio') / 'aio.db'}"
+    patch = pytest.MonkeyPatch()
+    patch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', url)
+    patch.setattr(Config, 'RESPONSE_CACHE_ENABLED', False)
+    flask_app = create_app()
+    patch.undo()
+
+    with flask_app.app_context():
+        db.session.add_all([Student(user_id=1), Teacher(user_id=2)])
+        db.session.flush()
+        start = datetime(2025, 1, 1)
+        db.session.add_all([
+            Assignment(content=f'Essay {i}', state=state, student_id=1,
+                       teacher_id=None if state == 'DRAFT' else 1,
+                       grade='A' if state == 'GRADED' else None,
+                       created_at=start + timedelta(minutes=i), updated_at=start + timedelta(minutes=i))
+            for i, state in enumerate(['DRAFT', 'SUBMITTED', 'SUBMITTED', 'GRADED', 'SUBMITTED'])
+        ])
+        db.session.commit()
+
+    yield flask_app, create_asgi_app(database_url=url, engine_options={'poolclass': NullPool})
+
+    with flask_app.app_context():
+        db.session.remove()
+
+def call(asgi_app, path, query='', headers=None, method='GET'):
+    """Run one request through the ASGI app and return (status, headers, body)"""
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+        'headers': [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    asyncio.run(asgi_app(scope, receive, send))
+    start, body = messages
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body['body']
+
+@pytest.mark.parametrize('path, headers, query', [
+    ('/student/assignments', STUDENT, ''),
+    ('/teacher/assignments', TEACHER, 'fields=id,state,grade'),
+    ('/principal/assignments', PRINCIPAL, 'limit=2'),
+])
+def test_matches_sync_views(apps, path, headers, query):
+    flask_app, asgi_app = apps
+    with flask_app.app_context():
+        expected = flask_app.test_client().get(f'{path}?{query}', headers=headers)
+
+    status, response_headers, body = call(asgi_app, path, query, headers)
+    assert status == 200
+    assert json.loads(body) == expected.get_json()
+    assert response_headers['ETag'] == expected.headers['ETag']
+    assert response_headers['Last-Modified'] == expected.headers['Last-Modified']
+
+def test_follows_cursor_to_last_page(apps):
+    _, asgi_app = apps
+    _, _, body = call(asgi_app, '/principal/assignments', 'limit=3', PRINCIPAL)
+    first = json.loads(body)
+    _, _, body = call(asgi_app, '/principal/assignments', f"limit=3&cursor={first['next_cursor']}", PRINCIPAL)
+    second = json.loads(body)
+
+    assert [a['id'] for a in first['data'] + second['data']] == [2, 3, 4, 5]
+    assert second['next_cursor'] is None
+
+def test_not_modified(apps):
+    _, asgi_app = apps
+    _, headers, _ = call(asgi_app, '/teacher/assignments', headers=TEACHER)
+    status, _, body = call(asgi_app, '/teacher/assignments', headers={**TEACHER, 'If-None-Match': headers['ETag']})
+    assert status == 304
+    assert body == b''
+
+@pytest.mark.parametrize('path, headers, query, status, message', [
+    ('/student/assignments', {}, '', 401, 'Missing authentication'),
+    ('/student/assignments', {'X-Principal': 'not json'}, '', 400, 'Invalid authentication format'),
+    ('/teacher/assignments', STUDENT, '', 403, 'Teacher ID not found in auth header'),
+    ('/principal/assignments', PRINCIPAL, 'limit=0', 400, 'Limit must be between 1 and 1000'),
+    ('/principal/assignments', PRINCIPAL, 'fields=secret', 400, None),
+    ('/principal/teachers', PRINCIPAL, '', 404, 'Not Found'),
+])
+def test_errors(apps, path, headers, query, status, message):
+    _, asgi_app = apps
+    response_status, _, body = call(asgi_app, path, query, headers)
+    assert response_status == status
+    if message:
+        assert json.loads(body) == {'error': message}
+
+def test_async_url():
+    assert str(async_url('postgresql://u:p@db:5432/school')) == 'postgresql+asyncpg://u:p@db:5432/school'
+    assert str(async_url('sqlite:///app.db')) == f'sqlite+aiosqlite:///{APP_ROOT}/app.db'
+    assert str(async_url('sqlite:////tmp/app.db')) == 'sqlite+aiosqlite:////tmp/app.db'
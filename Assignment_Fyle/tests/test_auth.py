@@ -0,0 +1,49 @@
+import pytest
+import json
+from app.middleware.auth import AuthPrincipal, parse_principal
+
+def test_parse_principal_roles():
+    assert parse_principal('{"user_id": 1, "student_id": 2}').role == 'student'
+    assert parse_principal('{"user_id": 1, "teacher_id": 2}').role == 'teacher'
+    assert parse_principal('{"user_id": 1, "principal_id": 2}').role == 'principal'
+    assert parse_principal('{"user_id": 1}').role is None
+
+def test_parse_principal_coerces_ids():
+    principal = parse_principal('{"user_id": "7", "student_id": "8"}')
+    assert principal.user_id == 7
+    assert principal.student_id == 8
+    assert principal.teacher_id is None
+
+def test_parse_principal_is_slotted():
+    principal = parse_principal('{"user_id": 1, "student_id": 1}')
+    assert isinstance(principal, AuthPrincipal)
+    with pytest.raises(AttributeError):
+        principal.extra = True
+
+@pytest.mark.parametrize('header', [
+    'not-json', '[1, 2]', '{"user_id": 1, "student_id": "abc"}',
+    '{"user_id": 1, "student_id": true}', '{"user_id": 1, "student_id": 1.7}', '{"user_id": 1, "student_id": [1]}',
+])
+def test_parse_principal_invalid(header):
+    with pytest.raises(ValueError):
+        parse_principal(header)
+
+def test_parse_principal_is_cached():
+    header = json.dumps({"user_id": 4242, "teacher_id": 4242})
+    parse_principal(header)
+    hits = parse_principal.cache_info().hits
+    assert parse_principal(header) is parse_principal(header)
+    assert parse_principal.cache_info().hits == hits + 2
+
+def test_role_decorators_reject_wrong_role(client, auth_headers):
+    assert client.get('/student/assignments', headers=auth_headers['teacher']).status_code == 400
+    assert client.get('/teacher/assignments', headers=auth_headers['student']).status_code == 403
+    assert client.get('/principal/assignments', headers=auth_headers['teacher']).status_code == 400
+
+def test_invalid_header_shape(client):
+    response = client.get('/teacher/assignments', headers={'X-Principal': '"just a string"'})
+    assert response.status_code == 400
+
+    response = client.get('/student/assignments', headers={'X-Principal': '{"user_id": 1, "student_id": true}'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid authentication format'
@@ -0,0 +1,247 @@
+import fnmatch
+import socketserver
+import threading
+import time
+import pytest
+from app.cache import CachedResponse, InvalidationBus, LocalBackend, RedisBackend, RespClient, SQLiteBackend
+from flask import Flask
+from app.middleware import response_cache
+from app.middleware.response_cache import ResponseCache
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough RESP for the cache backend and invalidation bus"""
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self._read_command()
+            if args is None:
+                break
+            name, args = args[0].upper(), args[1:]
+            with server.lock:
+                if name == b'SUBSCRIBE':
+                    server.subscribers.append(self)
+                    self._write(b'*3\r\n' + self._bulk(b'subscribe') + self._bulk(args[0]) + b':1\r\n')
+                    continue
+                self._write(self._dispatch(server, name, args))
+        with server.lock:
+            if self in server.subscribers:
+                server.subscribers.remove(self)
+
+    def _dispatch(self, server, name, args):
+        data = server.data
+        now = time.time()
+        for key in [k for k, (_, expires) in data.items() if expires and expires <= now]:
+            del data[key]
+        if name in (b'PING', b'SELECT'):
+            return b'+OK\r\n'
+        if name == b'GET':
+            value = data.get(args[0])
+            return self._bulk(value[0] if value else None)
+        if name == b'SET':
+            expires = now + int(args[3]) / 1000 if len(args) > 3 else None
+            data[args[0]] = (args[1], expires)
+            return b'+OK\r\n'
+        if name == b'SADD':
+            members, _ = data.setdefault(args[0], (set(), None))
+            before = len(members)
+            members.update(args[1:])
+            return b':%d\r\n' % (len(members) - before)
+        if name == b'SMEMBERS':
+            members = data.get(args[0], (set(), None))[0]
+            return b'*%d\r\n' % len(members) + b''.join(self._bulk(m) for m in members)
+        if name == b'DEL':
+            return b':%d\r\n' % sum(data.pop(key, None) is not None for key in args)
+        if name == b'PEXPIRE':
+            if args[0] not in data:
+                return b':0\r\n'
+            data[args[0]] = (data[args[0]][0], now + int(args[1]) / 1000)
+            return b':1\r\n'
+        if name == b'PTTL':
+            if args[0] not in data:
+                return b':-2\r\n'
+            expires = data[args[0]][1]
+            return b':%d\r\n' % (int((expires - now) * 1000) if expires else -1)
+        if name == b'SCAN':
+            # One pass over everything: cursor 0 back straight away
+            pattern = args[args.index(b'MATCH') + 1].decode() if b'MATCH' in args else '*'
+            keys = [key for key in data if fnmatch.fnmatchcase(key.decode(), pattern)]
+            return b'*2\r\n' + self._bulk(b'0') + b'*%d\r\n' % len(keys) + b''.join(self._bulk(k) for k in keys)
+        if name == b'PUBLISH':
+            message = b'*3\r\n' + self._bulk(b'message') + self._bulk(args[0]) + self._bulk(args[1])
+            for subscriber in server.subscribers:
+                subscriber._write(message)
+            return b':%d\r\n' % len(server.subscribers)
+        return b'-ERR unknown command\r\n'
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+    def _write(self, data):
+        self.wfile.write(data)
+        self.wfile.flush()
+
+def start_fake_redis():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.data = {}
+    server.subscribers = []
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, 'redis://127.0.0.1:%d/0' % server.server_address[1]
+
+def stop_fake_redis(server):
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def redis_url():
+    server, url = start_fake_redis()
+    yield url
+    stop_fake_redis(server)
+
+@pytest.fixture
+def stopped_redis_url():
+    """URL of a fake Redis that has been shut down, so every connection is refused"""
+    server, url = start_fake_redis()
+    stop_fake_redis(server)
+    yield url
+
+def entry(body, scope, ttl=60):
+    return CachedResponse(body, 'application/json', 'abc', None, scope, time.time() + ttl)
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    worker_a, worker_b = SQLiteBackend(path, 1024), SQLiteBackend(path, 1024)
+    worker_a.set('key', entry(b'{"data": []}', 'student:1'))
+
+    cached = worker_b.get('key')
+    assert cached.body == b'{"data": []}'
+    assert cached.etag == 'abc'
+
+    assert worker_b.invalidate({'student:1'}) == 1
+    assert worker_a.get('key') is None
+
+def test_sqlite_backend_evicts_least_recently_read(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'cache.db'), max_bytes=10)
+    backend.set('a', entry(b'1234', 'x'))
+    time.sleep(0.01)
+    backend.set('b', entry(b'1234', 'x'))
+    time.sleep(0.01)
+    backend.get('a')
+    backend.set('c', entry(b'1234', 'y'))
+
+    assert backend.get('b') is None
+    assert backend.get('a') is not None
+    assert backend.stats()['evictions'] == 1
+
+def test_sqlite_backend_expires_entries(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'cache.db'), 1024)
+    backend.set('a', entry(b'1', 'x', ttl=-1))
+    assert backend.get('a') is None
+
+def test_redis_backend_round_trip_and_invalidate(redis_url):
+    backend = RedisBackend(redis_url)
+    backend.set(('teacher.list', 'teacher:1', ()), entry(b'{"data": [1]}', 'teacher:1'))
+    backend.set(('teacher.list', 'teacher:2', ()), entry(b'{"data": [2]}', 'teacher:2'))
+
+    cached = RedisBackend(redis_url).get(('teacher.list', 'teacher:1', ()))
+    assert cached.body == b'{"data": [1]}'
+    assert cached.scope == 'teacher:1'
+
+    assert backend.invalidate({'teacher:1'}) == 1
+    assert backend.get(('teacher.list', 'teacher:1', ())) is None
+    assert backend.get(('teacher.list', 'teacher:2', ())) is not None
+
+def test_redis_backend_clear_keeps_other_keys(redis_url):
+    backend = RedisBackend(redis_url)
+    backend.set('key', entry(b'1', 'student:1', ttl=30))
+    backend.client.execute('SET', 'sessions:42', 'not ours')
+
+    scope_ttl = backend.client.execute('PTTL', 'rc:scope:student:1')
+    assert 0 < scope_ttl <= 30000
+
+    backend.clear()
+    assert backend.get('key') is None
+    assert backend.client.execute('PTTL', 'rc:scope:student:1') == -2
+    assert backend.client.execute('GET', 'sessions:42') == b'not ours'
+
+def test_resp_client_reconnects_after_failure(redis_url):
+    client = RespClient.from_url(redis_url)
+    assert client.execute('PING') == 'OK'
+    client._conn.close()
+    with pytest.raises(OSError):
+        client.execute('PING')
+    assert client.execute('PING') == 'OK'
+
+def test_invalidation_is_broadcast_to_other_workers(redis_url):
+    worker_a = ResponseCache(LocalBackend(1024), ttl=60, bus=InvalidationBus(redis_url))
+    worker_b = ResponseCache(LocalBackend(1024), ttl=60, bus=InvalidationBus(redis_url))
+    worker_a.set('key', entry(b'1', 'principal'))
+    worker_b.set('key', entry(b'1', 'principal'))
+    received = []
+    worker_b.on_invalidate(received.append)
+    worker_a.listen()
+    worker_b.listen()
+
+    worker_a.invalidate({'principal'})
+
+    deadline = time.time() + 2
+    while worker_b.backend.get('key') is not None and time.time() < deadline:
+        time.sleep(0.01)
+    assert worker_a.backend.get('key') is None
+    assert worker_b.backend.get('key') is None
+    assert worker_b.stats()['broadcasts_received'] == 1
+    assert worker_a.stats()['broadcasts_received'] == 0
+    assert received == [['principal']]
+    worker_a.bus.stop()
+    worker_b.bus.stop()
+
+def test_cache_outage_does_not_fail_requests(app, client, db_session, test_data, stopped_redis_url):
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    cache = ResponseCache(RedisBackend(stopped_redis_url), ttl=60, bus=InvalidationBus(stopped_redis_url))
+    original, app.extensions['response_cache'] = app.extensions['response_cache'], cache
+    headers = {'X-Principal': '{"user_id": 1, "student_id": %d}' % test_data['student'].id}
+    try:
+        created = client.post('/student/assignments', json={'content': 'Written during an outage'}, headers=headers)
+        listed = client.get('/student/assignments', headers=headers)
+        stats = client.get('/monitoring/cache').get_json()['data']
+    finally:
+        cache.bus.stop()
+        app.extensions['response_cache'] = original
+        app.config['RESPONSE_CACHE_ENABLED'] = False
+
+    assert created.status_code == 200
+    assert listed.status_code == 200
+    assert len(listed.get_json()['data']) == 2
+    assert stats['errors'] >= 3  # invalidate, publish, get, set
+
+def test_workers_subscribe_with_response_caching_off(redis_url):
+    app = Flask(__name__)
+    app.config.update(RESPONSE_CACHE_ENABLED=False, CACHE_INVALIDATION_URL=redis_url)
+    response_cache.init_app(app)
+    cache = app.extensions['response_cache']
+    received = []
+    cache.on_invalidate(received.append)
+    app.add_url_rule('/write', 'write', lambda: 'ok', methods=['POST'])
+
+    app.test_client().post('/write')  # Never reads the response cache
+    other = ResponseCache(LocalBackend(1024), ttl=60, bus=InvalidationBus(redis_url))
+    other.invalidate({'reports'})
+
+    deadline = time.time() + 2
+    while not received and time.time() < deadline:
+        time.sleep(0.01)
+    assert received == [['reports']]
+    cache.bus.stop()
@@ -0,0 +1,67 @@
+import os
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from app.database.compression import RAW, ZLIB, ZSTD, decode, encode
+from app.models import Assignment, AssignmentContent
+from app.models.assignment_content import upsert_statement
+from app.services.content_service import content_stats, prune_contents, unused_contents
+
+ESSAY = 'The causes of the First World War were many and tangled. ' * 100
+
+def stored_tags(db_session):
+    return sorted(bytes(body)[:1] for body, in db_session.execute(text('SELECT body FROM assignment_contents')))
+
+def test_encode_compresses_long_text_only():
+    assert encode('Short essay') == RAW + b'Short essay'
+    assert encode(ESSAY)[:1] == ZSTD and len(encode(ESSAY)) < len(ESSAY) // 10
+    assert encode(ESSAY, codec='zlib')[:1] == ZLIB
+    assert encode(ESSAY, min_bytes=len(ESSAY) + 1)[:1] == RAW
+    noise = os.urandom(2000).hex()[:2000]
+    assert len(encode(noise)) <= len(noise) + 1  # Kept raw unless compression helps
+    for value in ('Short essay', ESSAY, noise, 'Ünïcode ✓'):
+        assert decode(encode(value)) == value
+        assert decode(encode(value, codec='zlib')) == value
+
+def test_identical_texts_are_stored_once(db_session, test_data):
+    student_id = test_data['student'].id
+    db_session.add_all([Assignment(content=ESSAY, student_id=student_id) for _ in range(3)])
+    db_session.add(Assignment(content='Another essay', student_id=student_id))
+    db_session.commit()
+
+    assert AssignmentContent.query.count() == 3  # Including test_data's
+    assert stored_tags(db_session) == [RAW, RAW, ZSTD]
+    db_session.expire_all()
+    assert {a.content for a in Assignment.query} == {'Test Assignment', ESSAY, 'Another essay'}
+
+def test_bulk_create_shares_stored_texts(client, db_session, test_data):
+    headers = {'X-Principal': f'{{"user_id": 1, "student_id": {test_data["student"].id}}}'}
+    response = client.post('/student/assignments/bulk', headers=headers,
+                           json={'assignments': [{'content': ESSAY}, {'content': ESSAY}, {'content': 'Test Assignment'}]})
+    assert response.status_code == 200
+
+    assert AssignmentContent.query.count() == 2
+    rows = client.get('/student/assignments?fields=content', headers=headers).get_json()['data']
+    assert sorted(a['content'] for a in rows) == sorted([ESSAY, ESSAY, 'Test Assignment', 'Test Assignment'])
+
+def test_edits_leave_texts_for_prune(db_session, test_data):
+    assignment = test_data['assignment']
+    assignment.set_content(ESSAY)
+    db_session.commit()
+    db_session.expire_all()
+    assert assignment.content == ESSAY
+    assert content_stats()[:1] == (2,)
+
+    assert prune_contents() == 1
+    db_session.commit()
+    assert [c.body for c in AssignmentContent.query] == [ESSAY]
+
+def test_prune_skips_texts_writers_are_using():
+    # On PostgreSQL a writer reusing a text locks its row, and prune skips locked rows
+    dialect = postgresql.dialect()
+    assert 'ON CONFLICT (digest) DO UPDATE' in str(upsert_statement(dialect).compile(dialect=dialect))
+    assert 'FOR UPDATE SKIP LOCKED' in str(unused_contents().compile(dialect=dialect))
+
+def test_content_setter_rejects_non_strings(test_data):
+    with pytest.raises(ValueError):
+        test_data['assignment'].content = 123
@@ -0,0 +1,43 @@
+import sqlite3
+from app import db
+from app.models import Assignment, Student
+
+PRINCIPAL = {'X-Principal': '{"user_id": 5, "principal_id": 1}'}
+LEFTOVER_USER_ID = 424242
+
+def test_commits_stay_inside_the_test(client, db_session, test_data):
+    db_session.add(Student(user_id=LEFTOVER_USER_ID))
+    db_session.commit()
+    response = client.post('/principal/assignments/grade', json={'id': test_data['assignment'].id, 'grade': 'A'},
+                           headers=PRINCIPAL)
+    assert response.status_code == 200
+
+    connection = db_session.get_bind()
+    assert connection.in_transaction() and connection.in_nested_transaction()
+    assert db_session.get(Assignment, test_data['assignment'].id).grade == 'A'
+
+    # A rollback only goes back to the last commit
+    db_session.add(Student(user_id=LEFTOVER_USER_ID + 1))
+    db_session.rollback()
+    assert Student.query.filter_by(user_id=LEFTOVER_USER_ID).count() == 1
+    assert Student.query.filter_by(user_id=LEFTOVER_USER_ID + 1).count() == 0
+
+def test_rows_of_earlier_tests_are_gone(db_session):
+    assert Student.query.filter_by(user_id=LEFTOVER_USER_ID).count() == 0
+    assert Assignment.query.count() == 0
+
+def test_snapshot_is_copied_for_each_test(snapshot_app, school_snapshot):
+    app = snapshot_app(5, 50, 2000)
+    with app.app_context():
+        submitted = Assignment.query.filter(Assignment.state != 'DRAFT').count()
+        response = app.test_client().get('/principal/assignments/export', headers=PRINCIPAL)
+        assert response.status_code == 200
+        assert len(response.get_data(as_text=True).splitlines()) == submitted
+
+        Assignment.query.delete()
+        db.session.commit()
+        db.session.remove()
+
+    conn = sqlite3.connect(school_snapshot(5, 50, 2000))
+    assert conn.execute('SELECT COUNT(*) FROM assignments').fetchone()[0] == 2000
+    conn.close()
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from app.middleware.metrics import RequestMetrics, render
+
+PRINCIPAL = {'X-Principal': '{"user_id": 5, "principal_id": 1}'}
+
+def sample(text, name, **labels):
+    """Value of the `name` series with exactly `labels`, 0 if absent"""
+    wanted = name + '{' + ','.join(f'{k}="{v}"' for k, v in labels.items()) + '}'
+    for line in text.splitlines():
+        series, _, value = line.rpartition(' ')
+        if series == wanted:
+            return float(value)
+    return 0
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    return response.get_data(as_text=True)
+
+def test_counts_requests_latency_and_db_time(client, db_session, test_data):
+    route = dict(blueprint='principal', endpoint='principal.list_assignments', method='GET')
+    before = scrape(client)
+    client.get('/principal/assignments', headers=PRINCIPAL)
+    client.get('/principal/assignments', headers=PRINCIPAL)
+    after = scrape(client)
+
+    assert sample(after, 'http_requests_total', **route, status=200) - sample(before, 'http_requests_total', **route, status=200) == 2
+    assert sample(after, 'http_request_duration_seconds_count', **route) - sample(before, 'http_request_duration_seconds_count', **route) == 2
+    assert sample(after, 'http_request_duration_seconds_bucket', **route, le='+Inf') == sample(after, 'http_request_duration_seconds_count', **route)
+    assert sample(after, 'http_request_db_seconds_sum', **route) > sample(before, 'http_request_db_seconds_sum', **route)
+    assert sample(after, 'http_request_queries_total', **route) > sample(before, 'http_request_queries_total', **route)
+    # The scrape itself is the one request in flight
+    assert sample(after, 'http_requests_in_flight', blueprint='monitoring', endpoint='monitoring.prometheus_metrics') == 1
+    assert sample(after, 'http_requests_in_flight', blueprint='principal', endpoint='principal.list_assignments') == 0
+
+def test_counts_exceptions_by_type(client, db_session, test_data):
+    route = dict(blueprint='principal', endpoint='principal.grade_assignment_route')
+    before = scrape(client)
+    client.post('/principal/assignments/grade', json={'id': test_data['assignment'].id, 'grade': 'X'},
+                headers=PRINCIPAL)
+    client.post('/principal/assignments/grade', json={'id': 999, 'grade': 'A'}, headers=PRINCIPAL)
+    after = scrape(client)
+
+    def delta(name, **labels):
+        return sample(after, name, **labels) - sample(before, name, **labels)
+
+    assert delta('http_request_exceptions_total', **route, exception='GradingError') == 1
+    assert delta('http_request_exceptions_total', **route, exception='NotFound') == 1
+    assert delta('http_requests_total', **route, method='POST', status=400) == 1
+    assert delta('http_requests_total', **route, method='POST', status=404) == 1
+
+def test_keeps_counts_of_finished_threads():
+    metrics = RequestMetrics()
+
+    def work():
+        for _ in range(100):
+            metrics.shard().count('requests', ('student', 'student.list_assignments', 'GET', '200'))
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics.shard()  # A new thread's shard folds the finished ones
+
+    assert metrics.snapshot()['requests'] == {('student', 'student.list_assignments', 'GET', '200'): 400}
+    assert len(metrics._shards) == 1
+
+def test_collects_other_workers(tmp_path):
+    exited = subprocess.Popen([sys.executable, '-c', 'pass'])
+    exited.wait()
+    key = ['teacher', 'teacher.grade_assignment', 'POST']
+    for pid in (exited.pid, os.getppid()):
+        (tmp_path / f'worker-{pid}.json').write_text(json.dumps({
+            'requests': [[key + ['200'], 5]],
+            'in_flight': [[key[:2], 1]],
+            'latency': [[key, [5] + [0] * 11 + [0.01, 5]]],
+        }))
+
+    metrics = RequestMetrics(str(tmp_path))
+    shard = metrics.shard()
+    shard.count('requests', tuple(key + ['200']))
+    shard.observe('latency', tuple(key), 0.2)
+    totals = metrics.collect()
+
+    assert totals['requests'][tuple(key + ['200'])] == 11
+    assert totals['in_flight'][tuple(key[:2])] == 1  # Only the live worker's
+    assert totals['latency'][tuple(key)][-1] == 11
+
+    text = render(totals)
+    labels = 'blueprint="teacher",endpoint="teacher.grade_assignment",method="POST"'
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.005"}} 10' in text
+    assert f'http_request_duration_seconds_bucket{{{labels},le="0.25"}} 11' in text
+
+    metrics.flush()
+    assert (tmp_path / f'worker-{os.getpid()}.json').exists()
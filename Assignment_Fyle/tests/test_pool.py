@@ -0,0 +1,78 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, exc, text
+from sqlalchemy.pool import QueuePool
+from app.database.pool import engine_options, instrument
+from config import Config, DevelopmentConfig, ProductionConfig, config_for
+
+def test_engine_options_drop_queue_pool_settings_for_sqlite():
+    options = engine_options('sqlite:///app.db', ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS)
+    assert options == {'pool_recycle': 1800, 'pool_pre_ping': True}
+
+    options = engine_options('sqlite:///app.db', {'poolclass': QueuePool, 'pool_size': 1})
+    assert options['pool_size'] == 1
+
+def test_engine_options_statement_timeout_for_postgres():
+    options = engine_options('postgresql://db/school', {'pool_size': 10}, statement_timeout_ms=30000)
+    assert options['pool_size'] == 10
+    assert options['connect_args'] == {'options': '-c statement_timeout=30000'}
+
+    options = engine_options('postgresql+asyncpg://db/school', {}, statement_timeout_ms=5000)
+    assert options['connect_args'] == {'server_settings': {'statement_timeout': '5000'}}
+
+    assert 'connect_args' not in engine_options('sqlite:///app.db', {}, statement_timeout_ms=5000)
+
+def test_config_for_environment():
+    assert config_for('production') is ProductionConfig
+    assert config_for('development') is DevelopmentConfig
+    assert config_for(None) is Config
+    assert ProductionConfig.SQLALCHEMY_ENGINE_OPTIONS['pool_size'] > DevelopmentConfig.SQLALCHEMY_ENGINE_OPTIONS['pool_size']
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.2)
+    yield engine
+    engine.dispose()
+
+def test_records_checkout_wait_and_exhaustion(engine):
+    metrics = instrument(engine)
+    held = engine.connect()
+    release = threading.Timer(0.05, held.close)
+    release.start()
+    with engine.connect() as conn:  # Waits for the held connection
+        conn.execute(text('SELECT 1'))
+    release.join()
+
+    stats = metrics.stats()
+    assert stats['checkouts'] == 2
+    assert stats['exhausted'] == 1
+    assert stats['wait_seconds']['max'] >= 0.04
+    assert stats['size'] == 1
+    assert stats['checked_out'] == 0
+
+def test_records_timeouts(engine):
+    metrics = instrument(engine)
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert metrics.stats()['timeouts'] == 1
+
+def test_records_connection_lifetime_across_dispose(engine):
+    metrics = instrument(engine)
+    engine.connect().close()
+    engine.dispose()
+    engine.connect().close()
+
+    stats = metrics.stats()
+    assert stats['connects'] == 2
+    assert stats['closes'] == 1
+    assert stats['connection_lifetime_seconds']['count'] == 1
+    assert stats['checkouts'] == 2
+
+def test_pool_stats_endpoint(client):
+    response = client.get('/monitoring/pool')
+    assert response.status_code == 200
+    stats = response.get_json()['data']
+    assert {'checkouts', 'exhausted', 'wait_seconds', 'connection_lifetime_seconds'} <= set(stats)
+    assert stats['connects'] >= 1  # Including the connection create_all opened at startup
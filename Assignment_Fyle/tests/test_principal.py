@@ -1,11 +1,13 @@
 import pytest
 import json
 from app.models.assignment import Assignment
+from app.services.report_service import get_registry
 
 @pytest.fixture
 def principal_auth_headers():
     return {'X-Principal': json.dumps({"user_id": 5, "principal_id": 1})}
 
+@pytest.mark.query_budget(1)
 def test_list_teachers(client, db_session, principal_auth_headers):
     response = client.get('/principal/teachers', headers=principal_auth_headers)
     assert response.status_code == 200
@@ -21,6 +23,7 @@ def test_list_teachers_invalid_auth(client):
     response = client.get('/principal/teachers', headers=headers)
     assert response.status_code == 400
 
+@pytest.mark.query_budget(2)
 def test_list_assignments(client, db_session, test_data, principal_auth_headers):
     response = client.get('/principal/assignments', headers=principal_auth_headers)
     assert response.status_code == 200
@@ -37,6 +40,7 @@ def test_list_assignments_invalid_auth(client):
     response = client.get('/principal/assignments', headers=headers)
     assert response.status_code == 400
 
+@pytest.mark.query_budget(4)
 def test_grade_assignment(client, db_session, test_data, principal_auth_headers):
     response = client.post('/principal/assignments/grade',
                          json={'id': test_data['assignment'].id, 'grade': 'A'},
@@ -125,3 +129,131 @@ def test_principal_authorization(client, db_session, auth_headers):
             json={'id': 1, 'grade': 'A'} if method == 'POST' else None
         )
         assert response.status_code in [400, 401, 403]
+
+def test_list_assignments_pagination(client, db_session, test_data, principal_auth_headers):
+    db_session.add_all([
+        Assignment(
+            content=f"Paged {i}",
+            state="SUBMITTED",
+            student_id=test_data['student'].id,
+            teacher_id=test_data['teacher'].id
+        ) for i in range(4)
+    ])
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        query = {'limit': 2}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/principal/assignments', query_string=query,
+                              headers=principal_auth_headers)
+        assert response.status_code == 200
+        body = response.get_json()
+        assert len(body['data']) <= 2
+        seen.extend(a['id'] for a in body['data'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert len(seen) == 5
+    assert len(set(seen)) == 5
+
+def test_list_assignments_invalid_cursor(client, db_session, principal_auth_headers):
+    response = client.get('/principal/assignments', query_string={'cursor': 'not-a-cursor'},
+                          headers=principal_auth_headers)
+    assert response.status_code == 400
+
+def test_list_assignments_invalid_limit(client, db_session, principal_auth_headers):
+    for limit in ['0', 'abc', '100000']:
+        response = client.get('/principal/assignments', query_string={'limit': limit},
+                              headers=principal_auth_headers)
+        assert response.status_code == 400
+
+def test_export_assignments(client, db_session, test_data, principal_auth_headers):
+    db_session.add_all([
+        Assignment(content="Graded", state="GRADED", grade="B",
+                   student_id=test_data['student'].id, teacher_id=test_data['teacher'].id),
+        Assignment(content="Draft", state="DRAFT", student_id=test_data['student'].id)
+    ])
+    db_session.commit()
+
+    response = client.get('/principal/assignments/export', headers=principal_auth_headers)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == 2
+    assert {row['state'] for row in rows} == {'SUBMITTED', 'GRADED'}
+
+def test_export_assignments_requires_principal(client, auth_headers):
+    response = client.get('/principal/assignments/export', headers=auth_headers['student'])
+    assert response.status_code == 400
+
+@pytest.mark.query_budget(5)
+def test_bulk_grade_assignments(client, db_session, test_data, principal_auth_headers):
+    assignment = test_data['assignment']
+    assignment.grade = 'B'
+    assignment.state = 'GRADED'
+    db_session.commit()
+
+    response = client.post('/principal/assignments/grade/bulk',
+                           json={'grades': [{'id': assignment.id, 'grade': 'A'}]},
+                           headers=principal_auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data'] == [{'id': assignment.id, 'grade': 'A', 'state': 'GRADED'}]
+
+def test_bulk_grade_requires_principal(client, db_session, auth_headers):
+    response = client.post('/principal/assignments/grade/bulk', json={'grades': []},
+                           headers=auth_headers['teacher'])
+    assert response.status_code == 400
+
+def test_grade_stats_endpoints(client, db_session, test_data, principal_auth_headers):
+    client.post('/principal/assignments/grade',
+                json={'id': test_data['assignment'].id, 'grade': 'A'},
+                headers=principal_auth_headers)
+
+    response = client.get('/principal/grade-stats/grades', headers=principal_auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data'] == [{'grade': 'A', 'assignment_count': 1}]
+
+    response = client.get('/principal/grade-stats/top-a-graders', headers=principal_auth_headers)
+    assert response.get_json()['data'] == [
+        {'teacher_id': test_data['teacher'].id, 'grade_a_count': 1}
+    ]
+
+def test_reports_cached_until_grade_commit(client, db_session, test_data, principal_auth_headers):
+    url = '/principal/reports/grade-distribution'
+    get_registry().invalidate()
+    assert client.get(url, headers=principal_auth_headers).get_json()['data'] == []
+
+    # Written around the grading service, so the cached result is still served
+    db_session.add(Assignment(content="Imported", state="GRADED", grade="B",
+                              student_id=test_data['student'].id, teacher_id=test_data['teacher'].id))
+    db_session.commit()
+    assert client.get(url, headers=principal_auth_headers).get_json()['data'] == []
+
+    # A committed grade invalidates the cache
+    client.post('/principal/assignments/grade',
+                json={'id': test_data['assignment'].id, 'grade': 'A'},
+                headers=principal_auth_headers)
+    assert client.get(url, headers=principal_auth_headers).get_json()['data'] == [
+        {'grade': 'A', 'assignment_count': 1},
+        {'grade': 'B', 'assignment_count': 1},
+    ]
+
+def test_top_a_graders_report(client, db_session, test_data, principal_auth_headers):
+    client.post('/principal/assignments/grade',
+                json={'id': test_data['assignment'].id, 'grade': 'A'},
+                headers=principal_auth_headers)
+
+    response = client.get('/principal/reports/top-a-graders', headers=principal_auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data'] == [
+        {'teacher_id': test_data['teacher'].id, 'grade_a_count': 1}
+    ]
+
+def test_unknown_report(client, principal_auth_headers):
+    response = client.get('/principal/reports/nope', headers=principal_auth_headers)
+    assert response.status_code == 404
@@ -0,0 +1,55 @@
+import logging
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from app import db
+from app.database.query_counter import recording
+from app.models import Assignment, Student
+
+@pytest.mark.query_budget(3)
+def test_list_reports_query_count_and_timing(client, db_session, test_data, auth_headers):
+    response = client.get('/principal/assignments', headers=auth_headers['principal'])
+    assert response.headers['X-Query-Count'] == '2'
+    assert response.headers['Server-Timing'].startswith('db;dur=')
+    assert response.headers['Server-Timing'].endswith('desc="2 queries"')
+
+def test_requests_without_queries_report_zero(client):
+    response = client.get('/principal/assignments')  # Rejected before touching the database
+    assert response.headers['X-Query-Count'] == '0'
+
+def test_recording_collects_each_request(client, db_session, test_data, auth_headers):
+    with recording() as records:
+        client.get('/principal/teachers', headers=auth_headers['principal'])
+        client.get('/principal/assignments', headers=auth_headers['principal'])
+
+    assert [(r.endpoint, r.count) for r in records] == [
+        ('principal.list_teachers', 1), ('principal.list_assignments', 2)
+    ]
+
+def test_repeated_statements_are_logged_as_n_plus_one(app, db_session, caplog):
+    students = [Student(user_id=5000 + i) for i in range(6)]
+    db_session.add_all(students)
+    db_session.commit()
+    db_session.add_all([Assignment(content='Essay', state='DRAFT', student_id=s.id) for s in students])
+    db_session.commit()
+    db_session.expire_all()
+
+    with caplog.at_level(logging.WARNING, logger='app.database.query_counter'):
+        with app.test_request_context('/students/assignment-counts'):
+            # Touching the lazy relationship runs one SELECT per student
+            counts = [len(student.assignments) for student in Student.query.all()]
+            response = app.process_response(app.response_class(str(counts)))
+
+    assert response.headers['X-Query-Count'] == '7'
+    assert 'Possible N+1 in GET /students/assignment-counts: statement ran 6 times' in caplog.text
+
+def test_failed_statements_leave_nothing_on_the_connection(app, db_session):
+    with app.test_request_context('/'), db.engine.connect() as connection:
+        for _ in range(3):
+            with pytest.raises(DBAPIError):
+                connection.execute(text('SELECT * FROM no_such_table'))
+        connection.execute(text('SELECT 1'))
+        response = app.process_response(app.response_class('ok'))
+
+        assert response.headers['X-Query-Count'] == '1'
+        assert 'query_started' not in connection.info
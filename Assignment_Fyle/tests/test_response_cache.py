@@ -0,0 +1,100 @@
+import logging
+import pytest
+import time
+from flask import Flask
+from app.cache import CachedResponse, LocalBackend
+from app.middleware.response_cache import ResponseCache, get_cache, init_app
+from config import Config
+
+def entry(body, scope, ttl=60):
+    return CachedResponse(body, 'application/json', None, None, scope, time.time() + ttl)
+
+def test_lru_eviction_respects_byte_budget():
+    cache = ResponseCache(LocalBackend(max_bytes=10), ttl=60)
+    cache.set('a', entry(b'1234', 'x'))
+    cache.set('b', entry(b'1234', 'x'))
+    cache.get('a')  # 'b' is now least recently used
+    cache.set('c', entry(b'1234', 'y'))
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] == 8
+
+def test_oversized_entries_are_not_stored():
+    cache = ResponseCache(LocalBackend(max_bytes=4), ttl=60)
+    cache.set('a', entry(b'12345', 'x'))
+    assert cache.get('a') is None
+
+def test_invalidate_drops_only_matching_scopes():
+    cache = ResponseCache(LocalBackend(max_bytes=100), ttl=60)
+    cache.set('a', entry(b'1', 'student:1'))
+    cache.set('b', entry(b'2', 'student:2'))
+    cache.invalidate({'student:1'})
+
+    assert cache.get('a') is None
+    assert cache.get('b') is not None
+    assert cache.stats()['invalidations'] == 1
+
+def test_expired_entries_miss():
+    cache = ResponseCache(LocalBackend(max_bytes=100), ttl=60)
+    cache.set('a', entry(b'1', 'x', ttl=-1))
+    assert cache.get('a') is None
+    assert cache.stats()['misses'] == 1
+
+@pytest.fixture
+def response_cache(app):
+    app.config['RESPONSE_CACHE_ENABLED'] = True
+    cache = get_cache()
+    cache.clear()
+    yield cache
+    cache.clear()
+    app.config['RESPONSE_CACHE_ENABLED'] = False
+
+def test_list_served_from_cache_until_grade(client, db_session, test_data, auth_headers, response_cache):
+    headers = {'X-Principal': '{"user_id": 1, "teacher_id": %d}' % test_data['teacher'].id}
+
+    first = client.get('/teacher/assignments', headers=headers)
+    second = client.get('/teacher/assignments', headers=headers)
+    assert 'X-Cache' not in first.headers
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+    assert second.headers['ETag'] == first.headers['ETag']
+
+    client.post('/principal/assignments/grade',
+                json={'id': test_data['assignment'].id, 'grade': 'A'},
+                headers=auth_headers['principal'])
+
+    third = client.get('/teacher/assignments', headers=headers)
+    assert 'X-Cache' not in third.headers
+    assert third.get_json()['data'] == []
+
+def test_cache_hit_honours_if_none_match(client, db_session, test_data, auth_headers, response_cache):
+    first = client.get('/principal/assignments', headers=auth_headers['principal'])
+    response = client.get('/principal/assignments',
+                          headers={**auth_headers['principal'], 'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.headers['X-Cache'] == 'HIT'
+
+def test_student_write_invalidates_own_scope(client, db_session, test_data, response_cache):
+    headers = {'X-Principal': '{"user_id": 1, "student_id": %d}' % test_data['student'].id}
+    client.get('/student/assignments', headers=headers)
+    client.post('/student/assignments', json={'content': 'New draft'}, headers=headers)
+
+    response = client.get('/student/assignments', headers=headers)
+    assert 'X-Cache' not in response.headers
+    assert len(response.get_json()['data']) == 2
+
+def test_cache_stats_endpoint(client, response_cache):
+    response = client.get('/monitoring/cache')
+    assert response.status_code == 200
+    assert set(response.get_json()['data']) >= {'hits', 'misses', 'evictions', 'entries', 'bytes'}
+
+def test_per_worker_cache_is_opt_in_and_warns_without_invalidation(caplog):
+    assert Config.RESPONSE_CACHE_ENABLED is False
+
+    app = Flask(__name__)
+    app.config.update(RESPONSE_CACHE_ENABLED=True, CACHE_BACKEND='local')
+    with caplog.at_level(logging.WARNING, logger='app.middleware.response_cache'):
+        init_app(app)
+    assert 'CACHE_INVALIDATION_URL is not set' in caplog.text
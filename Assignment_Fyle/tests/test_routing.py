@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import select, text
+from app import create_app, db
+from app.models import Assignment, Student, Teacher
+from app.models.assignment_content import with_stored_content
+from app.services.report_service import get_registry
+from config import Config
+
+PRINCIPAL = {'X-Principal': '{"user_id": 3, "principal_id": 1}'}
+
+def seed(content, grade):
+    db.session.add_all([Student(user_id=1), Teacher(user_id=2)])
+    db.session.flush()
+    db.session.add(Assignment(content=content, state='GRADED', grade=grade, student_id=1, teacher_id=1))
+    db.session.commit()
+
+@pytest.fixture
+def routed_app(tmp_path, monkeypatch):
+    """App on a primary SQLite file with a second file as its replica, holding different rows"""
+    primary, replica = f"sqlite:///{tmp_path / 'primary.db'}", f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', primary)
+    monkeypatch.setattr(Config, 'SQLALCHEMY_REPLICA_URI', replica)
+    monkeypatch.setattr(Config, 'RESPONSE_CACHE_ENABLED', False)
+    app = create_app()
+
+    with app.app_context():
+        db.metadata.create_all(db.get_engine(app, bind='replica'))
+        seed('primary essay', 'A')
+        # Outside a request everything goes to the primary, so seed the replica directly
+        with db.get_engine(app, bind='replica').begin() as conn:
+            conn.execute(Student.__table__.insert(), {'user_id': 1})
+            conn.execute(Teacher.__table__.insert(), {'user_id': 2})
+            conn.execute(Assignment.__table__.insert(), with_stored_content(conn, [{
+                'content': 'replica essay', 'state': 'GRADED', 'grade': 'B', 'student_id': 1, 'teacher_id': 1
+            }]))
+        get_registry().invalidate()
+        yield app
+        db.session.remove()
+
+def content_of(assignment_id):
+    return db.session.execute(select(Assignment.content).where(Assignment.id == assignment_id)).scalar()
+
+def test_get_requests_read_from_replica(routed_app):
+    response = routed_app.test_client().get('/principal/assignments?fields=content', headers=PRINCIPAL)
+    assert [a['content'] for a in response.get_json()['data']] == ['replica essay']
+
+def test_reports_read_from_replica(routed_app):
+    response = routed_app.test_client().get('/principal/reports/grade-distribution', headers=PRINCIPAL)
+    assert response.get_json()['data'] == [{'grade': 'B', 'assignment_count': 1}]
+
+def test_writes_go_to_primary(routed_app):
+    response = routed_app.test_client().post('/principal/assignments/grade',
+                                              json={'id': 1, 'grade': 'C'}, headers=PRINCIPAL)
+    assert response.get_json()['data']['content'] == 'primary essay'
+    with db.get_engine(routed_app).connect() as conn:
+        assert conn.execute(text('SELECT grade FROM assignments')).scalar() == 'C'
+    with db.get_engine(routed_app, bind='replica').connect() as conn:
+        assert conn.execute(text('SELECT grade FROM assignments')).scalar() == 'B'
+
+def test_reads_stick_to_primary_after_commit(routed_app):
+    with routed_app.test_request_context('/principal/assignments', method='GET'):
+        assert content_of(1) == 'replica essay'
+        db.session.add(Assignment(content='draft', state='DRAFT', student_id=1))
+        db.session.commit()
+        assert content_of(1) == 'primary essay'
+        assert content_of(2) == 'draft'
+
+    with routed_app.test_request_context('/principal/assignments', method='GET'):
+        assert content_of(1) == 'replica essay'
+
+def test_without_replica_everything_uses_primary(app, db_session, test_data):
+    with app.test_request_context('/principal/assignments', method='GET'):
+        assert db.session().get_bind().engine is db.engine
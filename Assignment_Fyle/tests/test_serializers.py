@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+from app.serializers import ASSIGNMENT_FIELDS, dumps, serialize_assignment, serialize_rows
+
+def test_serialize_rows_formats_datetimes():
+    first = datetime(2025, 1, 25, 10, 0, 0)
+    second = datetime(2025, 1, 25, 10, 0, 0, 500)
+    rows = [
+        (1, 'a', 'DRAFT', None, 1, None, first, first),
+        (2, 'b', 'DRAFT', None, 1, None, first, second),
+        (3, 'c', 'DRAFT', None, 1, None, second, None),
+    ]
+    data = serialize_rows(rows)
+
+    assert [list(item) for item in data] == [list(ASSIGNMENT_FIELDS)] * 3
+    assert data[0]['created_at'] == first.isoformat()
+    assert data[1]['created_at'] == first.isoformat()
+    assert data[1]['updated_at'] == second.isoformat()
+    assert data[2]['created_at'] == second.isoformat()
+    assert data[2]['updated_at'] is None
+
+def test_serialize_assignment_subset(test_data):
+    data = serialize_assignment(test_data['assignment'], fields=('id', 'state'))
+    assert data == {'id': test_data['assignment'].id, 'state': 'SUBMITTED'}
+
+def test_dumps_backends_match(app):
+    payload = {'data': serialize_rows([(1, 'x', 'GRADED', 'A', 1, 2, datetime(2025, 1, 1), datetime(2025, 1, 2))])}
+    with app.test_request_context():
+        fast = dumps(payload)
+        app.config['FAST_JSON'] = False
+        try:
+            plain = dumps(payload)
+        finally:
+            app.config['FAST_JSON'] = True
+
+    assert json.loads(fast) == json.loads(plain) == payload
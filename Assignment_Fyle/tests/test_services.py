@@ -0,0 +1,137 @@
+import pytest
+from datetime import datetime
+from app.models.assignment import Assignment
+from app.models.grade_stat import GradeStat
+from app.services.grading_service import MAX_BULK_GRADES, grade_assignment, grade_assignments
+from app.services.grade_stats_service import (
+    apply_grade_deltas, find_grade_stat_drift, grade_distribution, rebuild_grade_stats, top_a_graders
+)
+from app.exceptions import GradingError, StateError
+
+def test_grade_assignment(db_session, test_data):
+    assignment = grade_assignment(test_data['assignment'], 'B')
+    assert assignment.grade == 'B'
+    assert assignment.state == 'GRADED'
+
+def test_grade_assignment_twice_without_grader(db_session, test_data):
+    grade_assignment(test_data['assignment'], 'B')
+    with pytest.raises(StateError):
+        grade_assignment(test_data['assignment'], 'A')
+
+def test_grade_assignments_reports_each_item(db_session, test_data):
+    draft = Assignment(content="Draft", state="DRAFT", student_id=test_data['student'].id)
+    db_session.add(draft)
+    db_session.commit()
+    submitted_id = test_data['assignment'].id
+
+    results = grade_assignments([
+        {'id': submitted_id, 'grade': 'A'},
+        {'id': draft.id, 'grade': 'A'},
+        {'id': 999999, 'grade': 'A'},
+        {'id': submitted_id, 'grade': 'B'},
+        {'grade': 'C'},
+    ], as_principal=True)
+    db_session.commit()
+
+    assert results[0] == {'id': submitted_id, 'grade': 'A', 'state': 'GRADED'}
+    assert results[1]['error'] == 'Cannot grade a draft assignment'
+    assert results[2]['error'] == 'Assignment not found'
+    assert results[3]['error'] == 'Duplicate assignment id'
+    assert results[4]['error'] == 'Missing required fields'
+    assert Assignment.query.get(submitted_id).grade == 'A'
+    assert Assignment.query.get(draft.id).state == 'DRAFT'
+
+def test_grade_assignments_invalid_grade_does_not_abort_batch(db_session, test_data):
+    other = Assignment(content="Other", state="SUBMITTED", student_id=test_data['student'].id,
+                       teacher_id=test_data['teacher'].id)
+    db_session.add(other)
+    db_session.commit()
+
+    results = grade_assignments([
+        {'id': test_data['assignment'].id, 'grade': 'X'},
+        {'id': other.id, 'grade': 'C'},
+    ], as_principal=True)
+
+    assert 'Invalid grade' in results[0]['error']
+    assert results[1]['grade'] == 'C'
+
+@pytest.mark.parametrize('items', [None, [], [{'id': 1, 'grade': 'A'}] * (MAX_BULK_GRADES + 1)])
+def test_grade_assignments_rejects_bad_payload(db_session, items):
+    with pytest.raises(GradingError):
+        grade_assignments(items, as_principal=True)
+
+def stat_counts():
+    return {(stat.teacher_id, stat.grade): stat.count for stat in GradeStat.query if stat.count}
+
+def test_grading_updates_grade_stats(db_session, test_data):
+    teacher_id = test_data['teacher'].id
+    grade_assignment(test_data['assignment'], 'B')
+    db_session.commit()
+    assert stat_counts() == {(teacher_id, 'B'): 1}
+
+    # A principal regrade moves the count from one grade to another
+    grade_assignment(test_data['assignment'], 'A', grader_id=1)
+    db_session.commit()
+    assert stat_counts() == {(teacher_id, 'A'): 1}
+    assert find_grade_stat_drift() == {}
+
+def test_bulk_grading_updates_grade_stats(db_session, test_data):
+    teacher_id = test_data['teacher'].id
+    others = [
+        Assignment(content=f"Essay {i}", state="SUBMITTED",
+                   student_id=test_data['student'].id, teacher_id=teacher_id)
+        for i in range(3)
+    ]
+    db_session.add_all(others)
+    db_session.commit()
+
+    grade_assignments([{'id': a.id, 'grade': 'A'} for a in others] +
+                      [{'id': test_data['assignment'].id, 'grade': 'C'}], as_principal=True)
+    db_session.commit()
+
+    assert stat_counts() == {(teacher_id, 'A'): 3, (teacher_id, 'C'): 1}
+    assert grade_distribution() == [{'grade': 'A', 'assignment_count': 3},
+                                    {'grade': 'C', 'assignment_count': 1}]
+    assert top_a_graders() == [{'teacher_id': teacher_id, 'grade_a_count': 3}]
+
+def test_grade_deltas_add_to_rows_inserted_meanwhile(db_session, test_data):
+    teacher_id = test_data['teacher'].id
+    # As if another transaction gave this teacher's first A while ours ran
+    db_session.add(GradeStat(teacher_id=teacher_id, grade='A', count=1))
+    db_session.commit()
+
+    apply_grade_deltas({(teacher_id, 'A'): 2, (teacher_id, 'B'): 1, (None, 'C'): 1, (teacher_id, 'D'): 0})
+    db_session.commit()
+    assert stat_counts() == {(teacher_id, 'A'): 3, (teacher_id, 'B'): 1}
+
+def test_rebuild_grade_stats_fixes_drift(db_session, test_data):
+    teacher_id = test_data['teacher'].id
+    # Written directly, bypassing the grading service
+    test_data['assignment'].state = 'GRADED'
+    test_data['assignment'].grade = 'D'
+    db_session.commit()
+    assert find_grade_stat_drift() == {(teacher_id, 'D'): (0, 1)}
+
+    rebuild_grade_stats()
+    db_session.commit()
+    assert find_grade_stat_drift() == {}
+    assert stat_counts() == {(teacher_id, 'D'): 1}
+
+def test_bulk_create_ids_are_only_the_batch(db_session, test_data):
+    from app.models.assignment_content import store
+    from app.services.assignment_service import _insert_assignments
+    student_id = test_data['student'].id
+    created_at = datetime(2025, 1, 1, 12, 0)
+    # Same student and timestamp, as from a concurrent request in the same microsecond
+    earlier = Assignment(content='Earlier', state='DRAFT', student_id=student_id, created_at=created_at)
+    db_session.add(earlier)
+    db_session.flush()
+
+    content_digest = store(db_session.connection(), ['Batch essay'])[0]
+    mappings = [{'state': 'DRAFT', 'student_id': student_id, 'created_at': created_at, 'updated_at': created_at,
+                 'content_digest': content_digest} for _ in range(3)]
+    ids = _insert_assignments(mappings, student_id, created_at)
+
+    assert len(ids) == 3 and earlier.id not in ids
+    assert ids == sorted(ids)
+    assert {Assignment.query.get(i).content for i in ids} == {'Batch essay'}
@@ -0,0 +1,39 @@
+import pytest
+from sqlalchemy import text
+from app import create_app, db
+from app.database.sqlite_profile import _is_file_database
+from config import Config
+
+def pragma(name):
+    return db.session.execute(text(f'PRAGMA {name}')).scalar()
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Build a non-testing app on an SQLite file, with SQLITE_TUNING set by the test"""
+    def build(tuning):
+        monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'school.db'}")
+        monkeypatch.setattr(Config, 'SQLITE_TUNING', tuning)
+        return create_app()
+    return build
+
+def test_profile_is_opt_in(file_app):
+    with file_app(False).app_context():
+        assert pragma('journal_mode') == 'delete'
+        assert pragma('synchronous') == 2  # FULL
+        db.session.remove()
+
+def test_profile_applies_pragmas(file_app):
+    with file_app(True).app_context():
+        assert pragma('journal_mode') == 'wal'
+        assert pragma('synchronous') == 1  # NORMAL
+        assert pragma('busy_timeout') == 5000
+        assert pragma('cache_size') == -64 * 1024
+        assert pragma('mmap_size') == 256 * 1024 * 1024
+        assert pragma('temp_store') == 2  # MEMORY
+        db.session.remove()
+
+def test_profile_only_targets_sqlite_files():
+    assert _is_file_database('sqlite:///app.db')
+    assert not _is_file_database('sqlite:///:memory:')
+    assert not _is_file_database('sqlite://')
+    assert not _is_file_database('postgresql://db/school')
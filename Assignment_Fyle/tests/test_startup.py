@@ -0,0 +1,28 @@
+import click
+from sqlalchemy import inspect
+from app import create_app, db
+from config import Config, ProductionConfig, TestConfig
+
+def tables(app):
+    with app.app_context():
+        return set(inspect(db.engine).get_table_names())
+
+def test_create_all_can_be_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'school.db'}")
+    monkeypatch.setattr(Config, 'CREATE_ALL_ON_STARTUP', False)
+    assert tables(create_app()) == set()
+
+    monkeypatch.setattr(Config, 'CREATE_ALL_ON_STARTUP', True)
+    assert {'students', 'teachers', 'assignments', 'grade_stats'} <= tables(create_app())
+    assert ProductionConfig.CREATE_ALL_ON_STARTUP is False
+
+def test_migrate_is_only_registered_for_flask_commands(tmp_path, monkeypatch):
+    assert 'migrate' not in create_app(testing=True).extensions
+
+    # As loaded by `flask db upgrade`: migrations, not create_all, build the tables
+    monkeypatch.setattr(TestConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'school.db'}")
+    with click.Context(click.Group('flask'), info_name='flask') as root:
+        with click.Context(click.Group('db'), parent=root, info_name='db'):
+            app = create_app(testing=True)
+    assert 'migrate' in app.extensions
+    assert tables(app) == set()
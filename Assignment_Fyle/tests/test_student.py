@@ -1,21 +1,13 @@
 import pytest
 import json
 from datetime import datetime
-from app import db
 from app.models.assignment import Assignment
 
-@pytest.fixture(autouse=True)
-def setup_database(app):
-    with app.app_context():
-        db.create_all()
-        yield
-        db.session.remove()
-        db.drop_all()
-
 @pytest.fixture
 def student_auth_headers():
     return {'X-Principal': json.dumps({"user_id": 1, "student_id": 1})}
 
+@pytest.mark.query_budget(2)
 def test_list_assignments(client, db_session, test_data, student_auth_headers):
     assignments = [
         Assignment(
@@ -39,6 +31,7 @@ def test_list_assignments(client, db_session, test_data, student_auth_headers):
     data = response.get_json()['data']
     assert len(data) == 3
 
+@pytest.mark.query_budget(3)
 def test_create_assignment(client, db_session, student_auth_headers):
     with client.application.app_context():
         response = client.post('/student/assignments', 
@@ -90,6 +83,17 @@ def test_list_assignments_invalid_auth(client):
     response = client.get('/student/assignments', headers=headers)
     assert response.status_code == 400
 
+def test_non_string_content_is_rejected(client, db_session, test_data, student_auth_headers):
+    draft = Assignment(content="Original Content", state="DRAFT", student_id=test_data['student'].id)
+    db_session.add(draft)
+    db_session.commit()
+
+    for body in ({'content': 123}, {'id': draft.id, 'content': 123}):
+        response = client.post('/student/assignments', json=body, headers=student_auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'Content must be a string'
+    assert Assignment.query.get(draft.id).content == 'Original Content'
+
 def test_edit_nonexistent_assignment(client, db_session, student_auth_headers):
     with client.application.app_context():
         response = client.post('/student/assignments',
@@ -167,3 +171,115 @@ def test_edit_submitted_assignment(client, db_session, test_data, student_auth_h
                          json={'id': assignment.id, 'content': 'Updated Content'},
                          headers=student_auth_headers)
     assert response.status_code == 400
+
+def test_list_assignments_next_cursor(client, db_session, test_data, student_auth_headers):
+    db_session.add(Assignment(content="Second", state="DRAFT", student_id=test_data['student'].id))
+    db_session.commit()
+
+    response = client.get('/student/assignments', query_string={'limit': 1},
+                          headers=student_auth_headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    assert len(body['data']) == 1
+    assert body['next_cursor']
+
+    response = client.get('/student/assignments',
+                          query_string={'limit': 1, 'cursor': body['next_cursor']},
+                          headers=student_auth_headers)
+    next_body = response.get_json()
+    assert next_body['data'][0]['id'] != body['data'][0]['id']
+    assert next_body['next_cursor'] is None
+
+def test_list_assignments_invalid_cursor(client, db_session, student_auth_headers):
+    response = client.get('/student/assignments', query_string={'cursor': '!!!'},
+                          headers=student_auth_headers)
+    assert response.status_code == 400
+
+def test_list_assignments_omits_content_by_default(client, db_session, test_data, student_auth_headers):
+    response = client.get('/student/assignments', headers=student_auth_headers)
+    item = response.get_json()['data'][0]
+    assert 'content' not in item
+    assert item['state'] == 'SUBMITTED'
+
+def test_list_assignments_selected_fields(client, db_session, test_data, student_auth_headers):
+    response = client.get('/student/assignments', query_string={'fields': 'id,content'},
+                          headers=student_auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()['data'] == [{'id': test_data['assignment'].id, 'content': 'Test Assignment'}]
+
+def test_list_assignments_unknown_field(client, db_session, student_auth_headers):
+    response = client.get('/student/assignments', query_string={'fields': 'id,password'},
+                          headers=student_auth_headers)
+    assert response.status_code == 400
+
+# Storing the texts, one insert for every row and reading the ids back;
+# a per-row insert would blow the budget
+@pytest.mark.query_budget(3)
+def test_bulk_create_assignments(client, db_session, test_data, student_auth_headers):
+    essays = [{'content': f'Essay {n}'} for n in range(20)]
+    response = client.post('/student/assignments/bulk',
+                           json={'assignments': [{'content': 'One'}, {'content': ''}, {'content': 5},
+                                                 {'content': 'Two'}] + essays},
+                           headers=student_auth_headers)
+    assert response.status_code == 200
+    results = response.get_json()['data']
+    assert results[1] == {'error': 'Content is required'}
+    assert results[2] == {'error': 'Content must be a string'}
+    created = [Assignment.query.get(results[i]['id']) for i in (0, 3, 4, len(results) - 1)]
+    assert [a.content for a in created] == ['One', 'Two', 'Essay 0', 'Essay 19']
+    assert all(a.state == 'DRAFT' and a.student_id == 1 for a in created)
+
+def test_bulk_submit_assignments(client, db_session, test_data, student_auth_headers):
+    draft = Assignment(content="Draft", state="DRAFT", student_id=test_data['student'].id)
+    others = Assignment(content="Not mine", state="DRAFT", student_id=999)
+    db_session.add_all([draft, others])
+    db_session.commit()
+    teacher_id = test_data['teacher'].id
+
+    response = client.post('/student/assignments/submit/bulk',
+                           json={'assignments': [
+                               {'id': draft.id, 'teacher_id': teacher_id},
+                               {'id': others.id, 'teacher_id': teacher_id},
+                               {'id': test_data['assignment'].id, 'teacher_id': teacher_id},
+                               {'id': draft.id},
+                           ]},
+                           headers=student_auth_headers)
+    assert response.status_code == 200
+    results = response.get_json()['data']
+    assert results[0] == {'id': draft.id, 'state': 'SUBMITTED', 'teacher_id': teacher_id}
+    assert results[1]['error'] == 'Not authorized to submit this assignment'
+    assert results[2]['error'] == 'Only draft assignments can be submitted'
+    assert results[3]['error'] == 'Missing required fields'
+    assert Assignment.query.get(others.id).state == 'DRAFT'
+
+def test_bulk_submit_reports_malformed_ids(client, db_session, test_data, student_auth_headers):
+    response = client.post('/student/assignments/submit/bulk',
+                           json={'assignments': [
+                               {'id': {'a': 1}, 'teacher_id': 1},
+                               {'id': test_data['assignment'].id, 'teacher_id': '1'},
+                           ]},
+                           headers=student_auth_headers)
+    assert response.status_code == 200
+    assert [r['error'] for r in response.get_json()['data']] == ['id and teacher_id must be integers'] * 2
+
+def test_bulk_create_requires_list(client, db_session, student_auth_headers):
+    response = client.post('/student/assignments/bulk', json={'assignments': {'content': 'x'}},
+                           headers=student_auth_headers)
+    assert response.status_code == 400
+
+    response = client.post('/student/assignments/bulk', json=[{'content': 'x'}],
+                           headers=student_auth_headers)
+    assert response.status_code == 400
+
+def test_list_assignments_if_modified_since(client, db_session, test_data, student_auth_headers):
+    first = client.get('/student/assignments', headers=student_auth_headers)
+    last_modified = first.headers['Last-Modified']
+
+    response = client.get('/student/assignments',
+                          headers={**student_auth_headers, 'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+
+    response = client.get('/student/assignments',
+                          headers={**student_auth_headers,
+                                   'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+    assert response.status_code == 200
@@ -6,22 +6,8 @@ from app.models.teacher import Teacher
 from app.models.student import Student
 
 @pytest.fixture
-def app():
-    from app import create_app
-    app = create_app(testing=True)
-    return app
-
-@pytest.fixture
-def client(app):
-    return app.test_client()
-
-@pytest.fixture
-def _db(app):
-    with app.app_context():
-        db.create_all()
-        yield db
-        db.session.remove()
-        db.drop_all()
+def _db(db_session):
+    return db
 
 @pytest.fixture
 def setup_test_data(_db):
@@ -45,6 +31,7 @@ def setup_test_data(_db):
 def teacher_auth_headers():
     return {'X-Principal': json.dumps({"user_id": 3, "teacher_id": 1})}
 
+@pytest.mark.query_budget(4)
 def test_grade_assignment(client, _db, test_data, teacher_auth_headers):
     """Test grading an assignment"""
     with client.application.app_context():
@@ -80,6 +67,7 @@ def test_grade_draft_assignment(client, _db, test_data, teacher_auth_headers):
     
     assert response.status_code == 400
 
+@pytest.mark.query_budget(2)
 def test_list_teacher_assignments(client, _db, test_data, teacher_auth_headers):
     """Test listing teacher assignments"""
     with client.application.app_context():
@@ -122,3 +110,99 @@ def test_teacher_assignments_filter(client, db_session, test_data, auth_headers)
     assert all(a['state'] == 'SUBMITTED' for a in data)
 
 # Add more test cases...
+
+def test_list_teacher_assignments_all_fields(client, _db, test_data, teacher_auth_headers):
+    response = client.get('/teacher/assignments', query_string={'fields': 'all'},
+                          headers=teacher_auth_headers)
+    assert response.status_code == 200
+    item = response.get_json()['data'][0]
+    assert item['content'] == 'Test Assignment'
+    assert set(item) == {'id', 'content', 'state', 'grade', 'student_id', 'teacher_id',
+                         'created_at', 'updated_at'}
+
+@pytest.mark.query_budget(3)
+def test_bulk_grade_assignments(client, _db, test_data, teacher_auth_headers):
+    second = Assignment(
+        content="Test Assignment 2",
+        state="SUBMITTED",
+        student_id=test_data['student'].id,
+        teacher_id=test_data['teacher'].id
+    )
+    _db.session.add(second)
+    _db.session.commit()
+
+    response = client.post('/teacher/assignments/grade/bulk',
+                           json={'grades': [
+                               {'id': test_data['assignment'].id, 'grade': 'A'},
+                               {'id': second.id, 'grade': 'B'},
+                               {'id': 999, 'grade': 'C'},
+                           ]},
+                           headers=teacher_auth_headers)
+    assert response.status_code == 200
+    results = response.get_json()['data']
+    assert [r.get('grade') for r in results] == ['A', 'B', None]
+    assert results[2]['error'] == 'Assignment not found'
+    assert Assignment.query.get(second.id).state == 'GRADED'
+
+def test_bulk_grade_requires_list(client, _db, teacher_auth_headers):
+    response = client.post('/teacher/assignments/grade/bulk', json={'grades': 'A'},
+                           headers=teacher_auth_headers)
+    assert response.status_code == 400
+
+    response = client.post('/teacher/assignments/grade/bulk', json=[{'id': 1, 'grade': 'A'}],
+                           headers=teacher_auth_headers)
+    assert response.status_code == 400
+
+def test_bulk_grade_only_own_submitted_assignments(client, _db, test_data, teacher_auth_headers):
+    other = Teacher(user_id=4)
+    _db.session.add(other)
+    _db.session.commit()
+    other_headers = {'X-Principal': json.dumps({"user_id": 4, "teacher_id": other.id})}
+    body = {'grades': [{'id': test_data['assignment'].id, 'grade': 'A'}]}
+
+    response = client.post('/teacher/assignments/grade/bulk', json=body, headers=other_headers)
+    assert response.get_json()['data'][0]['error'] == 'Not authorized to grade this assignment'
+    assert Assignment.query.get(test_data['assignment'].id).state == 'SUBMITTED'
+
+    client.post('/teacher/assignments/grade/bulk', json=body, headers=teacher_auth_headers)
+    body['grades'][0]['grade'] = 'B'
+    response = client.post('/teacher/assignments/grade/bulk', json=body, headers=teacher_auth_headers)
+    assert response.get_json()['data'][0]['error'] == 'Assignment already graded'
+    assert Assignment.query.get(test_data['assignment'].id).grade == 'A'
+
+def test_bulk_grade_reports_malformed_ids(client, _db, test_data, teacher_auth_headers):
+    response = client.post('/teacher/assignments/grade/bulk',
+                           json={'grades': [
+                               {'id': [1], 'grade': 'A'},
+                               {'id': str(test_data['assignment'].id), 'grade': 'A'},
+                               {'id': True, 'grade': 'A'},
+                           ]},
+                           headers=teacher_auth_headers)
+    assert response.status_code == 200
+    assert [r['error'] for r in response.get_json()['data']] == ['Assignment id must be an integer'] * 3
+
+def test_list_teacher_assignments_etag(client, _db, test_data, teacher_auth_headers):
+    first = client.get('/teacher/assignments', headers=teacher_auth_headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Last-Modified']
+
+    cached = client.get('/teacher/assignments', headers={**teacher_auth_headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.headers['ETag'] == etag
+    assert cached.get_data() == b''
+
+    # Grading moves the assignment out of the queue, which changes the version
+    client.post('/teacher/assignments/grade',
+                json={'id': test_data['assignment'].id, 'grade': 'A'},
+                headers=teacher_auth_headers)
+    fresh = client.get('/teacher/assignments', headers={**teacher_auth_headers, 'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != etag
+    assert fresh.get_json()['data'] == []
+
+def test_list_teacher_assignments_etag_varies_with_query(client, _db, test_data, teacher_auth_headers):
+    etag = client.get('/teacher/assignments', headers=teacher_auth_headers).headers['ETag']
+    response = client.get('/teacher/assignments', query_string={'fields': 'all'},
+                          headers={**teacher_auth_headers, 'If-None-Match': etag})
+    assert response.status_code == 200